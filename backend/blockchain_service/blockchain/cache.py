@@ -0,0 +1,116 @@
+import asyncio
+
+from config import HEAD_POLL_INTERVAL
+from logger import error_logger
+
+
+# Classe BlockCache : cache des appels de lecture (view) du contrat, indexé par numéro de bloc.
+# Une valeur lue au bloc N ne peut pas changer avant le bloc N+1 : le cache est vidé à chaque
+# nouvelle tête de chaîne (ou explicitement via invalidate()). Les échecs de cache simultanés
+# pour la même clé partagent un seul appel RPC en cours.
+class BlockCache:
+    def __init__(self, web3, poll_interval=HEAD_POLL_INTERVAL):
+        self.web3 = web3
+        self.poll_interval = poll_interval
+        self.head = None
+        self._generation = 0  # incrémenté à chaque vidage, pour ignorer les réponses arrivées trop tard
+        self._entries = {}
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self.head_listeners = []  # fonctions appelées avec le numéro de chaque nouveau bloc
+        self._task = None
+
+    async def start(self):
+        try:
+            await self.poll_head()
+        except Exception as e:
+            # le noeud ne répond pas encore : les lectures se font sur "latest" jusqu'au prochain tour
+            error_logger.error(f"Error in BlockCache.poll_head: {e}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll_head()
+            except Exception as e:
+                error_logger.error(f"Error in BlockCache.poll_head: {e}")
+
+    async def poll_head(self):
+        self.on_new_head(await self.web3.eth.block_number)
+
+    # Nouvelle tête de chaîne : toutes les valeurs en cache appartiennent à l'ancien bloc
+    def on_new_head(self, block_number):
+        if block_number != self.head:
+            self.head = block_number
+            self.invalidate()
+            for listener in self.head_listeners:
+                listener(block_number)
+
+    # Vider le cache (nouveau bloc, ou une de nos transactions pay/withdraw vient d'être minée)
+    def invalidate(self):
+        self._generation += 1
+        self._entries.clear()
+        self.invalidations += 1
+
+    # Retourner la valeur en cache pour `key`, sinon appeler fetch(block_number) une seule fois
+    async def get(self, key, fetch):
+        if key in self._entries:
+            self.hits += 1
+            return self._entries[key]
+        generation = self._generation
+        flight_key = (key, generation)
+        future = self._in_flight.get(flight_key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # c'est l'appelant qui interrogeait le noeud qui a été annulé, pas nous : on réessaie
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                return await self.get(key, fetch)
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[flight_key] = future
+        try:
+            value = await fetch(self.head)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # marquer l'exception comme lue s'il n'y a aucun autre appelant
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            del self._in_flight[flight_key]
+            # appelant annulé (CancelledError n'est pas une Exception) : les appels regroupés ne doivent pas
+            # attendre indéfiniment
+            if not future.done():
+                future.cancel()
+        if generation == self._generation:
+            self._entries[key] = value
+        return value
+
+    def get_stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "head": self.head,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+        }
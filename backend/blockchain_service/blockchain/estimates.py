@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+from web3 import Web3
+
+from config import GAS_ESTIMATE_CHECK_INTERVAL, GAS_ESTIMATE_MARGIN, GAS_ESTIMATE_TTL, GAS_LIMIT_FALLBACK
+from logger import error_logger, transaction_logger
+
+# Arguments et valeur représentatifs utilisés pour estimer chaque fonction du contrat.
+# withdraw(0) suit le même chemin que withdraw(n) (onlyOwner, vérification du solde, transfer).
+ESTIMATE_SAMPLES = {
+    "pay": {"args": (), "value": 1},
+    "withdraw": {"args": (0,), "value": 0},
+}
+
+
+# Classe GasEstimator : limites de gaz estimées (estimate_gas) une fois par fonction, mises en cache
+# par sélecteur de fonction et forme des arguments, avec une marge de sécurité. Les estimations sont
+# refaites en arrière-plan quand le réseau (chain id) ou le code du contrat change, ou après
+# GAS_ESTIMATE_TTL secondes. Le chemin d'envoi ne fait jamais d'estimate_gas : il lit le cache.
+class GasEstimator:
+    def __init__(self, web3, contract, sender_address, margin=GAS_ESTIMATE_MARGIN, ttl=GAS_ESTIMATE_TTL,
+                 check_interval=GAS_ESTIMATE_CHECK_INTERVAL, fallback=GAS_LIMIT_FALLBACK):
+        self.web3 = web3
+        self.contract = contract
+        self.sender_address = sender_address
+        self.margin = margin
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self.fallback = fallback
+        self.limits = {}  # (sélecteur, types des arguments) -> {"estimate", "limit", "updated_at"}
+        self.fallback_used = 0
+        self._fingerprint = None  # (chain id, hash du code du contrat)
+        self._keys = {function_name: self._key(function_name) for function_name in ESTIMATE_SAMPLES}
+        self._task = None
+
+    async def start(self):
+        try:
+            await self.refresh()
+        except Exception:
+            # le noeud ne répond pas encore : la limite de secours sera utilisée jusqu'au prochain tour
+            pass
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.refresh()
+            except Exception:
+                pass
+
+    # Clé de cache : sélecteur de la fonction + types de ses arguments
+    def _key(self, function_name):
+        function_abi = self.contract.get_function_by_name(function_name).abi
+        selector = self.contract.encode_abi(function_name, args=ESTIMATE_SAMPLES[function_name]["args"])[:10]
+        return selector, tuple(argument["type"] for argument in function_abi["inputs"])
+
+    # Ré-estimer si le réseau ou le contrat a changé, ou si les estimations sont trop anciennes
+    async def refresh(self):
+        try:
+            chain_id, code = await asyncio.gather(self.web3.eth.chain_id, self.web3.eth.get_code(self.contract.address))
+            fingerprint = (chain_id, Web3.to_hex(Web3.keccak(code)))
+            expired = any(time.monotonic() - entry["updated_at"] > self.ttl for entry in self.limits.values())
+            if fingerprint == self._fingerprint and self.limits and not expired:
+                return
+            if self._fingerprint is not None and fingerprint != self._fingerprint:
+                transaction_logger.info("Contract or network changed, re-estimating gas limits.")
+            for function_name in ESTIMATE_SAMPLES:
+                try:
+                    await self._estimate(function_name)
+                except Exception as e:
+                    # ex. withdraw() refusé si SENDER_ADDRESS n'est pas le propriétaire : on garde la limite de secours
+                    error_logger.error(f"Error estimating gas for {function_name}(): {e}")
+            self._fingerprint = fingerprint
+        except Exception as e:
+            error_logger.error(f"Error in GasEstimator.refresh: {e}")
+            raise
+
+    async def _estimate(self, function_name):
+        sample = ESTIMATE_SAMPLES[function_name]
+        function = self.contract.get_function_by_name(function_name)(*sample["args"])
+        estimate = await function.estimate_gas({"from": self.sender_address, "value": sample["value"]})
+        self.limits[self._keys[function_name]] = {
+            "function": function_name,
+            "estimate": estimate,
+            "limit": int(estimate * self.margin),
+            "updated_at": time.monotonic(),
+        }
+
+    # Limite de gaz à utiliser pour une fonction (lecture du cache uniquement)
+    def get_limit(self, function_name):
+        entry = self.limits.get(self._keys[function_name])
+        if entry is None:
+            self.fallback_used += 1
+            return self.fallback
+        return entry["limit"]
+
+    def get_stats(self):
+        return {
+            "margin": self.margin,
+            "fallback": self.fallback,
+            "fallback_used": self.fallback_used,
+            "limits": {
+                f"{entry['function']}{list(key[1])} {key[0]}": {"estimate": entry["estimate"], "limit": entry["limit"]}
+                for key, entry in self.limits.items()
+            },
+        }
@@ -0,0 +1,84 @@
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from blockchain.model import ContractEvent, IndexerCheckpoint, utc_now
+
+# Checkpoint de l'indexeur des évènements du contrat
+CHECKPOINT_NAME = "contract_events"
+
+
+# Classe ContractEventRepository : accès à la table locale des évènements indexés (aucun appel au noeud).
+# Séparée de repository.py pour que la route /events n'importe pas web3 au démarrage du service.
+class ContractEventRepository:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get_checkpoint(self, name):
+        return await self.session.get(IndexerCheckpoint, name)
+
+    # Enregistrer les évènements d'une plage de blocs et avancer le checkpoint dans la même transaction
+    async def save_range(self, name, events, last_block, last_block_hash):
+        self.session.add_all(events)
+        checkpoint = await self.session.get(IndexerCheckpoint, name)
+        if checkpoint is None:
+            checkpoint = IndexerCheckpoint(name=name, last_block=last_block)
+        checkpoint.last_block = last_block
+        checkpoint.last_block_hash = last_block_hash
+        checkpoint.updated_at = utc_now()
+        self.session.add(checkpoint)
+        await self.session.commit()
+
+    # Réorganisation de chaîne : supprimer les évènements après `block_number` et reculer le checkpoint
+    async def rewind(self, name, block_number, block_hash):
+        await self.session.execute(delete(ContractEvent).where(ContractEvent.block_number > block_number))
+        checkpoint = await self.session.get(IndexerCheckpoint, name)
+        if checkpoint is not None:
+            checkpoint.last_block = block_number
+            checkpoint.last_block_hash = block_hash
+            checkpoint.updated_at = utc_now()
+            self.session.add(checkpoint)
+        await self.session.commit()
+
+    # Hash de bloc des évènements enregistrés dans un intervalle de blocs (détection des réorganisations)
+    async def block_hashes(self, from_block, to_block):
+        result = await self.session.execute(
+            select(ContractEvent.block_number, ContractEvent.block_hash)
+            .where(ContractEvent.block_number >= from_block, ContractEvent.block_number <= to_block)
+            .distinct()
+        )
+        return {block_number: block_hash for block_number, block_hash in result.all()}
+
+    # Rechercher les évènements par adresse, type, intervalle de temps et montant
+    async def search(self, address=None, event=None, from_time=None, to_time=None,
+                     min_amount=None, max_amount=None, limit=100, offset=0):
+        query = select(ContractEvent)
+        if address is not None:
+            query = query.where(ContractEvent.address == address)
+        if event is not None:
+            query = query.where(ContractEvent.event == event)
+        if from_time is not None:
+            query = query.where(ContractEvent.block_timestamp >= from_time)
+        if to_time is not None:
+            query = query.where(ContractEvent.block_timestamp <= to_time)
+        if min_amount is not None:
+            query = query.where(ContractEvent.amount >= min_amount)
+        if max_amount is not None:
+            query = query.where(ContractEvent.amount <= max_amount)
+        query = query.order_by(ContractEvent.block_number.desc(), ContractEvent.log_index.desc())
+        result = await self.session.execute(query.offset(offset).limit(limit))
+        return result.scalars().all()
+
+    # Évènements d'un intervalle de blocs, dans l'ordre de la chaîne (reprise du flux /events/stream)
+    async def between_blocks(self, from_block, to_block, limit=500, offset=0):
+        query = (
+            select(ContractEvent)
+            .where(ContractEvent.block_number >= from_block, ContractEvent.block_number <= to_block)
+            .order_by(ContractEvent.block_number, ContractEvent.log_index)
+        )
+        result = await self.session.execute(query.offset(offset).limit(limit))
+        return result.scalars().all()
+
+    # Évènements émis par une liste de transactions (rapprochement avec le journal des envois)
+    async def by_tx_hashes(self, tx_hashes):
+        result = await self.session.execute(select(ContractEvent).where(ContractEvent.tx_hash.in_(tx_hashes)))
+        return result.scalars().all()
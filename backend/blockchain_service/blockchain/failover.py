@@ -0,0 +1,266 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from aiohttp import ClientError
+from web3 import Web3
+from web3._utils.batching import sort_batch_response_by_response_ids
+from web3.exceptions import Web3RPCError
+from web3.providers import AsyncHTTPProvider
+from web3.providers.async_base import AsyncJSONBaseProvider
+from web3.types import RPCEndpoint
+
+from config import RPC_COOLDOWN, RPC_EWMA_ALPHA, RPC_HEDGE_DELAY, RPC_MAX_FAILURES
+from logger import error_logger, transaction_logger
+
+# Lectures idempotentes : une seconde requête peut être envoyée à un autre noeud si la première tarde
+HEDGED_METHODS = {
+    "eth_call", "eth_getBalance", "eth_getCode", "eth_getLogs", "eth_getTransactionReceipt",
+    "eth_getTransactionByHash", "eth_getBlockByNumber", "eth_getBlockByHash",
+}
+# Écritures : jamais doublées, et rejouées sur un autre noeud uniquement avec la même transaction signée
+WRITE_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction"}
+# Erreurs de transport : le noeud n'a pas répondu (ou pas correctement), on passe au suivant
+TRANSPORT_ERRORS = (ClientError, asyncio.TimeoutError, OSError, ValueError)
+# Erreurs JSON-RPC qui viennent du noeud lui-même (quota dépassé) et non de la requête
+PROVIDER_ERROR_CODES = {-32005}
+# Réponses d'un noeud qui a déjà reçu notre transaction (envoyée à un noeud précédent)
+ALREADY_KNOWN_ERRORS = ("already known", "known transaction", "already imported")
+
+
+class ProviderUnavailable(Exception):
+    pass
+
+
+# Réponses d'un lot JSON-RPC, une par requête et dans l'ordre. Un noeud qui refuse tout le lot (trop
+# grand, méthode interdite, quota) répond par une seule erreur au lieu d'une liste : Web3RPCError.
+def batch_responses(responses, expected):
+    if isinstance(responses, dict):
+        error = responses.get("error")
+        message = error.get("message", str(error)) if isinstance(error, dict) else str(error or responses)
+        raise Web3RPCError(f"Batch rejected: {message}", rpc_response=responses)
+    if not isinstance(responses, list) or len(responses) != expected:
+        got = len(responses) if isinstance(responses, list) else repr(responses)
+        raise Web3RPCError(f"Batch reply: expected {expected} responses, got {got}")
+    return responses
+
+
+# AsyncHTTPProvider dont make_batch_request renvoie telle quelle la réponse d'erreur unique d'un lot refusé :
+# web3 7.6 essaie de la trier comme une liste et lève une AttributeError sans rapport avec l'erreur du noeud
+class BatchHTTPProvider(AsyncHTTPProvider):
+    async def make_batch_request(self, batch_requests):
+        request_data = self.encode_batch_rpc_request(batch_requests)
+        raw_response = await self._request_session_manager.async_make_post_request(
+            self.endpoint_uri, request_data, **self.get_request_kwargs()
+        )
+        responses = self.decode_rpc_response(raw_response)
+        if isinstance(responses, dict):
+            return responses
+        return sort_batch_response_by_response_ids(responses)
+
+
+# Un noeud RPC : latence moyenne exponentielle (EWMA) et état de santé
+class Endpoint:
+    def __init__(self, endpoint_uri, provider):
+        self.endpoint_uri = endpoint_uri
+        self.provider = provider
+        self.latency = None  # EWMA en secondes, None tant qu'aucune réponse n'a été mesurée
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.hedges_won = 0
+        self.unhealthy_until = 0.0
+
+    # L'URL Infura contient la clé du projet : on n'expose que le schéma et l'hôte
+    @property
+    def name(self):
+        parts = urlsplit(self.endpoint_uri)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def is_healthy(self, now):
+        return now >= self.unhealthy_until
+
+    def record_latency(self, elapsed):
+        if self.latency is None:
+            self.latency = elapsed
+        else:
+            self.latency = RPC_EWMA_ALPHA * elapsed + (1 - RPC_EWMA_ALPHA) * self.latency
+
+    def record_success(self, elapsed):
+        self.record_latency(elapsed)
+        self.consecutive_failures = 0
+
+    def record_failure(self, elapsed, error):
+        # un échec compte comme une réponse lente, pour que le noeud recule dans le classement
+        self.record_latency(elapsed)
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= RPC_MAX_FAILURES:
+            self.unhealthy_until = time.monotonic() + RPC_COOLDOWN
+            self.consecutive_failures = 0
+            error_logger.error(f"RPC endpoint {self.name} marked unhealthy for {RPC_COOLDOWN}s: {error}")
+
+    def get_stats(self, now):
+        return {
+            "endpoint": self.name,
+            "healthy": self.is_healthy(now),
+            "latency_ewma_ms": round(self.latency * 1000, 1) if self.latency is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+            "hedges_won": self.hedges_won,
+        }
+
+
+# Classe FailoverProvider : provider AsyncWeb3 réparti sur plusieurs noeuds RPC.
+# Chaque requête va au noeud en bonne santé dont la latence moyenne (EWMA) est la plus faible, et
+# passe au suivant en cas d'erreur de transport. Les lectures idempotentes sont doublées (hedging) :
+# si le premier noeud n'a pas répondu après RPC_HEDGE_DELAY secondes, le suivant est interrogé aussi
+# et la première réponse gagne. Les écritures (eth_sendRawTransaction) ne sont jamais doublées ; en
+# cas d'échec, la même transaction signée (même nonce, même hash) est rejouée sur le noeud suivant,
+# ce qui ne peut pas créer de doublon : au pire le noeud répond qu'il la connaît déjà.
+class FailoverProvider(AsyncJSONBaseProvider):
+    def __init__(self, endpoint_uris, request_kwargs=None, hedge_delay=RPC_HEDGE_DELAY):
+        super().__init__()
+        self.hedge_delay = hedge_delay
+        self.hedged_requests = 0
+        self.endpoints = []
+        for endpoint_uri in endpoint_uris:
+            # avec plusieurs noeuds, on bascule sur le suivant au lieu de réessayer le même
+            kwargs = {"exception_retry_configuration": None} if len(endpoint_uris) > 1 else {}
+            provider = BatchHTTPProvider(endpoint_uri, request_kwargs=request_kwargs, **kwargs)
+            self.endpoints.append(Endpoint(endpoint_uri, provider))
+
+    def __str__(self):
+        return f"Failover RPC connection {[endpoint.name for endpoint in self.endpoints]}"
+
+    # La même session aiohttp (pool de connexions) sert pour tous les noeuds
+    async def cache_async_session(self, session):
+        for endpoint in self.endpoints:
+            await endpoint.provider.cache_async_session(session)
+        return session
+
+    # Noeuds en bonne santé du plus rapide au plus lent, puis les noeuds écartés (dernier recours)
+    def _ranked(self):
+        now = time.monotonic()
+        healthy = [endpoint for endpoint in self.endpoints if endpoint.is_healthy(now)]
+        unhealthy = [endpoint for endpoint in self.endpoints if not endpoint.is_healthy(now)]
+        # un noeud jamais mesuré passe en premier pour obtenir une mesure
+        healthy.sort(key=lambda endpoint: endpoint.latency if endpoint.latency is not None else 0.0)
+        unhealthy.sort(key=lambda endpoint: endpoint.unhealthy_until)
+        return healthy + unhealthy
+
+    async def _attempt(self, endpoint, send):
+        endpoint.requests += 1
+        start = time.monotonic()
+        try:
+            response = await send(endpoint.provider)
+        except asyncio.CancelledError:
+            # requête doublée perdante : le temps écoulé est une borne basse de sa latence
+            endpoint.record_latency(time.monotonic() - start)
+            raise
+        except TRANSPORT_ERRORS as e:
+            endpoint.record_failure(time.monotonic() - start, e)
+            raise
+        error = response.get("error") if isinstance(response, dict) else None
+        if isinstance(error, dict) and error.get("code") in PROVIDER_ERROR_CODES:
+            endpoint.record_failure(time.monotonic() - start, error)
+            raise ProviderUnavailable(error.get("message", str(error)))
+        endpoint.record_success(time.monotonic() - start)
+        return response
+
+    # Essayer les noeuds l'un après l'autre jusqu'à obtenir une réponse
+    async def _failover(self, send, description):
+        last_error = None
+        for endpoint in self._ranked():
+            try:
+                return await self._attempt(endpoint, send)
+            except (ProviderUnavailable, *TRANSPORT_ERRORS) as e:
+                last_error = e
+                error_logger.error(f"RPC {description} failed on {endpoint.name}: {e}")
+        raise last_error
+
+    # Lecture doublée : le noeud suivant est interrogé si le précédent n'a pas répondu à temps
+    # (ou a échoué) ; la première réponse gagne et les autres requêtes sont annulées.
+    async def _hedged(self, send, description):
+        endpoints = self._ranked()
+        if self.hedge_delay <= 0 or len(endpoints) == 1:
+            return await self._failover(send, description)
+        pending = {}
+        last_error = None
+        try:
+            for index, endpoint in enumerate(endpoints):
+                if pending:
+                    self.hedged_requests += 1
+                pending[asyncio.ensure_future(self._attempt(endpoint, send))] = endpoint
+                # pour le dernier noeud, plus rien à lancer : on attend la fin des requêtes en cours
+                timeout = None if index == len(endpoints) - 1 else self.hedge_delay
+                while pending:
+                    done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        break  # trop lent : on interroge aussi le noeud suivant
+                    for task in done:
+                        finished = pending.pop(task)
+                        if task.exception() is None:
+                            if pending:
+                                finished.hedges_won += 1
+                            return task.result()
+                        last_error = task.exception()
+                        error_logger.error(f"RPC {description} failed on {finished.name}: {last_error}")
+                    if not pending:
+                        break  # toutes les requêtes en cours ont échoué : noeud suivant sans attendre
+            raise last_error
+        finally:
+            for task in pending:
+                if task.done():
+                    task.exception()  # marquer l'exception comme lue
+                else:
+                    task.cancel()
+
+    # Envoi d'une transaction signée : un seul noeud à la fois. Un noeud suivant qui répond
+    # "already known" a reçu la transaction du noeud précédent : c'est un succès, pas un doublon.
+    async def _send_write(self, send, description, tx_hashes):
+        responses = await self._failover(send, description)
+        single = isinstance(responses, dict)
+        fixed = []
+        for response, tx_hash in zip([responses] if single else responses, tx_hashes):
+            error = response.get("error")
+            message = (error.get("message", "") if isinstance(error, dict) else str(error or "")).lower()
+            if tx_hash is not None and any(reason in message for reason in ALREADY_KNOWN_ERRORS):
+                transaction_logger.info(f"Transaction {tx_hash} already known by the node, treated as sent.")
+                response = {"jsonrpc": "2.0", "id": response.get("id"), "result": tx_hash}
+            fixed.append(response)
+        return fixed[0] if single else fixed
+
+    @staticmethod
+    def _raw_tx_hash(method, params):
+        if method == "eth_sendRawTransaction" and params:
+            return Web3.to_hex(Web3.keccak(hexstr=params[0]) if isinstance(params[0], str) else Web3.keccak(params[0]))
+        return None
+
+    async def make_request(self, method, params):
+        async def send(provider):
+            return await provider.make_request(RPCEndpoint(method), params)
+        if method in WRITE_METHODS:
+            return await self._send_write(send, method, [self._raw_tx_hash(method, params)])
+        if method in HEDGED_METHODS:
+            return await self._hedged(send, method)
+        return await self._failover(send, method)
+
+    async def make_batch_request(self, requests):
+        async def send(provider):
+            return await provider.make_batch_request(requests)
+        methods = {method for method, _ in requests}
+        description = f"batch of {len(requests)} ({', '.join(sorted(methods))})"
+        if methods & WRITE_METHODS:
+            return await self._send_write(send, description, [self._raw_tx_hash(m, p) for m, p in requests])
+        if methods <= HEDGED_METHODS:
+            return await self._hedged(send, description)
+        return await self._failover(send, description)
+
+    def get_stats(self):
+        now = time.monotonic()
+        return {
+            "hedge_delay": self.hedge_delay,
+            "hedged_requests": self.hedged_requests,
+            "endpoints": [endpoint.get_stats(now) for endpoint in self._ranked()],
+        }
@@ -0,0 +1,106 @@
+import asyncio
+import statistics
+import time
+
+from config import GAS_HISTORY_BLOCKS, GAS_REFRESH_INTERVAL, GAS_STRATEGIES, GAS_TTL
+from logger import error_logger
+
+# Stratégies de frais : percentile des pourboires (priority fee) observés sur les derniers blocs
+FEE_PERCENTILES = {"slow": 10, "standard": 50, "fast": 90}
+
+
+# Classe GasOracle : rafraîchit eth_gasPrice et eth_feeHistory en arrière-plan et sert les valeurs
+# en cache aux envois de transactions, sans aucun appel RPC sur le chemin de la requête.
+class GasOracle:
+    def __init__(self, web3, refresh_interval=GAS_REFRESH_INTERVAL, ttl=GAS_TTL,
+                 history_blocks=GAS_HISTORY_BLOCKS, strategies=None):
+        self.web3 = web3
+        self.refresh_interval = refresh_interval
+        self.ttl = ttl
+        self.history_blocks = history_blocks
+        self.strategies = strategies or GAS_STRATEGIES
+        self.gas_price = None
+        self.base_fee = None
+        self.priority_fees = {}  # stratégie -> pourboire en wei
+        self.updated_at = None
+        self._refresh_lock = asyncio.Lock()
+        self._task = None
+
+    async def start(self):
+        try:
+            await self.refresh()
+        except Exception:
+            # le noeud ne répond pas encore : get_fees() et la tâche de fond réessaieront
+            pass
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception:
+                # l'erreur est déjà loggée, on garde les dernières valeurs jusqu'au prochain tour
+                pass
+
+    # Lire le prix du gaz et l'historique des frais (un seul aller-retour par intervalle)
+    async def refresh(self):
+        try:
+            gas_price, history = await asyncio.gather(
+                self.web3.eth.gas_price,
+                self.web3.eth.fee_history(self.history_blocks, "latest", list(FEE_PERCENTILES.values())),
+            )
+            base_fees = history.get("baseFeePerGas") or []
+            rewards = history.get("reward") or []
+            priority_fees = {}
+            for index, name in enumerate(FEE_PERCENTILES):
+                samples = [block[index] for block in rewards if len(block) > index]
+                priority_fees[name] = int(statistics.median(samples)) if samples else 0
+            self.gas_price = gas_price
+            # le dernier élément de baseFeePerGas est le base fee prévu pour le prochain bloc
+            self.base_fee = base_fees[-1] if base_fees else None
+            self.priority_fees = priority_fees
+            self.updated_at = time.monotonic()
+        except Exception as e:
+            error_logger.error(f"Error in GasOracle.refresh: {e}")
+            raise
+
+    def is_stale(self):
+        return self.updated_at is None or time.monotonic() - self.updated_at > self.ttl
+
+    # Frais à mettre dans la transaction selon le type d'opération ("payment", "withdraw", ...)
+    async def get_fees(self, operation):
+        if self.is_stale():
+            # la tâche de fond est en retard (ou pas démarrée) : un seul rafraîchissement pour tous les appelants
+            async with self._refresh_lock:
+                if self.is_stale():
+                    await self.refresh()
+        strategy = self.strategies.get(operation, "standard")
+        priority_fee = self.priority_fees.get(strategy, 0)
+        if self.base_fee is None:
+            # réseau sans EIP-1559 : transaction legacy
+            return {"gasPrice": self.gas_price + priority_fee}
+        return {
+            "maxPriorityFeePerGas": priority_fee,
+            # marge de deux base fees pour rester incluable si le base fee monte pendant quelques blocs
+            "maxFeePerGas": 2 * self.base_fee + priority_fee,
+        }
+
+    def get_stats(self):
+        return {
+            "gas_price": self.gas_price,
+            "base_fee": self.base_fee,
+            "priority_fees": self.priority_fees,
+            "strategies": self.strategies,
+            "age_seconds": None if self.updated_at is None else round(time.monotonic() - self.updated_at, 3),
+            "stale": self.is_stale(),
+        }
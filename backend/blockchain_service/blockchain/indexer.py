@@ -0,0 +1,180 @@
+import asyncio
+from datetime import datetime, timezone
+
+from web3 import Web3
+
+from blockchain.model import ContractEvent
+from blockchain.event_repository import CHECKPOINT_NAME, ContractEventRepository
+from config import (
+    INDEXER_CHUNK_SIZE, INDEXER_CONFIRMATIONS, INDEXER_MAX_CHUNK_SIZE, INDEXER_POLL_INTERVAL, INDEXER_START_BLOCK
+)
+from logger import error_logger, transaction_logger
+
+# Évènements indexés et champ qui porte l'adresse concernée
+INDEXED_EVENTS = {"PaymentReceived": "from", "Withdrawal": "to"}
+
+
+# Classe EventIndexer : parcourt la chaîne par plages de blocs (eth_getLogs), décode les évènements
+# PaymentReceived / Withdrawal et les enregistre dans la base locale. Seuls les blocs ayant
+# INDEXER_CONFIRMATIONS confirmations sont indexés ; si le dernier bloc traité n'est plus dans la
+# chaîne canonique (réorganisation plus profonde), l'indexeur recule et réindexe.
+class EventIndexer:
+    def __init__(self, web3, contract, session_factory, start_block=INDEXER_START_BLOCK,
+                 confirmations=INDEXER_CONFIRMATIONS, chunk_size=INDEXER_CHUNK_SIZE,
+                 max_chunk_size=INDEXER_MAX_CHUNK_SIZE, poll_interval=INDEXER_POLL_INTERVAL):
+        self.web3 = web3
+        self.contract = contract
+        self.session_factory = session_factory
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.chunk_size = chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.poll_interval = poll_interval
+        self.last_block = None
+        self.events_indexed = 0
+        self.reorgs = 0
+        self._events = {name: getattr(contract.events, name)() for name in INDEXED_EVENTS}
+        self._topics = {Web3.to_hex(Web3.keccak(text=event.signature)): name for name, event in self._events.items()}
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sync_once()
+            except Exception as e:
+                error_logger.error(f"Error in EventIndexer: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    # Indexer tous les blocs confirmés depuis le dernier checkpoint
+    async def sync_once(self):
+        head = await self.web3.eth.block_number
+        target = head - self.confirmations
+        async with self.session_factory() as session:
+            repository = ContractEventRepository(session)
+            checkpoint = await repository.get_checkpoint(CHECKPOINT_NAME)
+            if checkpoint is None:
+                from_block = self.start_block
+            else:
+                from_block = await self._check_reorg(repository, checkpoint) + 1
+
+            while from_block <= target:
+                to_block = min(from_block + self.chunk_size - 1, target)
+                try:
+                    logs = await self._get_logs(from_block, to_block)
+                except Exception as e:
+                    if self.chunk_size == 1:
+                        raise
+                    # plage trop grande (trop de résultats ou délai dépassé) : on la réduit de moitié
+                    self.chunk_size = max(1, self.chunk_size // 2)
+                    error_logger.error(f"eth_getLogs {from_block}-{to_block} failed, chunk size now {self.chunk_size}: {e}")
+                    continue
+                headers = await self._get_block_headers({log["blockNumber"] for log in logs} | {to_block})
+                events = [self._to_event(log, headers[log["blockNumber"]]) for log in logs]
+                await repository.save_range(CHECKPOINT_NAME, events, to_block, headers[to_block]["hash"])
+                self.last_block = to_block
+                self.events_indexed += len(events)
+                if events:
+                    transaction_logger.info(f"Indexed {len(events)} contract events in blocks {from_block}-{to_block}")
+                if len(logs) < self.max_chunk_size // 10:
+                    # peu de résultats : on agrandit la plage suivante
+                    self.chunk_size = min(self.max_chunk_size, self.chunk_size * 2)
+                from_block = to_block + 1
+
+    # Vérifier que le dernier bloc indexé est toujours canonique ; sinon reculer de `confirmations` blocs,
+    # autant de fois que nécessaire : après chaque recul, les blocs des évènements enregistrés juste en
+    # dessous sont vérifiés à leur tour. Le hash du bloc où l'on s'arrête est gardé dans le checkpoint
+    # pour être vérifié au passage suivant.
+    async def _check_reorg(self, repository, checkpoint):
+        block = checkpoint.last_block
+        known = {block: checkpoint.last_block_hash} if checkpoint.last_block_hash is not None else {}
+        rewound = False
+        while block >= self.start_block:
+            known.update(await repository.block_hashes(block - self.confirmations + 1, block))
+            if not known:
+                break
+            headers = await self._get_block_headers(set(known))
+            orphaned = sorted(number for number, block_hash in known.items()
+                              if headers[number]["hash"].lower() != block_hash.lower())
+            if not orphaned:
+                break
+            rewind_to = max(self.start_block - 1, min(min(orphaned) - 1, block - self.confirmations))
+            if not rewound:
+                self.reorgs += 1
+            error_logger.error(f"Chain reorganisation detected at block {orphaned[0]}, re-indexing from {rewind_to + 1}")
+            block = rewind_to
+            known = {}
+            rewound = True
+        if rewound:
+            block_hash = None
+            if block >= self.start_block:
+                block_hash = (await self._get_block_headers({block}))[block]["hash"]
+            await repository.rewind(CHECKPOINT_NAME, block, block_hash)
+        return block
+
+    # Évènements décodés d'une plage de blocs, lus directement sur le noeud (sans les enregistrer)
+    async def fetch_events(self, from_block, to_block):
+        logs = await self._get_logs(from_block, to_block)
+        if not logs:
+            return []
+        headers = await self._get_block_headers({log["blockNumber"] for log in logs})
+        return [self._to_event(log, headers[log["blockNumber"]]) for log in logs]
+
+    async def _get_logs(self, from_block, to_block):
+        return await self.web3.eth.get_logs({
+            "address": self.contract.address,
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "topics": [list(self._topics)],
+        })
+
+    # En-têtes (hash et horodatage) de plusieurs blocs en un seul lot JSON-RPC
+    async def _get_block_headers(self, block_numbers):
+        block_numbers = sorted(block_numbers)
+        responses = await self.web3.provider.make_batch_request(
+            [("eth_getBlockByNumber", [hex(number), False]) for number in block_numbers]
+        )
+        headers = {}
+        for number, response in zip(block_numbers, responses):
+            block = response.get("result")
+            if block is None:
+                raise ValueError(f"Block {number} not available: {response.get('error')}")
+            headers[number] = {"hash": block["hash"], "timestamp": int(block["timestamp"], 16)}
+        return headers
+
+    def _to_event(self, log, header):
+        name = self._topics[Web3.to_hex(log["topics"][0])]
+        decoded = self._events[name].process_log(log)
+        amount_wei = decoded["args"]["amount"]
+        return ContractEvent(
+            event=name,
+            address=decoded["args"][INDEXED_EVENTS[name]],
+            amount=float(Web3.from_wei(amount_wei, "ether")),
+            amount_wei=str(amount_wei),
+            block_number=log["blockNumber"],
+            block_hash=Web3.to_hex(log["blockHash"]),
+            # colonne sans fuseau horaire : UTC naïf, comme les lignes déjà enregistrées
+            block_timestamp=datetime.fromtimestamp(header["timestamp"], timezone.utc).replace(tzinfo=None),
+            tx_hash=Web3.to_hex(log["transactionHash"]),
+            log_index=log["logIndex"],
+        )
+
+    def get_stats(self):
+        return {
+            "last_block": self.last_block,
+            "confirmations": self.confirmations,
+            "chunk_size": self.chunk_size,
+            "events_indexed": self.events_indexed,
+            "reorgs": self.reorgs,
+        }
@@ -1,4 +1,8 @@
+from datetime import datetime, timezone
+from typing import Optional
 from pydantic import BaseModel
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field, SQLModel
 
 # Exemple de modèle pour les requêtes et réponses
 class PaymentRequest(BaseModel):
@@ -8,4 +12,33 @@ class BalanceResponse(BaseModel):
     balance: float
 
 class WithdrawRequest(BaseModel):
-    amount: float
\ No newline at end of file
+    amount: float
+
+
+# Évènement PaymentReceived / Withdrawal émis par le contrat SmartPayment, indexé localement
+class ContractEvent(SQLModel, table=True):
+    __table_args__ = (UniqueConstraint("tx_hash", "log_index"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    event: str = Field(index=True)  # "PaymentReceived" ou "Withdrawal"
+    address: str = Field(index=True)  # from (paiement) ou to (retrait)
+    amount: float = Field(index=True)  # en Ether, pour les recherches par montant
+    amount_wei: str  # montant exact en wei (dépasse la taille d'un entier SQLite)
+    block_number: int = Field(index=True)
+    block_hash: str
+    block_timestamp: datetime = Field(index=True)
+    tx_hash: str = Field(index=True)
+    log_index: int
+
+
+# Heure UTC sans fuseau, comme block_timestamp (colonnes DATETIME naïves de SQLite)
+def utc_now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# Dernier bloc traité par l'indexeur (reprise après redémarrage et détection des réorganisations)
+class IndexerCheckpoint(SQLModel, table=True):
+    name: str = Field(primary_key=True)
+    last_block: int
+    last_block_hash: Optional[str] = None
+    updated_at: datetime = Field(default_factory=utc_now)
@@ -0,0 +1,101 @@
+from eth_utils.abi import get_abi_output_types
+from web3 import Web3
+
+from blockchain.failover import batch_responses
+from config import MULTICALL3_ADDRESS
+from logger import error_logger
+
+# ABI minimale de Multicall3 (même adresse sur Ethereum, Sepolia et la plupart des réseaux EVM)
+MULTICALL3_ABI = [
+    {
+        "inputs": [{"components": [
+            {"internalType": "address", "name": "target", "type": "address"},
+            {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+            {"internalType": "bytes", "name": "callData", "type": "bytes"},
+        ], "internalType": "struct Multicall3.Call3[]", "name": "calls", "type": "tuple[]"}],
+        "name": "aggregate3",
+        "outputs": [{"components": [
+            {"internalType": "bool", "name": "success", "type": "bool"},
+            {"internalType": "bytes", "name": "returnData", "type": "bytes"},
+        ], "internalType": "struct Multicall3.Result[]", "name": "returnData", "type": "tuple[]"}],
+        "stateMutability": "payable",
+        "type": "function",
+    },
+    {
+        "inputs": [{"internalType": "address", "name": "addr", "type": "address"}],
+        "name": "getEthBalance",
+        "outputs": [{"internalType": "uint256", "name": "balance", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function",
+    },
+]
+
+# Pseudo-fonction pour lire le solde natif (ETH) d'une adresse : ("eth_getBalance", address)
+NATIVE_BALANCE = "eth_getBalance"
+
+
+# Classe MulticallReader : regroupe plusieurs lectures (fonctions view du contrat et soldes ETH)
+# en un seul aller-retour : un appel Multicall3.aggregate3, ou un lot JSON-RPC si Multicall3
+# n'est pas déployé sur le réseau. Chaque résultat est décodé séparément (None en cas d'échec).
+class MulticallReader:
+    def __init__(self, web3, contract, address=MULTICALL3_ADDRESS):
+        self.web3 = web3
+        self.contract = contract
+        self.multicall = web3.eth.contract(address=Web3.to_checksum_address(address), abi=MULTICALL3_ABI)
+        self.available = None  # inconnu tant que eth_getCode n'a pas été appelé
+
+    async def _is_available(self):
+        if self.available is None:
+            code = await self.web3.eth.get_code(self.multicall.address)
+            self.available = len(code) > 0
+        return self.available
+
+    # calls : liste de tuples (nom_de_fonction, *args) ou (NATIVE_BALANCE, adresse)
+    async def read(self, calls, block_identifier="latest"):
+        encoded = [self._encode(call) for call in calls]
+        if await self._is_available():
+            return await self._read_multicall(encoded, block_identifier)
+        return await self._read_batch(calls, encoded, block_identifier)
+
+    # (cible, calldata, types de retour) pour chaque lecture
+    def _encode(self, call):
+        name, *args = call
+        if name == NATIVE_BALANCE:
+            address = Web3.to_checksum_address(args[0])
+            return self.multicall.address, self.multicall.encode_abi("getEthBalance", args=[address]), ["uint256"]
+        function_abi = self.contract.get_function_by_name(name).abi
+        return self.contract.address, self.contract.encode_abi(name, args=args), get_abi_output_types(function_abi)
+
+    def _decode(self, output_types, data):
+        values = self.web3.codec.decode(output_types, bytes(data))
+        return values[0] if len(values) == 1 else list(values)
+
+    async def _read_multicall(self, encoded, block_identifier):
+        results = await self.multicall.functions.aggregate3(
+            [(target, True, calldata) for target, calldata, _ in encoded]
+        ).call(block_identifier=block_identifier)
+        values = []
+        for (target, _, output_types), (success, return_data) in zip(encoded, results):
+            values.append(self._decode(output_types, return_data) if success else None)
+        return values
+
+    async def _read_batch(self, calls, encoded, block_identifier):
+        block = hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+        requests = []
+        for call, (target, calldata, _) in zip(calls, encoded):
+            if call[0] == NATIVE_BALANCE:
+                requests.append(("eth_getBalance", [Web3.to_checksum_address(call[1]), block]))
+            else:
+                requests.append(("eth_call", [{"to": target, "data": calldata}, block]))
+        responses = batch_responses(await self.web3.provider.make_batch_request(requests), len(requests))
+        values = []
+        for call, (_, _, output_types), response in zip(calls, encoded, responses):
+            result = response.get("result")
+            if result is None:
+                error_logger.error(f"Error in MulticallReader batch call {call[0]}: {response.get('error')}")
+                values.append(None)
+            elif call[0] == NATIVE_BALANCE:
+                values.append(int(result, 16))
+            else:
+                values.append(self._decode(output_types, Web3.to_bytes(hexstr=result)))
+        return values
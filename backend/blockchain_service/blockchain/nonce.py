@@ -0,0 +1,165 @@
+import asyncio
+import heapq
+
+from aiohttp import ClientError
+
+from logger import error_logger, transaction_logger
+
+# Messages renvoyés par le noeud quand notre compteur local n'est plus aligné avec la chaîne
+NONCE_DESYNC_ERRORS = ("nonce too low", "already known", "replacement transaction underpriced")
+# Erreurs sans réponse du noeud (délai dépassé, connexion coupée) : la transaction a peut-être été acceptée
+AMBIGUOUS_SEND_ERRORS = (ClientError, asyncio.TimeoutError, OSError)
+
+
+# Classe NonceManager : distribue localement les nonces de SENDER_ADDRESS.
+# Évite un appel get_transaction_count par transaction et garantit que deux envois concurrents
+# n'obtiennent jamais le même nonce. Les nonces perdus (envoi refusé par le noeud) sont réutilisés en
+# priorité pour ne pas laisser de trou qui bloquerait toutes les transactions suivantes.
+# Un nonce accepté par le noeud et pas encore miné n'est jamais un trou, même s'il est au-dessus d'un
+# vrai trou (le compteur "pending" du noeud s'arrête au premier trou) : le réutiliser remplacerait
+# une transaction en file d'attente.
+class NonceManager:
+    def __init__(self, web3, address):
+        self.web3 = web3
+        self.address = address
+        self._lock = asyncio.Lock()
+        self._next_nonce = None
+        self._in_flight = set()  # nonces attribués dont l'envoi n'est pas encore terminé
+        self._unmined = set()  # nonces acceptés par le noeud, retirés par le ReceiptTracker à l'inclusion
+        self._uncertain = set()  # envois sans réponse claire du noeud : peut-être acceptés
+        self._gaps = []  # tas (heapq) des nonces libérés à réattribuer en premier
+
+    # Resynchroniser depuis la chaîne (au démarrage et après une erreur)
+    async def sync(self):
+        async with self._lock:
+            await self._sync_locked()
+
+    async def _sync_locked(self):
+        try:
+            chain_nonce = await self.web3.eth.get_transaction_count(self.address, "pending")
+        except Exception as e:
+            error_logger.error(f"Error in NonceManager.sync: {e}")
+            raise
+        # Nonces sous le compteur de la chaîne : le noeud a une transaction pour chacun d'eux
+        for nonce in [n for n in self._uncertain if n < chain_nonce]:
+            self._uncertain.discard(nonce)
+            self._unmined.add(nonce)
+        # Le compteur "pending" est le premier nonce sans transaction dans le noeud : s'il est incertain,
+        # l'envoi n'a pas été accepté et c'est un vrai trou
+        if chain_nonce in self._uncertain:
+            self._uncertain.discard(chain_nonce)
+            self._gaps.append(chain_nonce)
+        # On ne redescend jamais sous un nonce encore en cours d'envoi, accepté ou incertain
+        used = self._in_flight | self._unmined | self._uncertain
+        self._next_nonce = max(chain_nonce, max(used, default=chain_nonce - 1) + 1)
+        # Un nonce entre la chaîne et notre compteur est un trou s'il n'a jamais été envoyé (ni en cours,
+        # ni accepté, ni peut-être accepté)
+        gaps = {n for n in self._gaps if n >= chain_nonce and n not in used}
+        gaps.update(n for n in range(chain_nonce, self._next_nonce) if n not in used)
+        self._gaps = list(gaps)
+        heapq.heapify(self._gaps)
+        transaction_logger.info(
+            f"Nonce synced for {self.address}: chain={chain_nonce}, next={self._next_nonce}, gaps={sorted(self._gaps)}, "
+            f"uncertain={sorted(self._uncertain)}"
+        )
+
+    # Attribuer un nonce de façon atomique (les trous connus sont comblés d'abord)
+    async def allocate(self):
+        async with self._lock:
+            if self._next_nonce is None:
+                await self._sync_locked()
+            while self._gaps and not self.is_gap(self._gaps[0]):
+                heapq.heappop(self._gaps)
+            if self._gaps:
+                nonce = heapq.heappop(self._gaps)
+            else:
+                nonce = self._next_nonce
+                self._next_nonce += 1
+            self._in_flight.add(nonce)
+            return nonce
+
+    # Attribuer `count` nonces d'un coup (pour un envoi groupé) : les trous d'abord, puis des nonces consécutifs
+    async def allocate_many(self, count):
+        async with self._lock:
+            if self._next_nonce is None:
+                await self._sync_locked()
+            nonces = []
+            while self._gaps and len(nonces) < count:
+                nonce = heapq.heappop(self._gaps)
+                if self.is_gap(nonce):
+                    nonces.append(nonce)
+            while len(nonces) < count:
+                nonces.append(self._next_nonce)
+                self._next_nonce += 1
+            self._in_flight.update(nonces)
+            return nonces
+
+    # Retirer les trous inférieurs à `limit` (ils bloquent les transactions suivantes) pour les boucher soi-même.
+    # Un nonce accepté ou peut-être accepté entre-temps n'est jamais rendu comme trou.
+    async def claim_gaps(self, limit):
+        async with self._lock:
+            claimed = []
+            while self._gaps and self._gaps[0] < limit:
+                nonce = heapq.heappop(self._gaps)
+                if self.is_gap(nonce):
+                    claimed.append(nonce)
+            self._in_flight.update(claimed)
+            return claimed
+
+    # L'envoi a été accepté par le noeud : le nonce est consommé (en attente d'inclusion)
+    def confirm(self, nonce):
+        self._in_flight.discard(nonce)
+        self._uncertain.discard(nonce)
+        self._unmined.add(nonce)
+
+    # Appelé par le ReceiptTracker : une transaction de ce nonce est minée
+    def mined(self, nonce):
+        self._unmined.discard(nonce)
+        self._uncertain.discard(nonce)
+
+    # Tous les nonces sous `chain_nonce` (compteur "latest") sont minés
+    def mined_below(self, chain_nonce):
+        self._unmined = {n for n in self._unmined if n >= chain_nonce}
+        self._uncertain = {n for n in self._uncertain if n >= chain_nonce}
+
+    # L'envoi a échoué :
+    # - sans réponse du noeud (délai, connexion coupée), la transaction a peut-être été acceptée : le nonce
+    #   n'est pas réutilisé, la chaîne est relue (il ne redevient un trou que si le noeud ne l'a pas) ;
+    # - si le compteur est désynchronisé, on relit la chaîne ;
+    # - sinon le noeud a refusé la transaction et son nonce devient un trou à réutiliser.
+    # `maybe_sent` : l'erreur est survenue après l'envoi, le noeud a pu accepter la transaction.
+    async def release(self, nonce, error=None, maybe_sent=False):
+        await self.release_many([nonce], error, maybe_sent)
+
+    # Libérer plusieurs nonces après la même erreur (envoi groupé) : une seule relecture de la chaîne
+    async def release_many(self, nonces, error=None, maybe_sent=False):
+        async with self._lock:
+            self._in_flight.difference_update(nonces)
+            message = str(error).lower() if error is not None else ""
+            ambiguous = maybe_sent or isinstance(error, AMBIGUOUS_SEND_ERRORS)
+            if ambiguous:
+                self._uncertain.update(nonces)
+            if ambiguous or any(reason in message for reason in NONCE_DESYNC_ERRORS):
+                try:
+                    await self._sync_locked()
+                except Exception:
+                    # le noeud est injoignable : on relira la chaîne au prochain allocate()
+                    self._next_nonce = None
+            elif self._next_nonce is not None:
+                for nonce in nonces:
+                    if nonce < self._next_nonce:
+                        heapq.heappush(self._gaps, nonce)
+
+    # Un trou peut-il être bouché sans risque ? (ni en cours d'envoi, ni accepté, ni peut-être accepté)
+    def is_gap(self, nonce):
+        return nonce not in self._in_flight and nonce not in self._unmined and nonce not in self._uncertain
+
+    def get_stats(self):
+        return {
+            "address": self.address,
+            "next_nonce": self._next_nonce,
+            "in_flight": sorted(self._in_flight),
+            "unmined": len(self._unmined),
+            "uncertain": sorted(self._uncertain),
+            "gaps": sorted(self._gaps),
+        }
@@ -0,0 +1,89 @@
+import requests
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from requests.adapters import HTTPAdapter
+from web3 import AsyncWeb3, Web3
+
+from blockchain.failover import FailoverProvider
+from config import RPC_POOL_BLOCK, RPC_POOL_CONNECTIONS, RPC_POOL_MAXSIZE, RPC_TIMEOUT
+
+
+# Construire une session HTTP avec un pool de connexions keep-alive vers le noeud RPC.
+# Sans cela chaque requête ouvre une nouvelle connexion TCP/TLS vers Infura.
+def build_rpc_session(pool_connections=RPC_POOL_CONNECTIONS, pool_maxsize=RPC_POOL_MAXSIZE,
+                      pool_block=RPC_POOL_BLOCK):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+# Créer une instance Web3 qui réutilise la session poolée pour tous ses appels RPC
+def build_web3(endpoint_uri, session=None):
+    session = session or build_rpc_session()
+    provider = Web3.HTTPProvider(endpoint_uri, request_kwargs={"timeout": RPC_TIMEOUT}, session=session)
+    return Web3(provider)
+
+
+# Statistiques du pool (par hôte) pour pouvoir dimensionner RPC_POOL_MAXSIZE
+def pool_stats(session):
+    stats = []
+    # le même adaptateur est monté pour http:// et https://, on ne le compte qu'une fois
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools[key]
+            if pool is None:
+                continue
+            stats.append({
+                "host": pool.host,
+                "port": pool.port,
+                "maxsize": pool.pool.maxsize if pool.pool is not None else 0,
+                "idle_connections": pool.pool.qsize() if pool.pool is not None else 0,
+                "connections_opened": pool.num_connections,
+                "requests_served": pool.num_requests,
+            })
+    return {
+        "pool_connections": RPC_POOL_CONNECTIONS,
+        "pool_maxsize": RPC_POOL_MAXSIZE,
+        "pool_block": RPC_POOL_BLOCK,
+        "pools": stats,
+    }
+
+
+# Version asyncio : AsyncWeb3 sur un FailoverProvider (un ou plusieurs noeuds RPC). La session aiohttp
+# doit être créée dans la boucle d'évènements, elle est donc attachée plus tard par connect_async_web3().
+def build_async_web3(endpoint_uris):
+    if isinstance(endpoint_uris, str):
+        endpoint_uris = [endpoint_uris]
+    provider = FailoverProvider(endpoint_uris, request_kwargs={"timeout": ClientTimeout(total=RPC_TIMEOUT)})
+    return AsyncWeb3(provider)
+
+
+# Attacher au provider une session aiohttp avec un pool de connexions keep-alive borné
+async def connect_async_web3(async_web3, pool_maxsize=RPC_POOL_MAXSIZE):
+    connector = TCPConnector(limit=pool_maxsize, limit_per_host=pool_maxsize, keepalive_timeout=30)
+    session = ClientSession(connector=connector, timeout=ClientTimeout(total=RPC_TIMEOUT), raise_for_status=True)
+    await async_web3.provider.cache_async_session(session)
+    return session
+
+
+# Statistiques du pool aiohttp (connexions en cours d'utilisation et connexions libres)
+def async_pool_stats(session):
+    connector = session.connector
+    if connector is None:
+        return {"pool_maxsize": RPC_POOL_MAXSIZE, "closed": True}
+    return {
+        "pool_maxsize": connector.limit,
+        "pool_maxsize_per_host": connector.limit_per_host,
+        "connections_in_use": len(connector._acquired),
+        "idle_connections": sum(len(conns) for conns in connector._conns.values()),
+        "closed": session.closed,
+    }
+
+
+# Latence moyenne et santé de chaque noeud RPC du FailoverProvider
+def provider_stats(async_web3):
+    return async_web3.provider.get_stats()
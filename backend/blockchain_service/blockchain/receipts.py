@@ -0,0 +1,147 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from web3.exceptions import Web3RPCError
+
+from blockchain.failover import batch_responses
+from config import RECEIPT_BATCH_SIZE, RECEIPT_HISTORY_SIZE
+from logger import error_logger, transaction_logger
+
+
+# Classe ReceiptTracker : suit les transactions envoyées par le service sans bloquer les requêtes.
+# À chaque nouveau bloc, les reçus de toutes les transactions en attente sont demandés par lots
+# JSON-RPC (RECEIPT_BATCH_SIZE hashes par lot) : mille paiements en attente coûtent quelques
+# appels par bloc au lieu de mille attentes bloquantes.
+class ReceiptTracker:
+    def __init__(self, web3, batch_size=RECEIPT_BATCH_SIZE, history_size=RECEIPT_HISTORY_SIZE):
+        self.web3 = web3
+        self.batch_size = batch_size
+        self.history_size = history_size
+        self.pending = {}  # hash -> informations sur l'envoi
+        self.mined = OrderedDict()  # hash -> reçu résumé (borné à history_size)
+        self.on_mined = []  # fonctions appelées avec le reçu de chaque transaction minée
+        self._waiters = {}  # hash -> futures des requêtes en long-poll
+        self._by_nonce = {}  # nonce -> hashes en attente (transaction d'origine et ses remplacements)
+        self._new_block = asyncio.Event()
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # Appelé par le BlockCache à chaque nouvelle tête de chaîne
+    def on_new_head(self, block_number):
+        self._new_block.set()
+
+    async def _run(self):
+        while True:
+            await self._new_block.wait()
+            self._new_block.clear()
+            try:
+                await self.poll()
+            except Exception as e:
+                error_logger.error(f"Error in ReceiptTracker.poll: {e}")
+
+    # Commencer à suivre une transaction envoyée
+    def track(self, tx_hash, **details):
+        self.pending[tx_hash] = {"submitted_at": time.time(), **details}
+        if "nonce" in details:
+            self._by_nonce.setdefault(details["nonce"], set()).add(tx_hash)
+
+    # Une transaction de ce nonce est-elle envoyée et pas encore minée ?
+    def has_pending_nonce(self, nonce):
+        return bool(self._by_nonce.get(nonce))
+
+    # Demander les reçus de toutes les transactions en attente, par lots. Un lot refusé par le noeud est
+    # redemandé au prochain bloc : ses transactions restent en attente, les lots suivants sont quand même lus.
+    async def poll(self):
+        hashes = list(self.pending)
+        for start in range(0, len(hashes), self.batch_size):
+            chunk = hashes[start:start + self.batch_size]
+            try:
+                responses = batch_responses(await self.web3.provider.make_batch_request(
+                    [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in chunk]
+                ), len(chunk))
+            except Web3RPCError as e:
+                error_logger.error(f"Error in ReceiptTracker.poll: {e}")
+                continue
+            for tx_hash, response in zip(chunk, responses):
+                receipt = response.get("result")
+                if receipt is not None:
+                    self._record(tx_hash, receipt)
+
+    def _record(self, tx_hash, receipt):
+        if tx_hash not in self.pending:
+            return  # déjà remplacée par une transaction de même nonce minée dans le même lot
+        details = self.pending.pop(tx_hash)
+        record = self._summarize(tx_hash, receipt, details)
+        self._store(tx_hash, record)
+        transaction_logger.info(f"Transaction {tx_hash} mined in block {record['block_number']} ({record['status']})")
+        # les autres transactions de même nonce (remplacements ou original) ne seront jamais minées
+        for sibling in self._by_nonce.pop(details.get("nonce"), set()) - {tx_hash}:
+            sibling_details = self.pending.pop(sibling, None)
+            if sibling_details is not None:
+                self._store(sibling, {"tx_hash": sibling, "status": "replaced", "replaced_by": tx_hash,
+                                      **{key: value for key, value in sibling_details.items() if key != "submitted_at"}})
+        for callback in self.on_mined:
+            callback(record)
+
+    def _store(self, tx_hash, record):
+        self.mined[tx_hash] = record
+        while len(self.mined) > self.history_size:
+            self.mined.popitem(last=False)
+        for waiter in self._waiters.pop(tx_hash, []):
+            if not waiter.done():
+                waiter.set_result(record)
+
+    @staticmethod
+    def _summarize(tx_hash, receipt, details):
+        return {
+            "tx_hash": tx_hash,
+            "status": "success" if int(receipt["status"], 16) == 1 else "failed",
+            "block_number": int(receipt["blockNumber"], 16),
+            "gas_used": int(receipt["gasUsed"], 16),
+            "effective_gas_price": int(receipt["effectiveGasPrice"], 16) if receipt.get("effectiveGasPrice") else None,
+            "time_to_inclusion": round(time.time() - details["submitted_at"], 3) if "submitted_at" in details else None,
+            **{key: value for key, value in details.items() if key != "submitted_at"},
+        }
+
+    # État connu d'une transaction suivie (None si le hash n'est pas suivi)
+    def get(self, tx_hash):
+        if tx_hash in self.mined:
+            return self.mined[tx_hash]
+        if tx_hash in self.pending:
+            return {"tx_hash": tx_hash, "status": "pending", **self.pending[tx_hash]}
+        return None
+
+    # Transaction non suivie par ce service : un seul appel eth_getTransactionReceipt
+    async def fetch(self, tx_hash):
+        response = await self.web3.provider.make_request("eth_getTransactionReceipt", [tx_hash])
+        receipt = response.get("result")
+        return self._summarize(tx_hash, receipt, {}) if receipt is not None else None
+
+    # Long-poll : attendre au plus `timeout` secondes que la transaction soit minée
+    async def wait(self, tx_hash, timeout):
+        if tx_hash not in self.pending:
+            return self.get(tx_hash)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(tx_hash, []).append(waiter)
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            waiters = self._waiters.get(tx_hash, [])
+            if waiter in waiters:
+                waiters.remove(waiter)
+            return self.get(tx_hash)
+
+    def get_stats(self):
+        return {"pending": len(self.pending), "mined": len(self.mined), "waiters": sum(map(len, self._waiters.values()))}
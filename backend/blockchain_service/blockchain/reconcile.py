@@ -0,0 +1,243 @@
+import asyncio
+import gzip
+import json
+import re
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+from web3 import Web3
+
+from blockchain.event_repository import CHECKPOINT_NAME, ContractEventRepository
+from blockchain.indexer import INDEXED_EVENTS
+from config import RECONCILE_BATCH_SIZE, RECONCILE_CONCURRENCY, RECONCILE_MAX_PENDING
+from logger import error_logger
+
+TX_HASH = r"(0x[0-9a-fA-F]{64})"
+AMOUNT = r"(?:, amount: ([0-9.eE+-]+) ETH)?"
+# Lignes de transaction_logger qui annoncent un envoi : (motif, type d'opération). Le montant n'est
+# présent que dans les journaux récents ; sans montant, seul l'état de la transaction est vérifié.
+SENT_PATTERNS = [
+    (re.compile(r"Transaction sent successfully\. Hash: " + TX_HASH + AMOUNT), "payment"),
+    (re.compile(r"Payment transaction sent with hash: " + TX_HASH + AMOUNT), "payment"),
+    (re.compile(r"Withdrawal transaction sent with hash: " + TX_HASH + AMOUNT), "withdraw"),
+]
+# Transaction bloquée renvoyée par le ReplacementEngine : un seul des deux hashes sera miné
+REPLACED_PATTERN = re.compile(r"Stuck transaction " + TX_HASH + r" \(nonce \d+\) replaced by " + TX_HASH)
+# Évènement attendu dans le reçu selon le type d'opération
+EXPECTED_EVENTS = {"payment": "PaymentReceived", "withdraw": "Withdrawal"}
+
+
+# Lire un ou plusieurs fichiers journaux (éventuellement compressés .gz) ligne par ligne.
+# Produit des tuples (fichier, numéro de ligne, ligne) sans charger les fichiers en mémoire.
+def read_lines(paths):
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", errors="replace") as f:
+            for number, line in enumerate(f, start=1):
+                yield path, number, line
+
+
+# Classe Reconciler : rapproche les envois annoncés dans le journal des transactions avec la chaîne.
+# Le journal est lu en flux et découpé en lots de `batch_size` hashes ; pour chaque lot, un seul
+# appel JSON-RPC groupé récupère les reçus (et un second, pour les hashes sans reçu, les transactions
+# en attente). Au plus `concurrency` lots sont en cours. Les transactions sans reçu et les liens de
+# remplacement sont gardés jusqu'à `max_pending` de chaque (les plus anciens sont résolus ou oubliés
+# au-delà) : la mémoire ne dépend pas de la taille du journal. Un remplacement journalisé plus de
+# `max_pending` envois après sa transaction d'origine n'est plus relié à celle-ci.
+# Avec une session de base, chaque paiement miné est aussi cherché dans les évènements indexés.
+# Seules les anomalies sont écrites dans le rapport (une ligne JSON par transaction) :
+# - missing : ni reçu ni transaction en attente ; replaced : remplacée par une transaction de même nonce minée
+# - pending : encore en attente ; failed : minée mais annulée (status 0)
+# - event_missing / amount_mismatch : pas d'évènement du contrat, ou montant différent du journal
+# - not_indexed / index_mismatch : absente de la base de l'indexeur, ou montant indexé différent
+class Reconciler:
+    def __init__(self, web3, contract_address, session_factory=None, batch_size=RECONCILE_BATCH_SIZE,
+                 concurrency=RECONCILE_CONCURRENCY, max_pending=RECONCILE_MAX_PENDING):
+        self.web3 = web3
+        self.contract_address = contract_address.lower()
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self._topics = {
+            Web3.to_hex(Web3.keccak(text=f"{name}(address,uint256)")): name for name in INDEXED_EVENTS
+        }
+        self.indexed_to = None
+        self.counts = {}
+        self.lines = 0
+        self.batches = 0
+        self._links = OrderedDict()  # hash -> hashes de même nonce (remplacements), bornés comme _missing
+        self._missing = OrderedDict()  # anomalies "missing" en attente : une partie peut être "replaced"
+        self._report = None
+
+    # Lire le journal et écrire le rapport ; retourne le résumé (nombre de transactions par état)
+    async def run(self, lines, report):
+        started = time.perf_counter()
+        self._report = report
+        if self.session_factory is not None:
+            async with self.session_factory() as session:
+                checkpoint = await ContractEventRepository(session).get_checkpoint(CHECKPOINT_NAME)
+            self.indexed_to = checkpoint.last_block if checkpoint is not None else -1
+
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+        batch = []
+        for entry in self._parse(lines):
+            batch.append(entry)
+            if len(batch) == self.batch_size:
+                await slots.acquire()
+                tasks.add(asyncio.create_task(self._check_batch(batch, slots)))
+                tasks = {task for task in tasks if not task.done()}
+                batch = []
+                if len(self._missing) > self.max_pending:
+                    # les plus anciennes : leur remplacement éventuel a déjà été lu dans le journal
+                    await self._resolve_missing(len(self._missing) - self.max_pending // 2)
+        if batch:
+            await slots.acquire()
+            tasks.add(asyncio.create_task(self._check_batch(batch, slots)))
+        await asyncio.gather(*tasks)
+        await self._resolve_missing(len(self._missing))
+
+        elapsed = time.perf_counter() - started
+        checked = sum(self.counts.values())
+        return {
+            "lines": self.lines,
+            "transactions": checked,
+            "counts": dict(sorted(self.counts.items())),
+            "rpc_batches": self.batches,
+            "seconds": round(elapsed, 3),
+            "transactions_per_second": round(checked / elapsed, 1) if elapsed else None,
+        }
+
+    # Envois annoncés dans le journal, dans l'ordre du fichier
+    def _parse(self, lines):
+        for path, number, line in lines:
+            self.lines += 1
+            replaced = REPLACED_PATTERN.search(line)
+            if replaced is not None:
+                original, replacement = (tx_hash.lower() for tx_hash in replaced.groups())
+                self._link(original, replacement)
+                self._link(replacement, original)
+                yield {"tx_hash": replacement, "kind": "replacement", "amount": None, "file": path, "line": number}
+                continue
+            for pattern, kind in SENT_PATTERNS:
+                match = pattern.search(line)
+                if match is not None:
+                    tx_hash, amount = match.groups()
+                    yield {"tx_hash": tx_hash.lower(), "kind": kind, "amount": amount, "file": path, "line": number}
+                    break
+
+    async def _check_batch(self, batch, slots):
+        try:
+            receipts = await self._batch_request("eth_getTransactionReceipt", [entry["tx_hash"] for entry in batch])
+            without_receipt = [entry for entry, receipt in zip(batch, receipts) if receipt is None]
+            pending = set()
+            if without_receipt:
+                transactions = await self._batch_request(
+                    "eth_getTransactionByHash", [entry["tx_hash"] for entry in without_receipt]
+                )
+                pending = {entry["tx_hash"] for entry, tx in zip(without_receipt, transactions) if tx is not None}
+            indexed = await self._indexed_events(batch, receipts)
+            for entry, receipt in zip(batch, receipts):
+                self._classify(entry, receipt, entry["tx_hash"] in pending, indexed)
+        except Exception as e:
+            error_logger.error(f"Error in Reconciler._check_batch: {e}")
+            for entry in batch:
+                self._emit(entry, "error", error=str(e))
+        finally:
+            slots.release()
+
+    async def _batch_request(self, method, tx_hashes):
+        self.batches += 1
+        responses = await self.web3.provider.make_batch_request([(method, [tx_hash]) for tx_hash in tx_hashes])
+        for response in responses:
+            if response.get("error") is not None:
+                raise ValueError(f"{method} failed: {response['error']}")
+        return [response.get("result") for response in responses]
+
+    # Évènements indexés des transactions minées dans des blocs déjà couverts par l'indexeur
+    async def _indexed_events(self, batch, receipts):
+        if self.session_factory is None:
+            return None
+        tx_hashes = [
+            entry["tx_hash"] for entry, receipt in zip(batch, receipts)
+            if receipt is not None and int(receipt["blockNumber"], 16) <= self.indexed_to
+        ]
+        if not tx_hashes:
+            return {}
+        async with self.session_factory() as session:
+            events = await ContractEventRepository(session).by_tx_hashes(tx_hashes)
+        indexed = {}
+        for event in events:
+            indexed.setdefault(event.tx_hash.lower(), []).append(event)
+        return indexed
+
+    def _classify(self, entry, receipt, pending, indexed):
+        if receipt is None:
+            if pending:
+                self._emit(entry, "pending")
+            else:
+                self._missing[entry["tx_hash"]] = entry
+            return
+        block_number = int(receipt["blockNumber"], 16)
+        if int(receipt["status"], 16) != 1:
+            self._emit(entry, "failed", block_number=block_number)
+            return
+
+        expected = EXPECTED_EVENTS.get(entry["kind"])
+        amounts = [
+            int(log["data"], 16) for log in receipt.get("logs", [])
+            if log["address"].lower() == self.contract_address and log["topics"]
+            and self._topics.get(log["topics"][0]) in ((expected,) if expected else INDEXED_EVENTS)
+        ]
+        if expected is not None and not amounts:
+            self._emit(entry, "event_missing", block_number=block_number)
+            return
+        logged_wei = Web3.to_wei(Decimal(entry["amount"]), "ether") if entry["amount"] is not None else None
+        if logged_wei is not None and logged_wei not in amounts:
+            self._emit(entry, "amount_mismatch", block_number=block_number, onchain_amount_wei=amounts)
+            return
+
+        if indexed is not None and block_number <= self.indexed_to:
+            events = indexed.get(entry["tx_hash"], [])
+            if amounts and not events:
+                self._emit(entry, "not_indexed", block_number=block_number)
+                return
+            if sorted(int(event.amount_wei) for event in events) != sorted(amounts):
+                self._emit(entry, "index_mismatch", block_number=block_number, onchain_amount_wei=amounts,
+                           indexed_amount_wei=[event.amount_wei for event in events])
+                return
+        self._count("ok")
+
+    def _link(self, tx_hash, other):
+        self._links.setdefault(tx_hash, set()).add(other)
+        self._links.move_to_end(tx_hash)
+        # deux liens par remplacement, et la lecture du journal a jusqu'à `concurrency` lots d'avance
+        while len(self._links) > 2 * self.max_pending + self.batch_size * self.concurrency:
+            self._links.popitem(last=False)
+
+    # Les `count` plus anciens hashes sans reçu : remplacés si une transaction de même nonce (journalisée)
+    # a été minée, sinon manquants
+    async def _resolve_missing(self, count):
+        entries = [self._missing.popitem(last=False)[1] for _ in range(min(count, len(self._missing)))]
+        links = {entry["tx_hash"]: self._links.pop(entry["tx_hash"], set()) for entry in entries}
+        linked = sorted({other for others in links.values() for other in others})
+        mined = {}
+        for start in range(0, len(linked), self.batch_size):
+            chunk = linked[start:start + self.batch_size]
+            receipts = await self._batch_request("eth_getTransactionReceipt", chunk)
+            mined.update({tx_hash: receipt for tx_hash, receipt in zip(chunk, receipts) if receipt is not None})
+        for entry in entries:
+            replaced_by = next((other for other in links[entry["tx_hash"]] if other in mined), None)
+            if replaced_by is not None:
+                self._count("replaced")
+            else:
+                self._emit(entry, "missing")
+
+    def _count(self, status):
+        self.counts[status] = self.counts.get(status, 0) + 1
+
+    def _emit(self, entry, status, **details):
+        self._count(status)
+        self._report.write(json.dumps({**entry, "status": status, **details}) + "\n")
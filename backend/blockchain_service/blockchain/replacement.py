@@ -0,0 +1,204 @@
+import asyncio
+import math
+import statistics
+from collections import deque
+
+from config import (
+    REPLACEMENT_FEE_BUMP, REPLACEMENT_MAX_ATTEMPTS, REPLACEMENT_MAX_FEE_GWEI, REPLACEMENT_STUCK_BLOCKS
+)
+from logger import error_logger, transaction_logger
+
+# Le noeud a déjà une transaction de ce nonce minée : inutile de la remplacer
+NONCE_MINED_ERRORS = ("nonce too low",)
+# Durées d'inclusion gardées pour les percentiles
+INCLUSION_SAMPLES = 1000
+
+
+# Classe ReplacementEngine : garde le pipeline des transactions de SENDER_ADDRESS en mouvement.
+# Une transaction à frais trop bas bloque tous les nonces suivants. À chaque nouveau bloc :
+# - une transaction en attente depuis REPLACEMENT_STUCK_BLOCKS blocs est signée à nouveau avec le même
+#   nonce et des frais augmentés d'au moins REPLACEMENT_FEE_BUMP (et au moins les frais "replacement"
+#   de l'oracle), puis renvoyée : la première des deux minée remplace l'autre ;
+# - un trou de nonce (envoi échoué) sous une transaction en attente est bouché par un transfert de
+#   0 ETH à soi-même, sinon les transactions suivantes ne seraient jamais minées.
+class ReplacementEngine:
+    def __init__(self, web3, sender_address, nonce_manager, gas_oracle, signing_pool, receipt_tracker, templates,
+                 stuck_blocks=REPLACEMENT_STUCK_BLOCKS, fee_bump=REPLACEMENT_FEE_BUMP,
+                 max_attempts=REPLACEMENT_MAX_ATTEMPTS, max_fee_gwei=REPLACEMENT_MAX_FEE_GWEI):
+        self.web3 = web3
+        self.sender_address = sender_address
+        self.nonce_manager = nonce_manager
+        self.gas_oracle = gas_oracle
+        self.signing_pool = signing_pool
+        self.receipt_tracker = receipt_tracker
+        self.templates = templates
+        self.stuck_blocks = stuck_blocks
+        self.fee_bump = fee_bump
+        self.max_attempts = max_attempts
+        self.max_fee = int(max_fee_gwei * 10 ** 9)
+        self.head = None
+        self.watched = {}  # nonce -> {"tx", "tx_hash", "sent_block", "attempts", "submitted_at"}
+        self.replacements = 0
+        self.replacement_errors = 0
+        self.gap_fills = 0
+        self.given_up = 0
+        self.mined_after_replacement = 0
+        self._inclusion_times = deque(maxlen=INCLUSION_SAMPLES)
+        self._new_block = asyncio.Event()
+        self._task = None
+        receipt_tracker.on_mined.append(self.on_mined)
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # Appelé par le BlockCache à chaque nouvelle tête de chaîne
+    def on_new_head(self, block_number):
+        self.head = block_number
+        self._new_block.set()
+
+    async def _run(self):
+        while True:
+            await self._new_block.wait()
+            self._new_block.clear()
+            try:
+                await self.check()
+            except Exception as e:
+                error_logger.error(f"Error in ReplacementEngine.check: {e}")
+
+    # Surveiller une transaction qui vient d'être acceptée par le noeud
+    def watch(self, nonce, tx, tx_hash, submitted_at=None):
+        entry = self.watched.get(nonce)
+        self.watched[nonce] = {
+            "tx": tx,
+            "tx_hash": tx_hash,
+            "sent_block": self.head,
+            "attempts": entry["attempts"] if entry is not None else 0,
+            "submitted_at": submitted_at or self.receipt_tracker.pending.get(tx_hash, {}).get("submitted_at"),
+        }
+
+    # Appelé par le ReceiptTracker : le nonce est miné (par l'original ou un remplacement)
+    def on_mined(self, record):
+        entry = self.watched.pop(record.get("nonce"), None)
+        if entry is None:
+            return
+        if record.get("time_to_inclusion") is not None:
+            self._inclusion_times.append(record["time_to_inclusion"])
+        if entry["attempts"]:
+            self.mined_after_replacement += 1
+
+    async def check(self):
+        if self.head is None or not self.watched:
+            return
+        # nonces déjà minés : plus rien à faire (le reçu, relevé par le ReceiptTracker, appelle on_mined)
+        chain_nonce = await self.web3.eth.get_transaction_count(self.sender_address, "latest")
+        self.nonce_manager.mined_below(chain_nonce)
+        for nonce in [nonce for nonce in self.watched if nonce < chain_nonce]:
+            if self.watched[nonce]["tx_hash"] not in self.receipt_tracker.pending:
+                del self.watched[nonce]
+        pending = {nonce: entry for nonce, entry in self.watched.items() if nonce >= chain_nonce}
+        if not pending:
+            return
+        for nonce in await self.nonce_manager.claim_gaps(max(pending)):
+            await self._fill_gap(nonce)
+        for nonce, entry in sorted(pending.items()):
+            if entry["sent_block"] is None:
+                entry["sent_block"] = self.head
+            elif self.head - entry["sent_block"] >= self.stuck_blocks:
+                await self._speed_up(nonce, entry)
+
+    # Frais augmentés d'au moins fee_bump, et au moins les frais actuels de l'oracle ; None au-delà du plafond
+    def _bump_fees(self, tx, current):
+        if "maxFeePerGas" in tx:
+            tip = max(math.ceil(tx["maxPriorityFeePerGas"] * self.fee_bump), current.get("maxPriorityFeePerGas", 0))
+            max_fee = max(math.ceil(tx["maxFeePerGas"] * self.fee_bump), current.get("maxFeePerGas", 0), tip)
+            if max_fee > self.max_fee:
+                return None
+            return {"maxPriorityFeePerGas": tip, "maxFeePerGas": max_fee}
+        gas_price = max(math.ceil(tx["gasPrice"] * self.fee_bump), current.get("gasPrice", 0))
+        return {"gasPrice": gas_price} if gas_price <= self.max_fee else None
+
+    async def _speed_up(self, nonce, entry):
+        if entry["attempts"] >= self.max_attempts:
+            return
+        fees = self._bump_fees(entry["tx"], await self.gas_oracle.get_fees("replacement"))
+        if fees is None:
+            entry["attempts"] = self.max_attempts
+            self.given_up += 1
+            error_logger.error(f"Transaction {entry['tx_hash']} (nonce {nonce}) stuck, fee cap of {self.max_fee} wei reached")
+            return
+        tx = {**entry["tx"], **fees}
+        try:
+            raw_transaction, _ = await self.signing_pool.sign(tx)
+            tx_hash = self.web3.to_hex(await self.web3.eth.send_raw_transaction(raw_transaction))
+        except Exception as e:
+            if any(reason in str(e).lower() for reason in NONCE_MINED_ERRORS):
+                self.watched.pop(nonce, None)
+                return
+            self.replacement_errors += 1
+            error_logger.error(f"Error replacing transaction {entry['tx_hash']} (nonce {nonce}): {e}")
+            return
+        # le remplacement hérite des informations de l'envoi d'origine (et de son heure, pour le temps d'inclusion)
+        details = {**self.receipt_tracker.pending.get(entry["tx_hash"], {}), "nonce": nonce, "replaces": entry["tx_hash"]}
+        if entry["submitted_at"] is not None:
+            details["submitted_at"] = entry["submitted_at"]
+        self.receipt_tracker.track(tx_hash, **details)
+        transaction_logger.info(
+            f"Stuck transaction {entry['tx_hash']} (nonce {nonce}) replaced by {tx_hash} "
+            f"(attempt {entry['attempts'] + 1}, fees {fees})"
+        )
+        entry.update(tx=tx, tx_hash=tx_hash, sent_block=self.head, attempts=entry["attempts"] + 1)
+        self.replacements += 1
+
+    # Boucher un trou de nonce avec un transfert de 0 ETH à soi-même. Jamais si une transaction de ce
+    # nonce est surveillée ou suivie par le ReceiptTracker : elle serait remplacée par le transfert de 0 ETH.
+    async def _fill_gap(self, nonce):
+        if nonce in self.watched or self.receipt_tracker.has_pending_nonce(nonce):
+            # pas un trou : le nonce reste réservé à la transaction envoyée
+            self.nonce_manager.confirm(nonce)
+            error_logger.error(f"Nonce {nonce} reported as a gap but a sent transaction uses it, not filled")
+            return
+        try:
+            fees = await self.gas_oracle.get_fees("replacement")
+            tx = self.templates.transfer(self.sender_address, 0, nonce, fees)
+            raw_transaction, _ = await self.signing_pool.sign(tx)
+            tx_hash = self.web3.to_hex(await self.web3.eth.send_raw_transaction(raw_transaction))
+        except Exception as e:
+            await self.nonce_manager.release(nonce, e)
+            error_logger.error(f"Error filling nonce gap {nonce}: {e}")
+            return
+        self.nonce_manager.confirm(nonce)
+        self.receipt_tracker.track(tx_hash, kind="gap_fill", nonce=nonce)
+        self.watch(nonce, tx, tx_hash)
+        self.gap_fills += 1
+        transaction_logger.info(f"Nonce gap {nonce} filled with a zero-value self-transfer: {tx_hash}")
+
+    def get_stats(self):
+        samples = sorted(self._inclusion_times)
+        stuck = sum(
+            1 for entry in self.watched.values()
+            if self.head is not None and entry["sent_block"] is not None and self.head - entry["sent_block"] >= self.stuck_blocks
+        )
+        return {
+            "watched": len(self.watched),
+            "stuck": stuck,
+            "replacements": self.replacements,
+            "replacement_errors": self.replacement_errors,
+            "gap_fills": self.gap_fills,
+            "given_up": self.given_up,
+            "mined_after_replacement": self.mined_after_replacement,
+            "time_to_inclusion": {
+                "samples": len(samples),
+                "p50": round(statistics.median(samples), 3) if samples else None,
+                "p95": round(samples[int(0.95 * (len(samples) - 1))], 3) if samples else None,
+                "max": round(samples[-1], 3) if samples else None,
+            },
+        }
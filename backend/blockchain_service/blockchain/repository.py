@@ -1,7 +1,20 @@
+import asyncio
 import json
 import os
 from dotenv import load_dotenv
-from web3 import Web3
+from blockchain.cache import BlockCache
+from blockchain.estimates import GasEstimator
+from blockchain.gas import GasOracle
+from blockchain.multicall import NATIVE_BALANCE, MulticallReader
+from blockchain.nonce import NonceManager
+from blockchain.provider import (
+    async_pool_stats, build_async_web3, build_rpc_session, build_web3, connect_async_web3, pool_stats, provider_stats
+)
+from blockchain.receipts import ReceiptTracker
+from blockchain.replacement import ReplacementEngine
+from blockchain.signer import SigningPool
+from blockchain.templates import TransactionTemplates
+from config import REPLACEMENT_ENABLED, RPC_URLS
 from logger import error_logger, transaction_logger
 
 # for privacy and security
@@ -13,37 +26,41 @@ INFURA_URL = os.getenv("INFURA_URL")
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")
 CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
 
-#Initialize a connection to the Ethereum blockchain via Infura
-#Infura acts as the provider through which you interact with the Ethereum network
-web3 = Web3(Web3.HTTPProvider(INFURA_URL))
-
 # Charger l'ABI depuis (contracts/abi.json) et initialiser le contrat
 # Contract ABI (Application Binary Interface) defines the structure of the contract's methods and events.
 # we used remix ide to create and deploy the contract using solidity language(it's a little bit like java use POO but have different types of variables)
 # This ABI is verified and obtained from Etherscan for the deployed contract.
 #we can get the abi from remix or etherscan after verifying it
 #had to json pars because they were a slite difference in false and False(Python Format)
-try:
-    with open("contracts/abi.json") as f:
-        CONTRACT_ABI = json.load(f)
-    # Create a contract instance using its address and ABI.
-    contract = web3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
-    # to see contract details go to contracts/FintechContract.sol
-    # Derive the sender's address from the provided private key.
-    SENDER_ADDRESS = web3.eth.account.from_key(PRIVATE_KEY).address
-    transaction_logger.info("Connected to Ethereum and contract initialized successfully.")
-except Exception as e:
-    error_logger.error(f"Error during initialization: {e}")
-    raise
+# Rien n'est fait à l'import du module : l'ABI est lue à la création du premier repository (dans le
+# démarrage en arrière-plan, voir blockchain/runtime.py), puis gardée en mémoire.
+CONTRACT_ABI_PATH = "contracts/abi.json"
+_contract_abi = None
+
+
+def load_contract_abi():
+    global _contract_abi
+    if _contract_abi is None:
+        with open(CONTRACT_ABI_PATH) as f:
+            _contract_abi = json.load(f)
+    return _contract_abi
+
 
 # Classe BlockchainRepository : fournir des méthodes pour interagir avec la blockchain
 class BlockchainRepository:
     def __init__(self):
-        #Initialisation du dépôt blockchain. Se connecte au contrat et définit l'adresse de l'expéditeur.
+        #Initialisation du dépôt blockchain : connexion au noeud et instance du contrat.
         try:
-            self.contract = web3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
-            self.sender_address = SENDER_ADDRESS
-            self.web3 = web3
+            #Initialize a connection to the Ethereum blockchain via Infura
+            #Infura acts as the provider through which you interact with the Ethereum network
+            # La session HTTP est poolée (keep-alive) : toutes les requêtes réutilisent les mêmes connexions
+            self.rpc_session = build_rpc_session()
+            self.web3 = build_web3(INFURA_URL, self.rpc_session)
+            # Create a contract instance using its address and ABI.
+            # to see contract details go to contracts/FintechContract.sol
+            self.contract = self.web3.eth.contract(address=CONTRACT_ADDRESS, abi=load_contract_abi())
+            # Derive the sender's address from the provided private key.
+            self.sender_address = self.web3.eth.account.from_key(PRIVATE_KEY).address
             transaction_logger.info("BlockchainRepository initialized successfully.")
         except Exception as e:
             error_logger.error(f"Error during BlockchainRepository initialization: {e}")
@@ -66,12 +83,16 @@ class BlockchainRepository:
             signed_tx = self.web3.eth.account.sign_transaction(tx, PRIVATE_KEY)
             # Envoyer la transaction signée
             tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            transaction_logger.info(f"Transaction sent successfully. Hash: {self.web3.to_hex(tx_hash)}")
+            transaction_logger.info(f"Transaction sent successfully. Hash: {self.web3.to_hex(tx_hash)}, amount: {amount_in_ether} ETH")
             return tx_hash
         except Exception as e:
             error_logger.error(f"Error in send_transaction: {e}")
             raise
 
+    # Statistiques du pool de connexions HTTP vers le noeud RPC
+    def get_pool_stats(self):
+        return pool_stats(self.rpc_session)
+
     # Récupérer le solde du contrat
     def get_balance(self):
         try:
@@ -109,8 +130,263 @@ class BlockchainRepository:
             signed_tx = self.web3.eth.account.sign_transaction(tx, PRIVATE_KEY)
             # Envoyer la transaction signée
             tx_hash = self.web3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            transaction_logger.info(f"Withdrawal transaction sent with hash: {self.web3.to_hex(tx_hash)}")
+            transaction_logger.info(f"Withdrawal transaction sent with hash: {self.web3.to_hex(tx_hash)}, amount: {amount_in_ether} ETH")
             return tx_hash
         except Exception as e:
             error_logger.error(f"Error in withdraw_funds: {e}")
-            raise
\ No newline at end of file
+            raise
+
+
+# Classe AsyncBlockchainRepository : mêmes opérations que BlockchainRepository, mais avec AsyncWeb3.
+# Les appels RPC sont attendus (await) au lieu de bloquer la boucle d'évènements d'uvicorn,
+# ce qui permet à plusieurs lectures de solde et envois de transactions de se chevaucher.
+# BlockchainRepository (synchrone) reste disponible pour les scripts.
+class AsyncBlockchainRepository:
+    def __init__(self):
+        try:
+            # Version asyncio (AsyncWeb3) : répartie sur tous les noeuds de RPC_URLS (INFURA_URL par défaut),
+            # avec bascule et lectures doublées. Aucune connexion n'est ouverte avant connect().
+            self.web3 = build_async_web3(RPC_URLS)
+            self.contract = self.web3.eth.contract(address=CONTRACT_ADDRESS, abi=load_contract_abi())
+            self.sender_address = self.web3.eth.account.from_key(PRIVATE_KEY).address
+            self.rpc_session = None
+            # Nonces de SENDER_ADDRESS attribués localement (pas de get_transaction_count par envoi)
+            self.nonce_manager = NonceManager(self.web3, self.sender_address)
+            # Frais de gaz servis depuis un cache rafraîchi en arrière-plan
+            self.gas_oracle = GasOracle(self.web3)
+            # Limites de gaz de pay() / withdraw() estimées en arrière-plan
+            self.gas_estimator = GasEstimator(self.web3, self.contract, self.sender_address)
+            # Transactions pay() / withdraw() pré-encodées (pas de build_transaction par envoi)
+            self.templates = TransactionTemplates(self.web3, self.contract)
+            # Lectures du contrat (getBalance, ...) mises en cache pour la durée d'un bloc
+            self.block_cache = BlockCache(self.web3)
+            # Lectures groupées en un seul aller-retour (Multicall3 ou lot JSON-RPC)
+            self.multicall = MulticallReader(self.web3, self.contract)
+            # Signature secp256k1 déportée dans un pool de workers (hors du thread de la boucle d'évènements)
+            self.signing_pool = SigningPool(PRIVATE_KEY)
+            # Reçus des transactions envoyées, relevés par lots à chaque nouveau bloc
+            self.receipt_tracker = ReceiptTracker(self.web3)
+            self.block_cache.head_listeners.append(self.receipt_tracker.on_new_head)
+            # Une de nos transactions pay/withdraw minée modifie le solde : on vide le cache de lecture
+            self.receipt_tracker.on_mined.append(lambda record: self.block_cache.invalidate())
+            # Nonce miné : il n'est plus en attente d'inclusion pour le NonceManager
+            self.receipt_tracker.on_mined.append(lambda record: self.nonce_manager.mined(record.get("nonce")))
+            # Transactions bloquées renvoyées avec des frais augmentés, trous de nonces bouchés
+            self.replacement_engine = ReplacementEngine(
+                self.web3, self.sender_address, self.nonce_manager, self.gas_oracle, self.signing_pool,
+                self.receipt_tracker, self.templates,
+            )
+            if REPLACEMENT_ENABLED:
+                self.block_cache.head_listeners.append(self.replacement_engine.on_new_head)
+            transaction_logger.info("AsyncBlockchainRepository initialized successfully.")
+        except Exception as e:
+            error_logger.error(f"Error during AsyncBlockchainRepository initialization: {e}")
+            raise
+
+    # Ouvrir la session aiohttp poolée et lancer les tâches de fond (doit être appelé depuis la boucle
+    # d'évènements). Ne dépend pas du noeud : les tâches de fond réessaient tant qu'il ne répond pas.
+    async def connect(self):
+        if self.rpc_session is None or self.rpc_session.closed:
+            self.rpc_session = await connect_async_web3(self.web3)
+        await asyncio.gather(
+            self.gas_oracle.start(), self.gas_estimator.start(), self.receipt_tracker.start(),
+            self.replacement_engine.start(), self.block_cache.start(),
+        )
+
+    # Lire depuis le noeud ce qu'il faut pour envoyer des transactions (nonce, chain id).
+    # Lève une exception si le noeud ne répond pas : le service n'est alors pas encore prêt.
+    async def warm_up(self):
+        await self.nonce_manager.sync()
+        await self.templates.prepare()
+
+    # Fermer les connexions keep-alive du pool
+    async def close(self):
+        await self.gas_oracle.stop()
+        await self.gas_estimator.stop()
+        await self.block_cache.stop()
+        await self.receipt_tracker.stop()
+        await self.replacement_engine.stop()
+        self.signing_pool.shutdown()
+        if self.rpc_session is not None and not self.rpc_session.closed:
+            await self.rpc_session.close()
+
+    # Statistiques du pool de connexions aiohttp et des noeuds RPC (latence, santé)
+    def get_pool_stats(self):
+        if self.rpc_session is None:
+            return {"connected": False, "providers": provider_stats(self.web3)}
+        return {**async_pool_stats(self.rpc_session), "providers": provider_stats(self.web3)}
+
+    # Construire la transaction pay() pour un montant, un nonce et des frais donnés (depuis le modèle pré-encodé)
+    def _build_payment_tx(self, amount_in_ether, nonce, fees):
+        return self.templates.payment(
+            self.web3.to_wei(amount_in_ether, "ether"), nonce, self.gas_estimator.get_limit("pay"), fees
+        )
+
+    # Sending Ether (to pay function from contract solidity)
+    async def send_transaction(self, amount_in_ether):
+        nonce = None
+        try:
+            fees = await self.gas_oracle.get_fees("payment")
+            nonce = await self.nonce_manager.allocate()
+            tx = self._build_payment_tx(amount_in_ether, nonce, fees)
+            raw_transaction, _ = await self.signing_pool.sign(tx)
+            tx_hash = await self.web3.eth.send_raw_transaction(raw_transaction)
+            self.nonce_manager.confirm(nonce)
+            self.receipt_tracker.track(self.web3.to_hex(tx_hash), kind="payment", amount=amount_in_ether, nonce=nonce)
+            self.replacement_engine.watch(nonce, tx, self.web3.to_hex(tx_hash))
+            transaction_logger.info(f"Transaction sent successfully. Hash: {self.web3.to_hex(tx_hash)}, amount: {amount_in_ether} ETH")
+            return tx_hash
+        except Exception as e:
+            if nonce is not None:
+                await self.nonce_manager.release(nonce, e)
+            error_logger.error(f"Error in send_transaction: {e}")
+            raise
+
+    # Envoi groupé : nonces consécutifs, signature de chaque paiement, puis un seul lot JSON-RPC
+    # de eth_sendRawTransaction. Retourne, pour chaque montant, le hash ou l'erreur du noeud.
+    async def send_transactions_batch(self, amounts_in_ether):
+        nonces = []
+        sent = False
+        try:
+            fees = await self.gas_oracle.get_fees("payment")
+            nonces = await self.nonce_manager.allocate_many(len(amounts_in_ether))
+            # la transaction suivante est construite pendant que les précédentes sont signées par le pool
+            txs = []
+            signatures = []
+            for amount, nonce in zip(amounts_in_ether, nonces):
+                txs.append(self._build_payment_tx(amount, nonce, fees))
+                signatures.append(await self.signing_pool.submit(txs[-1]))
+            signed = await asyncio.gather(*signatures)
+            requests = [("eth_sendRawTransaction", [self.web3.to_hex(raw_transaction)]) for raw_transaction, _ in signed]
+            sent = True
+            responses = await self.web3.provider.make_batch_request(requests)
+        except Exception as e:
+            # après l'envoi (délai dépassé, connexion coupée), le noeud a pu accepter le lot : la chaîne est
+            # relue au lieu de réutiliser les nonces
+            await self.nonce_manager.release_many(nonces, e, maybe_sent=sent)
+            error_logger.error(f"Error in send_transactions_batch: {e}")
+            raise
+
+        # Une seule erreur pour tout le lot (lot refusé par le noeud) : aucune transaction n'a été acceptée
+        if isinstance(responses, dict):
+            error = responses.get("error")
+            message = error.get("message", str(error)) if isinstance(error, dict) else str(error or responses)
+            await self.nonce_manager.release_many(nonces, message)
+            error_logger.error(f"Error in send_transactions_batch: batch rejected: {message}")
+            return [{"amount": amount, "nonce": nonce, "error": message} for amount, nonce in zip(amounts_in_ether, nonces)]
+        # Réponses manquantes : impossible de savoir quelle transaction a été acceptée
+        if not isinstance(responses, list) or len(responses) != len(nonces):
+            message = f"expected {len(nonces)} responses, got {len(responses) if isinstance(responses, list) else responses!r}"
+            await self.nonce_manager.release_many(nonces, message, maybe_sent=True)
+            error_logger.error(f"Error in send_transactions_batch: {message}")
+            return [{"amount": amount, "nonce": nonce, "error": message} for amount, nonce in zip(amounts_in_ether, nonces)]
+
+        results = []
+        for amount, nonce, tx, response in zip(amounts_in_ether, nonces, txs, responses):
+            error = response.get("error") if isinstance(response, dict) else f"invalid response: {response!r}"
+            if error is None:
+                self.nonce_manager.confirm(nonce)
+                self.receipt_tracker.track(response["result"], kind="payment", amount=amount, nonce=nonce)
+                self.replacement_engine.watch(nonce, tx, response["result"])
+                transaction_logger.info(f"Transaction sent successfully. Hash: {response['result']}, amount: {amount} ETH")
+                results.append({"amount": amount, "nonce": nonce, "tx_hash": response["result"]})
+            else:
+                message = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+                await self.nonce_manager.release(nonce, message, maybe_sent=not isinstance(response, dict))
+                error_logger.error(f"Error in send_transactions_batch (nonce {nonce}): {message}")
+                results.append({"amount": amount, "nonce": nonce, "error": message})
+        return results
+
+    # Appeler une fonction view du contrat, via le cache indexé par bloc
+    async def call_view(self, function_name, *args):
+        async def fetch(block_number):
+            function = self.contract.get_function_by_name(function_name)(*args)
+            return await function.call(block_identifier=block_number if block_number is not None else "latest")
+        return await self.block_cache.get((function_name, args), fetch)
+
+    # État d'une transaction : suivie localement (avec attente optionnelle), sinon un appel au noeud
+    async def get_transaction_status(self, tx_hash, wait=0):
+        try:
+            if wait and tx_hash in self.receipt_tracker.pending:
+                return await self.receipt_tracker.wait(tx_hash, wait)
+            record = self.receipt_tracker.get(tx_hash)
+            if record is None:
+                record = await self.receipt_tracker.fetch(tx_hash)
+            return record
+        except Exception as e:
+            error_logger.error(f"Error in get_transaction_status: {e}")
+            raise
+
+    # Exécuter plusieurs lectures en un seul aller-retour, au bloc courant du cache.
+    # calls : tuples (nom_de_fonction, *args) du contrat, ou (NATIVE_BALANCE, adresse) pour un solde ETH.
+    async def read_many(self, calls):
+        try:
+            block_identifier = self.block_cache.head if self.block_cache.head is not None else "latest"
+            return await self.multicall.read(calls, block_identifier)
+        except Exception as e:
+            error_logger.error(f"Error in read_many: {e}")
+            raise
+
+    # Vue d'ensemble pour le monitoring : solde et propriétaire du contrat, soldes ETH de plusieurs adresses
+    async def get_overview(self, addresses):
+        calls = [("getBalance",), ("owner",)] + [(NATIVE_BALANCE, address) for address in addresses]
+        balance, owner, *native_balances = await self.read_many(calls)
+        return {
+            "contract_balance": self.web3.from_wei(balance, "ether") if balance is not None else None,
+            "owner": owner,
+            "balances": {
+                address: self.web3.from_wei(value, "ether") if value is not None else None
+                for address, value in zip(addresses, native_balances)
+            },
+        }
+
+    # Métriques du pipeline d'envoi : remplacements, trous bouchés, temps d'inclusion
+    def get_replacement_stats(self):
+        return {**self.replacement_engine.get_stats(), "nonces": self.nonce_manager.get_stats()}
+
+    # Statistiques du cache de lecture (hits, misses, appels regroupés)
+    def get_cache_stats(self):
+        return self.block_cache.get_stats()
+
+    # Récupérer le solde du contrat
+    async def get_balance(self):
+        try:
+            balance = await self.call_view("getBalance")
+            eth_balance = self.web3.from_wei(balance, 'ether')
+            transaction_logger.info(f"Balance retrieved successfully: {eth_balance} ETH")
+            return eth_balance
+        except Exception as e:
+            error_logger.error(f"Error in get_balance: {e}")
+            raise
+
+    # Prix du gaz courant, servi par l'oracle (pas d'appel RPC tant que le cache est frais)
+    async def get_current_gas_price(self):
+        try:
+            if self.gas_oracle.is_stale():
+                await self.gas_oracle.refresh()
+            return self.gas_oracle.gas_price
+        except Exception as e:
+            error_logger.error(f"Error in get_current_gas_price: {e}")
+            raise
+
+    # Effectuer un retrait de fonds
+    async def withdraw_funds(self, amount_in_ether):
+        nonce = None
+        try:
+            fees = await self.gas_oracle.get_fees("withdraw")
+            nonce = await self.nonce_manager.allocate()
+            tx = self.templates.withdraw(
+                self.web3.to_wei(amount_in_ether, "ether"), nonce, self.gas_estimator.get_limit("withdraw"), fees
+            )
+            raw_transaction, _ = await self.signing_pool.sign(tx)
+            tx_hash = await self.web3.eth.send_raw_transaction(raw_transaction)
+            self.nonce_manager.confirm(nonce)
+            self.receipt_tracker.track(self.web3.to_hex(tx_hash), kind="withdraw", amount=amount_in_ether, nonce=nonce)
+            self.replacement_engine.watch(nonce, tx, self.web3.to_hex(tx_hash))
+            transaction_logger.info(f"Withdrawal transaction sent with hash: {self.web3.to_hex(tx_hash)}, amount: {amount_in_ether} ETH")
+            return tx_hash
+        except Exception as e:
+            if nonce is not None:
+                await self.nonce_manager.release(nonce, e)
+            error_logger.error(f"Error in withdraw_funds: {e}")
+            raise
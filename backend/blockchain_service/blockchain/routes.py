@@ -1,10 +1,28 @@
-from fastapi import APIRouter, HTTPException
-from blockchain.services import BlockchainService
-from pydantic import BaseModel
+import json
+from datetime import datetime
+from typing import TYPE_CHECKING, List, Literal, Optional
+
+from eth_utils import to_checksum_address
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from blockchain.model import ContractEvent
+from blockchain.event_repository import ContractEventRepository
+from blockchain.runtime import get_blockchain_service
+from blockchain.stream import SubscriberDropped
+from config import BATCH_MAX_SIZE, RECEIPT_MAX_WAIT
+from database.main import get_session
+from pydantic import BaseModel, Field
+
+# web3 n'est importé qu'au démarrage en arrière-plan (voir blockchain/runtime.py)
+if TYPE_CHECKING:
+    from blockchain.services import BlockchainService
 
 
 class PaymentSchema(BaseModel):
     amount: float
+class BatchPaymentSchema(BaseModel):
+    amounts: List[float] = Field(min_length=1, max_length=BATCH_MAX_SIZE)
 class WithdrawRequest(BaseModel):
     amount: float
 blockchain_routes = APIRouter()
@@ -14,33 +32,207 @@ blockchain_routes = APIRouter()
 async def display_message():
     return {"message": "Bienvenue dans mon service Blockchain "}
 
+# la route get de readiness : 200 quand le service blockchain est prêt, 503 pendant le démarrage
+@blockchain_routes.get("/ready")
+async def get_readiness(request: Request):
+    stats = request.app.state.blockchain_runtime.get_stats()
+    return JSONResponse(stats, status_code=200 if stats["ready"] else 503)
+
 # la route post qui envoie un paiement
 @blockchain_routes.post("/send_payment")
-async def send_payment(payment: PaymentSchema):
+async def send_payment(payment: PaymentSchema,
+                       blockchain_service: "BlockchainService" = Depends(get_blockchain_service)):
     try:
-        blockchain_service = BlockchainService()
-        blockchain_service.send_payment(payment.amount)
+        await blockchain_service.send_payment(payment.amount)
         return {"message": "Payment sent successfully!"}
     except Exception as e:
         return {"error": str(e)}
 
+# la route post qui envoie plusieurs paiements en un seul lot JSON-RPC
+@blockchain_routes.post("/send_payments/batch")
+async def send_payments_batch(payments: BatchPaymentSchema,
+                              blockchain_service: "BlockchainService" = Depends(get_blockchain_service)):
+    try:
+        results = await blockchain_service.send_payments_batch(payments.amounts)
+        return {"results": results}
+    except Exception as e:
+        return {"error": str(e)}
+
 # la route get pour vérifie le solde
 @blockchain_routes.get("/balance")
-async def get_balance():
+async def get_balance(blockchain_service: "BlockchainService" = Depends(get_blockchain_service)):
     try:
-        blockchain_service = BlockchainService()
-        balance = blockchain_service.check_balance()
+        balance = await blockchain_service.check_balance()
         return {"balance": balance}
     except Exception as e:
         return {"error": str(e)}
 
+# la route get pour le monitoring : solde, propriétaire et soldes ETH d'adresses (liste séparée par des virgules)
+@blockchain_routes.get("/overview")
+async def get_overview(addresses: str = "",
+                       blockchain_service: "BlockchainService" = Depends(get_blockchain_service)):
+    try:
+        address_list = [to_checksum_address(address.strip()) for address in addresses.split(",") if address.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid address")
+    try:
+        return await blockchain_service.get_overview(address_list)
+    except Exception as e:
+        return {"error": str(e)}
+
 #la route post qui retirer des fonds
 # Cette route permet à un utilisateur de retirer des fonds du contrat blockchain.
 @blockchain_routes.post("/withdraw-funds")
-async def withdraw_funds(payment: PaymentSchema):
+async def withdraw_funds(payment: PaymentSchema,
+                         blockchain_service: "BlockchainService" = Depends(get_blockchain_service)):
     try:
-        blockchain_service = BlockchainService()
-        tx_hash = blockchain_service.withdraw_funds(payment.amount)
+        tx_hash = await blockchain_service.withdraw_funds(payment.amount)
         return {"message": "Withdrawal transaction sent successfully", "tx_hash": tx_hash}
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+# la route get qui retourne l'état d'une transaction (wait = attente maximale en secondes)
+@blockchain_routes.get("/tx/{tx_hash}")
+async def get_transaction(tx_hash: str = Path(pattern=r"^0x[0-9a-fA-F]{64}$"),
+                          wait: float = Query(0, ge=0, le=RECEIPT_MAX_WAIT),
+                          blockchain_service: "BlockchainService" = Depends(get_blockchain_service)):
+    try:
+        record = await blockchain_service.get_transaction_status(tx_hash, wait)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    if record is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return record
+
+# la route get qui expose les métriques du pipeline d'envoi (remplacements, trous de nonces, temps d'inclusion)
+@blockchain_routes.get("/replacements")
+async def get_replacement_stats(blockchain_service: "BlockchainService" = Depends(get_blockchain_service)):
+    return blockchain_service.get_replacement_stats()
+
+# la route get qui expose les statistiques du pool de connexions RPC
+@blockchain_routes.get("/rpc/pool")
+async def get_rpc_pool_stats(blockchain_service: "BlockchainService" = Depends(get_blockchain_service)):
+    return blockchain_service.get_pool_stats()
+
+# la route get qui expose les frais de gaz en cache (oracle rafraîchi en arrière-plan)
+@blockchain_routes.get("/gas")
+async def get_gas_stats(blockchain_service: "BlockchainService" = Depends(get_blockchain_service)):
+    return blockchain_service.get_gas_stats()
+
+# la route get qui expose les compteurs du cache de lecture (/balance)
+@blockchain_routes.get("/cache")
+async def get_cache_stats(blockchain_service: "BlockchainService" = Depends(get_blockchain_service)):
+    return blockchain_service.get_cache_stats()
+
+# la route get qui recherche les évènements PaymentReceived / Withdrawal indexés (sans appel au noeud)
+@blockchain_routes.get("/events", response_model=List[ContractEvent])
+async def search_events(
+    address: Optional[str] = None,
+    event: Optional[Literal["PaymentReceived", "Withdrawal"]] = None,
+    from_time: Optional[datetime] = None,
+    to_time: Optional[datetime] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    session: AsyncSession = Depends(get_session),
+):
+    if address is not None:
+        try:
+            address = to_checksum_address(address)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid address")
+    return await ContractEventRepository(session).search(
+        address=address, event=event, from_time=from_time, to_time=to_time,
+        min_amount=min_amount, max_amount=max_amount, limit=limit, offset=offset,
+    )
+
+# la route get qui expose l'avancement de l'indexeur
+@blockchain_routes.get("/events/status")
+async def get_indexer_stats(blockchain_service: "BlockchainService" = Depends(get_blockchain_service)):
+    return blockchain_service.get_indexer_stats()
+
+# Adresse optionnelle d'un filtre, au format checksum (None si absente)
+def parse_address(address):
+    if address is None:
+        return None
+    try:
+        return to_checksum_address(address)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid address")
+
+# Un évènement au format Server-Sent Events ; l'id "bloc-index" sert de Last-Event-ID à la reconnexion
+def format_sse(item):
+    if item is None:
+        return ": keepalive\n\n"
+    return f"id: {item['block_number']}-{item['log_index']}\nevent: {item['event']}\ndata: {json.dumps(item)}\n\n"
+
+# la route get qui pousse en direct (SSE) les évènements PaymentReceived / Withdrawal des nouveaux blocs.
+# Reprise : from_block (inclus) ou l'en-tête Last-Event-ID envoyé automatiquement par EventSource.
+@blockchain_routes.get("/events/stream")
+async def stream_events(
+    from_block: Optional[int] = Query(None, ge=0),
+    event: Optional[Literal["PaymentReceived", "Withdrawal"]] = None,
+    address: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+    blockchain_service: "BlockchainService" = Depends(get_blockchain_service),
+):
+    address = parse_address(address)
+    cursor = (from_block, -1) if from_block is not None else None
+    if last_event_id:
+        try:
+            block_number, log_index = (int(part) for part in last_event_id.split("-"))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+        cursor = (block_number, log_index)
+    stream = blockchain_service.event_stream
+    try:
+        stream.check_resume(cursor[0] if cursor is not None else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def body():
+        try:
+            async for item in stream.subscribe(cursor, event, address):
+                yield format_sse(item)
+        except SubscriberDropped as e:
+            yield f"event: dropped\ndata: {json.dumps({'detail': str(e)})}\n\n"
+
+    return StreamingResponse(body(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# le WebSocket équivalent : messages {"type": "event", ...}, {"type": "keepalive"} puis {"type": "dropped"}
+# si le client est trop lent (fermeture 1013, il peut se reconnecter avec from_block)
+@blockchain_routes.websocket("/events/ws")
+async def events_websocket(
+    websocket: WebSocket,
+    from_block: Optional[int] = Query(None, ge=0),
+    event: Optional[Literal["PaymentReceived", "Withdrawal"]] = None,
+    address: Optional[str] = None,
+):
+    blockchain_service = websocket.app.state.blockchain_runtime.service
+    if blockchain_service is None:
+        await websocket.close(code=1013, reason="Blockchain service is starting")
+        return
+    stream = blockchain_service.event_stream
+    try:
+        address = parse_address(address)
+        stream.check_resume(from_block)
+    except (HTTPException, ValueError) as e:
+        await websocket.close(code=1008, reason=getattr(e, "detail", str(e)))
+        return
+    await websocket.accept()
+    cursor = (from_block, -1) if from_block is not None else None
+    try:
+        async for item in stream.subscribe(cursor, event, address):
+            await websocket.send_json({"type": "keepalive"} if item is None else {"type": "event", **item})
+    except SubscriberDropped as e:
+        await websocket.send_json({"type": "dropped", "detail": str(e)})
+        await websocket.close(code=1013)
+    except WebSocketDisconnect:
+        pass
+
+# la route get qui expose les clients connectés au flux d'évènements
+@blockchain_routes.get("/events/stream/status")
+async def get_stream_stats(blockchain_service: "BlockchainService" = Depends(get_blockchain_service)):
+    return blockchain_service.get_stream_stats()
@@ -0,0 +1,94 @@
+import asyncio
+import importlib
+import time
+
+from fastapi import HTTPException, Request
+
+from config import STARTUP_RETRY_INTERVAL
+from logger import error_logger, transaction_logger
+
+
+# Classe BlockchainRuntime : démarrage paresseux et non bloquant du BlockchainService.
+# Le lifespan ne fait que lancer une tâche de fond : le serveur accepte les requêtes tout de suite.
+# La tâche importe web3 / eth_account (plus d'une seconde) dans un thread, crée le service (ABI,
+# contrat, adresse de l'expéditeur), lance ses tâches de fond, puis attend que le noeud réponde
+# (nouvel essai toutes les STARTUP_RETRY_INTERVAL secondes). Jusque-là les routes répondent 503 et
+# GET /ready indique l'avancement ; un noeud lent ou injoignable ne bloque ni ne fait planter le démarrage.
+class BlockchainRuntime:
+    def __init__(self, boot_started_at, retry_interval=STARTUP_RETRY_INTERVAL):
+        self.boot_started_at = boot_started_at  # time.perf_counter() au chargement de main.py
+        self.retry_interval = retry_interval
+        self.service = None  # disponible pour les routes une fois prêt
+        self.state = "starting"  # starting -> warming -> ready, ou failed (configuration invalide)
+        self.attempts = 0
+        self.last_error = None
+        self.timings = {}  # étapes du démarrage, en ms depuis le chargement de main.py
+        self._service = None
+        self._task = None
+
+    def _mark(self, step):
+        self.timings[step] = round((time.perf_counter() - self.boot_started_at) * 1000, 1)
+
+    # Appelé dans le lifespan : ne fait aucun appel réseau
+    async def start(self):
+        self._mark("accepting_requests")
+        transaction_logger.info(f"Blockchain service accepting requests after {self.timings['accepting_requests']} ms")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._service is not None:
+            await self._service.stop()
+
+    async def _run(self):
+        try:
+            # l'import de web3 précalcule des tables de courbes elliptiques : hors de la boucle d'évènements
+            services = await asyncio.to_thread(importlib.import_module, "blockchain.services")
+            self._mark("modules_loaded")
+            self._service = services.BlockchainService()
+            await self._service.start()
+            self._mark("service_created")
+        except Exception as e:
+            # ABI, adresse du contrat ou clé privée invalides : réessayer ne changerait rien
+            self.state = "failed"
+            self.last_error = str(e)
+            error_logger.error(f"Error starting blockchain service: {e}")
+            return
+        self.state = "warming"
+        while True:
+            self.attempts += 1
+            try:
+                await self._service.warm_up()
+                break
+            except Exception as e:
+                self.last_error = str(e)
+                error_logger.error(f"Blockchain node not ready (attempt {self.attempts}): {e}")
+                await asyncio.sleep(self.retry_interval)
+        self._mark("ready")
+        self.service = self._service
+        self.state = "ready"
+        transaction_logger.info(f"Blockchain service ready after {self.timings['ready']} ms ({self.attempts} attempt(s))")
+
+    def get_stats(self):
+        return {
+            "ready": self.state == "ready",
+            "state": self.state,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "timings_ms": self.timings,
+        }
+
+
+# Dépendance FastAPI : retourne l'instance unique de BlockchainService (voir main.py), ou 503 tant
+# qu'elle n'est pas prête
+def get_blockchain_service(request: Request):
+    service = request.app.state.blockchain_runtime.service
+    if service is None:
+        raise HTTPException(status_code=503, detail="Blockchain service is starting")
+    return service
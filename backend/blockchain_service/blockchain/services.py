@@ -1,27 +1,52 @@
-from blockchain.repository import BlockchainRepository
+from blockchain.indexer import EventIndexer
+from blockchain.repository import AsyncBlockchainRepository
+from blockchain.stream import EventStream
+from config import INDEXER_ENABLED
+from database.main import async_session_factory
 from logger import  error_logger
-# La classe BlockchainService est une couche de service qui interagit avec le dépôt BlockchainRepository pour effectuer des transactions.
+# La classe BlockchainService est une couche de service qui interagit avec le dépôt AsyncBlockchainRepository pour effectuer des transactions.
 class BlockchainService:
     def __init__(self):
         # Initialisation de la classe BlockchainService.
-        # Cette méthode crée une instance de BlockchainRepository pour interagir avec la blockchain.
+        # Cette méthode crée une instance de AsyncBlockchainRepository pour interagir avec la blockchain.
         # Si une erreur survient lors de l'initialisation, elle est capturée et enregistrée dans les logs.
         try:
-            # Création d'une instance de BlockchainRepository pour accéder aux fonctions de la blockchain.
-            self.repository = BlockchainRepository()
+            # Création d'une instance de AsyncBlockchainRepository pour accéder aux fonctions de la blockchain.
+            self.repository = AsyncBlockchainRepository()
+            # Indexeur des évènements du contrat vers la base locale
+            self.indexer = EventIndexer(self.repository.web3, self.repository.contract, async_session_factory)
+            # Flux en direct des évènements (SSE / WebSocket), alimenté par les nouveaux blocs du cache
+            self.event_stream = EventStream(self.indexer, self.repository.block_cache, async_session_factory)
         except Exception as e:
             # Si une erreur se produit, elle est enregistrée dans le log d'erreur.
             error_logger.error(f"Error initializing BlockchainService: {e}")
             raise
 
-    def send_payment(self, amount_in_ether):
+    async def start(self):
+        # Démarrage (appelé par BlockchainRuntime) : ouvre la session RPC asynchrone poolée et lance les tâches de fond.
+        await self.event_stream.start()
+        await self.repository.connect()
+        if INDEXER_ENABLED:
+            await self.indexer.start()
+
+    async def warm_up(self):
+        # Vérifie que le noeud répond (nonce et chain id lus) : lève une exception tant que ce n'est pas le cas.
+        await self.repository.warm_up()
+
+    async def stop(self):
+        # Arrêt (appelé par BlockchainRuntime) : ferme les connexions du pool.
+        await self.event_stream.stop()
+        await self.indexer.stop()
+        await self.repository.close()
+
+    async def send_payment(self, amount_in_ether):
         #Envoie une transaction de paiement sur la blockchain.
         #Appelle la méthode send_transaction du BlockchainRepository pour envoyer de l'Ether au contrat.
         #Si une erreur survient, elle est capturée et enregistrée dans les logs.
 
         try:
             # Appel de la méthode send_transaction pour envoyer l'Ether au contrat.
-            tx_hash = self.repository.send_transaction(amount_in_ether)
+            tx_hash = await self.repository.send_transaction(amount_in_ether)
             # Retourner le hash de la transaction sous forme de chaîne hexadécimale.
             return tx_hash.hex()
         except Exception as e:
@@ -29,14 +54,23 @@ class BlockchainService:
             error_logger.error(f"Error in send_payment: {e}")
             raise
 
-    def check_balance(self):
+    async def send_payments_batch(self, amounts_in_ether):
+        #Envoie plusieurs paiements en un seul lot JSON-RPC.
+        #Retourne une liste avec, pour chaque montant, le hash de la transaction ou l'erreur du noeud.
+        try:
+            return await self.repository.send_transactions_batch(amounts_in_ether)
+        except Exception as e:
+            error_logger.error(f"Error in send_payments_batch: {e}")
+            raise
+
+    async def check_balance(self):
         #Vérifie le solde du contrat sur la blockchain.
         #Appelle la méthode get_balance du BlockchainRepository pour obtenir le solde du contrat.
         #Si une erreur survient, elle est capturée et enregistrée dans les logs.
 
         try:
             # Appel de la méthode get_balance pour récupérer le solde du contrat.
-            balance = self.repository.get_balance()
+            balance = await self.repository.get_balance()
             # Retourne le solde en Ether
             return balance
         except Exception as e:
@@ -44,17 +78,58 @@ class BlockchainService:
             error_logger.error(f"Error in check_balance: {e}")
             raise
 
-    def withdraw_funds(self, amount_in_ether):
+    async def get_overview(self, addresses):
+        #Retourne en un seul aller-retour le solde et le propriétaire du contrat ainsi que les soldes ETH des adresses.
+        try:
+            return await self.repository.get_overview(addresses)
+        except Exception as e:
+            error_logger.error(f"Error in get_overview: {e}")
+            raise
+
+    async def withdraw_funds(self, amount_in_ether):
         #Effectue un retrait de fonds du contrat vers l'adresse de l'expéditeur.
         #Appelle la méthode withdraw_funds du BlockchainRepository pour initier le retrait.
         #Si une erreur survient, elle est capturée et enregistrée dans les logs.
 
         try:
             # Appel de la méthode withdraw_funds pour retirer des fonds du contrat.
-            tx_hash = self.repository.withdraw_funds(amount_in_ether)
+            tx_hash = await self.repository.withdraw_funds(amount_in_ether)
             # Retourne le hash de la transaction sous forme de chaîne hexadécimale.
             return tx_hash.hex()  # Retourne le hash de la transaction
         except Exception as e:
             # Si une erreur survient lors du retrait, elle est enregistrée dans les logs d'erreur.
             error_logger.error(f"Error in withdraw_funds: {e}")
             raise
+
+    async def get_transaction_status(self, tx_hash, wait=0):
+        #Retourne l'état (pending, success, failed) d'une transaction, ou None si elle est inconnue.
+        #Si wait > 0, attend au plus wait secondes qu'une transaction en attente soit minée.
+        try:
+            return await self.repository.get_transaction_status(tx_hash.lower(), wait)
+        except Exception as e:
+            error_logger.error(f"Error in get_transaction_status: {e}")
+            raise
+
+    def get_pool_stats(self):
+        # Statistiques du pool de connexions RPC, pour dimensionner RPC_POOL_MAXSIZE
+        return self.repository.get_pool_stats()
+
+    def get_gas_stats(self):
+        # Valeurs actuellement servies par l'oracle de gaz
+        return {**self.repository.gas_oracle.get_stats(), "gas_limits": self.repository.gas_estimator.get_stats()}
+
+    def get_indexer_stats(self):
+        # Avancement de l'indexeur d'évènements
+        return self.indexer.get_stats()
+
+    def get_replacement_stats(self):
+        # Transactions bloquées remplacées, trous de nonces bouchés et temps d'inclusion
+        return self.repository.get_replacement_stats()
+
+    def get_stream_stats(self):
+        # Clients connectés au flux d'évènements et clients déconnectés car trop lents
+        return self.event_stream.get_stats()
+
+    def get_cache_stats(self):
+        # Compteurs du cache de lecture du contrat
+        return self.repository.get_cache_stats()
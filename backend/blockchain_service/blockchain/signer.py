@@ -0,0 +1,65 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from eth_account import Account
+
+from config import SIGNING_MODE, SIGNING_QUEUE_SIZE, SIGNING_WORKERS
+
+# Compte chargé une seule fois par worker (la clé privée n'est pas renvoyée avec chaque transaction)
+_worker_account = None
+
+
+def _init_worker(private_key):
+    global _worker_account
+    _worker_account = Account.from_key(private_key)
+
+
+# Exécuté dans le worker : signature secp256k1 (coûteuse en CPU)
+def _sign_in_worker(tx):
+    signed_tx = _worker_account.sign_transaction(tx)
+    return bytes(signed_tx.raw_transaction), bytes(signed_tx.hash)
+
+
+# Classe SigningPool : signe les transactions dans un pool de processus (ou de threads) pour ne pas
+# occuper le thread de la boucle d'évènements. Le nombre de signatures en attente est borné :
+# submit() attend qu'une place se libère, ce qui ralentit le producteur quand les workers saturent.
+class SigningPool:
+    def __init__(self, private_key, workers=SIGNING_WORKERS, mode=SIGNING_MODE, max_pending=SIGNING_QUEUE_SIZE):
+        executor_class = ProcessPoolExecutor if mode == "process" else ThreadPoolExecutor
+        self.mode = mode
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = executor_class(max_workers=workers, initializer=_init_worker, initargs=(private_key,))
+        self._slots = asyncio.Semaphore(max_pending)
+        self.pending = 0
+        self.signed = 0
+
+    # Mettre une transaction en file de signature ; retourne un future (raw_transaction, hash)
+    async def submit(self, tx):
+        await self._slots.acquire()
+        self.pending += 1
+        future = asyncio.get_running_loop().run_in_executor(self._executor, _sign_in_worker, dict(tx))
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future):
+        self.pending -= 1
+        if not future.cancelled() and future.exception() is None:
+            self.signed += 1
+        self._slots.release()
+
+    # Signer une transaction et attendre le résultat
+    async def sign(self, tx):
+        return await (await self.submit(tx))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self):
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "signed": self.signed,
+        }
@@ -0,0 +1,184 @@
+import asyncio
+
+from blockchain.event_repository import CHECKPOINT_NAME, ContractEventRepository
+from config import (
+    EVENT_STREAM_CONFIRMATIONS, EVENT_STREAM_KEEPALIVE, EVENT_STREAM_MAX_RESUME_BLOCKS, EVENT_STREAM_QUEUE_SIZE
+)
+from logger import error_logger, transaction_logger
+
+# Évènements lus par requête dans la base locale lors d'une reprise
+HISTORY_PAGE_SIZE = 500
+
+
+# Le client ne lit pas assez vite : sa file est pleine, il est déconnecté (il peut reprendre depuis un bloc)
+class SubscriberDropped(Exception):
+    pass
+
+
+# Un client connecté au flux : file bornée et filtres
+class Subscription:
+    def __init__(self, queue_size, event=None, address=None):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.event = event
+        self.address = address
+        self.dropped = False
+
+    def matches(self, item):
+        if self.event is not None and item["event"] != self.event:
+            return False
+        return self.address is None or item["address"] == self.address
+
+
+# Classe EventStream : diffuse en direct les évènements PaymentReceived / Withdrawal à tous les clients
+# connectés (SSE et WebSocket). Un seul abonnement en amont pour tout le service : à chaque nouveau bloc
+# annoncé par le BlockCache, un eth_getLogs couvre les nouveaux blocs, puis chaque évènement est copié
+# dans la file bornée de chaque client. Un client dont la file est pleine est déconnecté au lieu de
+# ralentir les autres. Un client peut reprendre depuis un bloc : l'historique est relu dans la base de
+# l'indexeur (blocs déjà indexés) puis sur le noeud, avant de passer au direct.
+class EventStream:
+    def __init__(self, indexer, block_cache, session_factory, confirmations=EVENT_STREAM_CONFIRMATIONS,
+                 queue_size=EVENT_STREAM_QUEUE_SIZE, keepalive=EVENT_STREAM_KEEPALIVE,
+                 max_resume_blocks=EVENT_STREAM_MAX_RESUME_BLOCKS):
+        self.indexer = indexer
+        self.session_factory = session_factory
+        self.confirmations = confirmations
+        self.queue_size = queue_size
+        self.keepalive = keepalive
+        self.max_resume_blocks = max_resume_blocks
+        self.head = None
+        self.last_block = None  # dernier bloc diffusé aux clients
+        self.published = 0
+        self.dropped = 0
+        self._subscriptions = set()
+        self._new_head = asyncio.Event()
+        self._task = None
+        block_cache.head_listeners.append(self.on_new_head)
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # Appelé par le BlockCache à chaque nouvelle tête de chaîne
+    def on_new_head(self, block_number):
+        self.head = block_number
+        self._new_head.set()
+
+    async def _run(self):
+        while True:
+            await self._new_head.wait()
+            self._new_head.clear()
+            try:
+                await self.poll()
+            except Exception as e:
+                error_logger.error(f"Error in EventStream.poll: {e}")
+
+    # Lire les évènements des blocs arrivés depuis le dernier passage et les diffuser
+    async def poll(self):
+        target = self.head - self.confirmations
+        if self.last_block is None or not self._subscriptions:
+            # personne à servir : on avance sans interroger le noeud
+            self.last_block = target if self.last_block is None else max(self.last_block, target)
+            return
+        while self.last_block < target:
+            from_block = self.last_block + 1
+            to_block = min(from_block + self.indexer.chunk_size - 1, target)
+            events = await self.indexer.fetch_events(from_block, to_block)
+            self._publish([event.model_dump(mode="json", exclude={"id"}) for event in events])
+            self.last_block = to_block
+
+    def _publish(self, items):
+        for item in items:
+            for subscription in list(self._subscriptions):
+                if not subscription.matches(item):
+                    continue
+                try:
+                    subscription.queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    self._drop(subscription)
+            self.published += 1
+
+    def _drop(self, subscription):
+        self._subscriptions.discard(subscription)
+        subscription.dropped = True
+        # vider la file pour y déposer le signal de fin (None) : le client le reçoit immédiatement
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+        self.dropped += 1
+        transaction_logger.info(f"Event stream subscriber dropped: queue full ({self.queue_size} events)")
+
+    # Vérifier qu'une reprise depuis `from_block` est possible (avant d'ouvrir la réponse)
+    def check_resume(self, from_block):
+        if from_block is not None and self.last_block is not None and self.last_block - from_block > self.max_resume_blocks:
+            raise ValueError(
+                f"Cannot resume more than {self.max_resume_blocks} blocks back, use GET /events for older history"
+            )
+
+    # Flux des évènements d'un client : l'historique depuis `cursor` (bloc, index du log) puis le direct.
+    # Produit None quand aucun évènement n'est arrivé depuis `keepalive` secondes.
+    async def subscribe(self, cursor=None, event=None, address=None):
+        subscription = Subscription(self.queue_size, event, address)
+        # abonné avant la lecture de l'historique : aucun bloc ne peut tomber entre les deux
+        self._subscriptions.add(subscription)
+        try:
+            history_to = self.last_block
+            if cursor is not None and history_to is not None:
+                async for item in self._history(cursor, history_to):
+                    if subscription.matches(item):
+                        yield item
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if item is None:
+                    raise SubscriberDropped(f"Client too slow, more than {self.queue_size} events pending")
+                yield item
+        finally:
+            self._subscriptions.discard(subscription)
+
+    async def _history(self, cursor, to_block):
+        from_block = cursor[0]
+        # blocs déjà indexés : lus dans la base locale, par pages
+        async with self.session_factory() as session:
+            checkpoint = await ContractEventRepository(session).get_checkpoint(CHECKPOINT_NAME)
+        indexed_to = min(checkpoint.last_block, to_block) if checkpoint is not None else from_block - 1
+        offset = 0
+        while from_block <= indexed_to:
+            async with self.session_factory() as session:
+                page = await ContractEventRepository(session).between_blocks(
+                    from_block, indexed_to, limit=HISTORY_PAGE_SIZE, offset=offset
+                )
+            for event in page:
+                if (event.block_number, event.log_index) > cursor:
+                    yield event.model_dump(mode="json", exclude={"id"})
+            if len(page) < HISTORY_PAGE_SIZE:
+                break
+            offset += len(page)
+        # blocs pas encore indexés : lus sur le noeud
+        start = max(from_block, indexed_to + 1)
+        while start <= to_block:
+            end = min(start + self.indexer.chunk_size - 1, to_block)
+            for event in await self.indexer.fetch_events(start, end):
+                if (event.block_number, event.log_index) > cursor:
+                    yield event.model_dump(mode="json", exclude={"id"})
+            start = end + 1
+
+    def get_stats(self):
+        return {
+            "subscribers": len(self._subscriptions),
+            "last_block": self.last_block,
+            "confirmations": self.confirmations,
+            "queue_size": self.queue_size,
+            "published": self.published,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,45 @@
+from web3 import Web3
+
+from logger import error_logger
+
+
+# Classe TransactionTemplates : modèles pré-encodés des transactions pay() et withdraw(uint256).
+# Le sélecteur, l'adresse du contrat et le chain id sont calculés une seule fois ; chaque envoi
+# ne fait que remplir le nonce, la valeur, la limite de gaz et les frais, sans ré-encoder l'ABI
+# ni repasser par build_transaction.
+class TransactionTemplates:
+    def __init__(self, web3, contract):
+        self.web3 = web3
+        self.contract = contract
+        self.chain_id = None
+        # pay() n'a pas d'argument : le calldata est toujours le même
+        self.pay_data = contract.encode_abi("pay")
+        # withdraw(uint256) : sélecteur de 4 octets suivi de l'argument encodé sur 32 octets
+        self.withdraw_selector = contract.encode_abi("withdraw", args=[0])[:10]
+
+    # Lire le chain id une fois (au démarrage)
+    async def prepare(self):
+        try:
+            if self.chain_id is None:
+                self.chain_id = await self.web3.eth.chain_id
+        except Exception as e:
+            error_logger.error(f"Error in TransactionTemplates.prepare: {e}")
+            raise
+
+    def _base(self, nonce, gas, fees):
+        return {"chainId": self.chain_id, "to": self.contract.address, "gas": gas, "nonce": nonce, **fees}
+
+    # Transaction pay() prête à signer
+    def payment(self, value_wei, nonce, gas, fees):
+        return {**self._base(nonce, gas, fees), "value": value_wei, "data": self.pay_data}
+
+    # Transaction withdraw(amount) prête à signer
+    def withdraw(self, amount_wei, nonce, gas, fees):
+        if amount_wei < 0 or amount_wei >= 2 ** 256:
+            raise ValueError(f"Invalid withdraw amount: {amount_wei}")
+        data = self.withdraw_selector + Web3.to_hex(amount_wei)[2:].rjust(64, "0")
+        return {**self._base(nonce, gas, fees), "value": 0, "data": data}
+
+    # Transfert d'Ether simple (sans appel au contrat), ex. transfert de 0 ETH à soi-même pour boucher un nonce
+    def transfer(self, to, value_wei, nonce, fees):
+        return {"chainId": self.chain_id, "to": to, "gas": 21000, "nonce": nonce, "value": value_wei, "data": "0x", **fees}
@@ -7,3 +7,90 @@ load_dotenv()
 INFURA_URL = os.getenv("INFURA_URL")
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")
 CONTRACT_ADDRESS = os.getenv("CONTRACT_ADDRESS")
+
+# Pool de connexions HTTP (keep-alive) vers le noeud RPC, partagé par toute l'application
+RPC_POOL_CONNECTIONS = int(os.getenv("RPC_POOL_CONNECTIONS", "10"))  # nombre d'hôtes gardés en cache
+RPC_POOL_MAXSIZE = int(os.getenv("RPC_POOL_MAXSIZE", "20"))  # connexions ouvertes par hôte
+RPC_POOL_BLOCK = os.getenv("RPC_POOL_BLOCK", "false").lower() == "true"  # attendre une connexion libre plutôt que d'en ouvrir une en plus
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "10"))  # en secondes
+
+# Plusieurs noeuds RPC (séparés par des virgules), le plus rapide en bonne santé est utilisé en premier
+RPC_URLS = [url.strip() for url in os.getenv("RPC_URLS", "").split(",") if url.strip()] or [INFURA_URL]
+RPC_EWMA_ALPHA = float(os.getenv("RPC_EWMA_ALPHA", "0.2"))  # poids de la dernière mesure dans la latence moyenne
+RPC_MAX_FAILURES = int(os.getenv("RPC_MAX_FAILURES", "3"))  # échecs consécutifs avant d'écarter un noeud
+RPC_COOLDOWN = float(os.getenv("RPC_COOLDOWN", "30"))  # en secondes, durée pendant laquelle un noeud est écarté
+RPC_HEDGE_DELAY = float(os.getenv("RPC_HEDGE_DELAY", "0.3"))  # en secondes, 0 pour désactiver les lectures doublées
+
+# Démarrage en arrière-plan : tant que le noeud ne répond pas, nouvel essai toutes les STARTUP_RETRY_INTERVAL secondes
+STARTUP_RETRY_INTERVAL = float(os.getenv("STARTUP_RETRY_INTERVAL", "5"))
+
+# Oracle de prix du gaz (rafraîchi en arrière-plan)
+GAS_REFRESH_INTERVAL = float(os.getenv("GAS_REFRESH_INTERVAL", "12"))  # en secondes, environ un bloc
+GAS_TTL = float(os.getenv("GAS_TTL", "60"))  # au-delà, les valeurs en cache sont considérées périmées
+GAS_HISTORY_BLOCKS = int(os.getenv("GAS_HISTORY_BLOCKS", "10"))  # blocs lus par eth_feeHistory
+# Stratégie de frais par type d'opération : slow, standard ou fast
+GAS_STRATEGIES = {
+    "payment": os.getenv("GAS_STRATEGY_PAYMENT", "standard"),
+    "withdraw": os.getenv("GAS_STRATEGY_WITHDRAW", "fast"),
+    "replacement": os.getenv("GAS_STRATEGY_REPLACEMENT", "fast"),
+}
+
+# Cache des lectures du contrat, vidé à chaque nouveau bloc
+HEAD_POLL_INTERVAL = float(os.getenv("HEAD_POLL_INTERVAL", "2"))  # en secondes
+
+# Nombre maximum de paiements dans un appel à /send_payments/batch
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "500"))
+
+# Pool de signature des transactions : "process" (secp256k1 en parallèle sur plusieurs coeurs) ou "thread"
+SIGNING_MODE = os.getenv("SIGNING_MODE", "process")
+SIGNING_WORKERS = int(os.getenv("SIGNING_WORKERS", str(os.cpu_count() or 1)))
+SIGNING_QUEUE_SIZE = int(os.getenv("SIGNING_QUEUE_SIZE", "256"))  # signatures en attente avant de bloquer l'envoi
+
+# Indexeur des évènements PaymentReceived / Withdrawal (stockés dans une base locale)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./blockchain_events.db")
+INDEXER_ENABLED = os.getenv("INDEXER_ENABLED", "true").lower() == "true"
+INDEXER_START_BLOCK = int(os.getenv("INDEXER_START_BLOCK", "0"))  # bloc de déploiement du contrat
+INDEXER_CONFIRMATIONS = int(os.getenv("INDEXER_CONFIRMATIONS", "12"))  # profondeur de réorganisation tolérée
+INDEXER_CHUNK_SIZE = int(os.getenv("INDEXER_CHUNK_SIZE", "2000"))  # taille initiale des plages eth_getLogs
+INDEXER_MAX_CHUNK_SIZE = int(os.getenv("INDEXER_MAX_CHUNK_SIZE", "10000"))
+INDEXER_POLL_INTERVAL = float(os.getenv("INDEXER_POLL_INTERVAL", "12"))  # en secondes
+
+# Flux des évènements en direct (GET /events/stream en SSE et /events/ws en WebSocket)
+EVENT_STREAM_CONFIRMATIONS = int(os.getenv("EVENT_STREAM_CONFIRMATIONS", "0"))  # 0 : évènements envoyés dès leur bloc
+EVENT_STREAM_QUEUE_SIZE = int(os.getenv("EVENT_STREAM_QUEUE_SIZE", "1000"))  # évènements en attente avant de déconnecter un client lent
+EVENT_STREAM_KEEPALIVE = float(os.getenv("EVENT_STREAM_KEEPALIVE", "15"))  # en secondes, sans évènement
+EVENT_STREAM_MAX_RESUME_BLOCKS = int(os.getenv("EVENT_STREAM_MAX_RESUME_BLOCKS", "100000"))  # reprise depuis un bloc plus ancien refusée
+
+# Suivi des reçus des transactions envoyées
+RECEIPT_BATCH_SIZE = int(os.getenv("RECEIPT_BATCH_SIZE", "100"))  # hashes par lot eth_getTransactionReceipt
+RECEIPT_HISTORY_SIZE = int(os.getenv("RECEIPT_HISTORY_SIZE", "10000"))  # reçus gardés en mémoire
+RECEIPT_MAX_WAIT = float(os.getenv("RECEIPT_MAX_WAIT", "60"))  # attente maximale de GET /tx/{hash}?wait=
+
+# Transactions bloquées : renvoyées avec des frais augmentés (même nonce), trous de nonces bouchés
+REPLACEMENT_ENABLED = os.getenv("REPLACEMENT_ENABLED", "true").lower() == "true"
+REPLACEMENT_STUCK_BLOCKS = int(os.getenv("REPLACEMENT_STUCK_BLOCKS", "3"))  # blocs en attente avant de renvoyer
+REPLACEMENT_FEE_BUMP = float(os.getenv("REPLACEMENT_FEE_BUMP", "1.125"))  # les noeuds exigent au moins +10 %
+REPLACEMENT_MAX_ATTEMPTS = int(os.getenv("REPLACEMENT_MAX_ATTEMPTS", "5"))  # remplacements par nonce
+REPLACEMENT_MAX_FEE_GWEI = float(os.getenv("REPLACEMENT_MAX_FEE_GWEI", "200"))  # plafond de maxFeePerGas / gasPrice
+
+# Contrat Multicall3 utilisé pour regrouper les lectures (repli sur un lot JSON-RPC s'il n'est pas déployé)
+MULTICALL3_ADDRESS = os.getenv("MULTICALL3_ADDRESS", "0xcA11bde05977b3631167028862bE2a173976CA11")
+
+# Limites de gaz estimées (estimate_gas) et mises en cache, au lieu de 200000 fixe
+GAS_ESTIMATE_MARGIN = float(os.getenv("GAS_ESTIMATE_MARGIN", "1.2"))  # marge de sécurité appliquée à l'estimation
+GAS_ESTIMATE_TTL = float(os.getenv("GAS_ESTIMATE_TTL", "3600"))  # en secondes
+GAS_ESTIMATE_CHECK_INTERVAL = float(os.getenv("GAS_ESTIMATE_CHECK_INTERVAL", "60"))  # vérification réseau / code du contrat
+GAS_LIMIT_FALLBACK = int(os.getenv("GAS_LIMIT_FALLBACK", "200000"))  # tant qu'aucune estimation n'est disponible
+
+# Journaux : écrits par un thread en arrière-plan (QueueListener), avec rotation des fichiers
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # "text" ou "json" (une ligne JSON par entrée)
+LOG_ROTATION = os.getenv("LOG_ROTATION", "size")  # "size" (LOG_MAX_BYTES) ou "time" (LOG_ROTATION_WHEN)
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_ROTATION_WHEN = os.getenv("LOG_ROTATION_WHEN", "midnight")
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "7"))  # anciens fichiers gardés
+
+# Rapprochement du journal des transactions avec la chaîne (scripts/reconcile.py)
+RECONCILE_BATCH_SIZE = int(os.getenv("RECONCILE_BATCH_SIZE", "100"))  # hashes par lot JSON-RPC
+RECONCILE_CONCURRENCY = int(os.getenv("RECONCILE_CONCURRENCY", "8"))  # lots en cours en même temps
+# Transactions sans reçu (et liens de remplacement) gardées pour être comparées aux remplacements plus loin dans le journal
+RECONCILE_MAX_PENDING = int(os.getenv("RECONCILE_MAX_PENDING", "10000"))
@@ -0,0 +1,26 @@
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import SQLModel
+from config import DATABASE_URL
+from typing import AsyncGenerator
+
+# Base locale (SQLite par défaut) où sont stockés les évènements du contrat indexés
+async_engine = create_async_engine(DATABASE_URL, echo=False)
+
+# Define sessionmaker globally
+async_session_factory = sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
+# Initialize the database
+async def init_db() -> None:
+    async with async_engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.create_all)
+
+# Dependency to provide AsyncSession
+async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    async with async_session_factory() as session:
+        yield session
@@ -1,21 +1,59 @@
+import atexit
+import json
 import logging
 import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+from config import LOG_BACKUP_COUNT, LOG_FORMAT, LOG_MAX_BYTES, LOG_ROTATION, LOG_ROTATION_WHEN
 
 # Ensure the logs folder exists
 os.makedirs("scripts/logs", exist_ok=True)
 
+
+# One JSON object per line, for log collectors
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+# Rotating file handler, by size or by time
+def file_handler(path, rotation=LOG_ROTATION, log_format=LOG_FORMAT):
+    if rotation == "time":
+        handler = TimedRotatingFileHandler(path, when=LOG_ROTATION_WHEN, backupCount=LOG_BACKUP_COUNT)
+    else:
+        handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
+    if log_format == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    return handler
+
+
+# The logger only puts the record in a queue; a background thread (QueueListener) writes it to
+# the file, so logging on the request path never waits for the disk. Pending records are
+# written at exit.
+def queued_logger(name, handler, level):
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.addHandler(QueueHandler(log_queue))
+    return logger
+
+
 # Error logger configuration
-error_logger = logging.getLogger("error_logger")
-error_handler = logging.FileHandler("scripts/logs/error_logs.log")
-error_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-error_handler.setFormatter(error_formatter)
-error_logger.setLevel(logging.ERROR)
-error_logger.addHandler(error_handler)
+error_logger = queued_logger("error_logger", file_handler("scripts/logs/error_logs.log"), logging.ERROR)
 
 # Transaction logger configuration
-transaction_logger = logging.getLogger("transaction_logger")
-transaction_handler = logging.FileHandler("scripts/logs/transaction_logs.log")
-transaction_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-transaction_handler.setFormatter(transaction_formatter)
-transaction_logger.setLevel(logging.INFO)
-transaction_logger.addHandler(transaction_handler)
\ No newline at end of file
+transaction_logger = queued_logger("transaction_logger", file_handler("scripts/logs/transaction_logs.log"), logging.INFO)
@@ -1,8 +1,30 @@
+import time
+
+# Début du démarrage à froid (les durées rapportées par GET /api/v1/ready partent d'ici)
+BOOT_STARTED_AT = time.perf_counter()
+
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from blockchain.routes import blockchain_routes
+from blockchain.runtime import BlockchainRuntime
+from database.main import init_db
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup : la base locale est créée, puis le BlockchainService (un seul contrat et un seul pool RPC
+    # pour toute l'application) démarre en arrière-plan ; aucun appel au noeud ne bloque le démarrage
+    await init_db()
+    app.state.blockchain_runtime = BlockchainRuntime(BOOT_STARTED_AT)
+    await app.state.blockchain_runtime.start()
+    yield
+    # Shutdown : arrêter le démarrage s'il est en cours et fermer les connexions keep-alive du pool
+    await app.state.blockchain_runtime.stop()
+
 
 # Création de l'application FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Enregistrement des routes
 app.include_router(blockchain_routes, prefix="/api/v1")
@@ -11,4 +33,3 @@ app.include_router(blockchain_routes, prefix="/api/v1")
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8002)
-print("Routes enregistrées :", app.routes)
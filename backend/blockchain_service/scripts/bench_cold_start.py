@@ -0,0 +1,76 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+# Benchmark : démarrage à froid du service. Lance uvicorn dans un nouveau processus et mesure,
+# depuis le lancement, le temps jusqu'à la première requête acceptée (GET /api/v1/hello) puis
+# jusqu'à ce que GET /api/v1/ready réponde 200 (web3 chargé, noeud joignable).
+# Exemple : python scripts/bench_cold_start.py --runs 5
+# Avec un noeud injoignable, le service doit accepter les requêtes aussi vite : --rpc-url http://127.0.0.1:1
+
+SERVICE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+    except (urllib.error.URLError, ConnectionError):
+        return None, None
+
+
+def run_once(port, rpc_url, ready_timeout):
+    env = dict(os.environ)
+    if rpc_url:
+        env["INFURA_URL"] = rpc_url
+        env.pop("RPC_URLS", None)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=SERVICE_DIR, env=env,
+    )
+    base = f"http://127.0.0.1:{port}/api/v1"
+    try:
+        while get(f"{base}/hello")[0] != 200:
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn exited during startup")
+            time.sleep(0.01)
+        first_request = time.perf_counter() - started
+        ready, stats = None, None
+        while time.perf_counter() - started < ready_timeout:
+            status, stats = get(f"{base}/ready")
+            if status == 200:
+                ready = time.perf_counter() - started
+                break
+            time.sleep(0.05)
+        return first_request, ready, stats
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="blockchain_service cold start benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8102)
+    parser.add_argument("--rpc-url", default=None, help="remplace INFURA_URL pour le test")
+    parser.add_argument("--ready-timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    for run in range(args.runs):
+        first_request, ready, stats = run_once(args.port, args.rpc_url, args.ready_timeout)
+        ready_text = f"{ready * 1000:8.0f} ms" if ready is not None else "not ready"
+        print(f"run {run + 1}: first request {first_request * 1000:8.0f} ms, ready {ready_text}")
+        if stats is not None:
+            print(f"        {stats['state']}, in-process timings: {stats['timings_ms']}")
+
+
+if __name__ == "__main__":
+    main()
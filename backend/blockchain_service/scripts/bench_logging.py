@@ -0,0 +1,83 @@
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+# because when running the project doesn't know the hiearchy of folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from logger import file_handler, queued_logger
+
+# Benchmark : coût d'un transaction_logger.info sur le chemin d'une requête.
+# Avant : FileHandler synchrone (écriture disque dans l'appel). Après : QueueHandler, écriture
+# par le QueueListener en arrière-plan (mesuré aussi jusqu'à ce que tout soit écrit).
+# --disk-latency-ms simule un disque lent (ou saturé) en ajoutant une attente à chaque écriture.
+# Exemple : python scripts/bench_logging.py --count 20000 --disk-latency-ms 0.1
+
+
+def message(i):
+    return f"Payment transaction sent with hash: 0x{i:064x}"
+
+
+def slow_disk(handler, latency):
+    if latency:
+        emit = handler.emit
+
+        def slow_emit(record):
+            time.sleep(latency)
+            emit(record)
+        handler.emit = slow_emit
+    return handler
+
+
+def bench_sync(path, count, latency):
+    logger = logging.getLogger("bench_sync")
+    logger.setLevel(logging.INFO)
+    handler = slow_disk(logging.FileHandler(path), latency)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    logger.addHandler(handler)
+    start = time.perf_counter()
+    for i in range(count):
+        logger.info(message(i))
+    elapsed = time.perf_counter() - start
+    handler.close()
+    return elapsed, elapsed
+
+
+def bench_queued(path, count, log_format, latency):
+    handler = slow_disk(file_handler(path, log_format=log_format), latency)
+    logger = queued_logger(f"bench_queued_{log_format}", handler, logging.INFO)
+    start = time.perf_counter()
+    for i in range(count):
+        logger.info(message(i))
+    on_request_path = time.perf_counter() - start
+    # attendre que le thread d'écriture ait tout vidé
+    while not logger.handlers[0].queue.empty():
+        time.sleep(0.001)
+    return on_request_path, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--disk-latency-ms", type=float, default=0)
+    args = parser.parse_args()
+    latency = args.disk_latency_ms / 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            "FileHandler (avant)": bench_sync(os.path.join(directory, "sync.log"), args.count, latency),
+            "QueueHandler texte": bench_queued(os.path.join(directory, "queued.log"), args.count, "text", latency),
+            "QueueHandler JSON": bench_queued(os.path.join(directory, "queued.json"), args.count, "json", latency),
+        }
+    for name, (request_path, total) in results.items():
+        print(
+            f"{name:22} {request_path / args.count * 1e6:7.2f} µs/appel sur la requête, "
+            f"{total:6.2f} s jusqu'à l'écriture complète"
+        )
+
+
+if __name__ == "__main__":
+    main()
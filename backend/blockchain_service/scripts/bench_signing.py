@@ -0,0 +1,72 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# because when running the project doesn't know the hiearchy of folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from eth_account import Account
+
+from blockchain.signer import SigningPool
+
+# Benchmark : signatures par seconde du SigningPool selon le nombre de workers.
+# Utilise une clé jetable, aucune connexion au réseau n'est faite.
+# Exemple : python scripts/bench_signing.py --count 2000 --mode process
+
+
+def sample_tx(nonce):
+    return {
+        "to": "0x46c92a599f2B1114eA6Bef0d0056a120Ee421fdD",
+        "value": 10 ** 16,
+        "gas": 200000,
+        "maxFeePerGas": 3 * 10 ** 9,
+        "maxPriorityFeePerGas": 10 ** 9,
+        "nonce": nonce,
+        "chainId": 11155111,
+        "data": "0x1b9265b8",  # selecteur de pay()
+    }
+
+
+async def run(pool, count):
+    # même schéma que send_transactions_batch : on soumet tout, puis on attend les signatures
+    futures = [await pool.submit(sample_tx(nonce)) for nonce in range(count)]
+    await asyncio.gather(*futures)
+
+
+def bench_inline(private_key, count):
+    start = time.perf_counter()
+    for nonce in range(count):
+        Account.sign_transaction(sample_tx(nonce), private_key)
+    return count / (time.perf_counter() - start)
+
+
+async def bench_pool(private_key, count, workers, mode):
+    pool = SigningPool(private_key, workers=workers, mode=mode)
+    await run(pool, workers * 2)  # préchauffage : démarrage des workers
+    start = time.perf_counter()
+    await run(pool, count)
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SigningPool throughput benchmark")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--mode", choices=["process", "thread"], default="process")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    private_key = Account.create().key
+    print(f"inline (event loop thread): {bench_inline(private_key, args.count):10.1f} sig/s")
+    workers = 1
+    while workers <= args.max_workers:
+        rate = asyncio.run(bench_pool(private_key, args.count, workers, args.mode))
+        print(f"{args.mode:>7} x {workers:<3}: {rate:10.1f} sig/s")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# because when running the project doesn't know the hiearchy of folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from web3 import AsyncHTTPProvider, AsyncWeb3
+
+from blockchain.templates import TransactionTemplates
+
+# Benchmark : construction des transactions pay() / withdraw() avec build_transaction (web3)
+# comparée aux modèles pré-encodés de TransactionTemplates.
+# Tous les champs sont fournis à build_transaction : aucune connexion au réseau n'est faite.
+# Exemple : python scripts/bench_templates.py --count 20000
+
+CONTRACT_ADDRESS = "0x46c92a599f2B1114eA6Bef0d0056a120Ee421fdD"
+CHAIN_ID = 11155111
+GAS = 60000
+FEES = {"maxFeePerGas": 3 * 10 ** 9, "maxPriorityFeePerGas": 10 ** 9}
+
+
+def load_contract():
+    web3 = AsyncWeb3(AsyncHTTPProvider("http://127.0.0.1:1"))
+    abi_path = os.path.join(os.path.dirname(__file__), "..", "contracts", "abi.json")
+    with open(abi_path, "r") as abi_file:
+        abi = json.load(abi_file)
+    return web3, web3.eth.contract(address=CONTRACT_ADDRESS, abi=abi)
+
+
+async def build_payment(contract, value, nonce):
+    return await contract.functions.pay().build_transaction({
+        "value": value, "gas": GAS, "nonce": nonce, "chainId": CHAIN_ID, **FEES,
+    })
+
+
+async def build_withdraw(contract, amount, nonce):
+    return await contract.functions.withdraw(amount).build_transaction({
+        "gas": GAS, "nonce": nonce, "chainId": CHAIN_ID, **FEES,
+    })
+
+
+async def bench_build_transaction(contract, count):
+    start = time.perf_counter()
+    for nonce in range(count):
+        await build_payment(contract, 10 ** 16 + nonce, nonce)
+        await build_withdraw(contract, 10 ** 16 + nonce, nonce)
+    return 2 * count / (time.perf_counter() - start)
+
+
+def bench_templates(templates, count):
+    start = time.perf_counter()
+    for nonce in range(count):
+        templates.payment(10 ** 16 + nonce, nonce, GAS, FEES)
+        templates.withdraw(10 ** 16 + nonce, nonce, GAS, FEES)
+    return 2 * count / (time.perf_counter() - start)
+
+
+# Les deux méthodes doivent produire exactement les mêmes champs signés
+async def check_equivalence(contract, templates):
+    for amount in (0, 1, 10 ** 16, 2 ** 256 - 1):
+        expected = await build_payment(contract, amount, 7)
+        assert templates.payment(amount, 7, GAS, FEES) == expected, (expected, amount)
+        expected = await build_withdraw(contract, amount, 7)
+        assert templates.withdraw(amount, 7, GAS, FEES) == expected, (expected, amount)
+
+
+async def main_async(count):
+    web3, contract = load_contract()
+    templates = TransactionTemplates(web3, contract)
+    templates.chain_id = CHAIN_ID  # pas de prepare() : aucun appel réseau
+    await check_equivalence(contract, templates)
+    print(f"build_transaction: {await bench_build_transaction(contract, count):12.1f} tx/s")
+    print(f"templates        : {bench_templates(templates, count):12.1f} tx/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transaction template construction benchmark")
+    parser.add_argument("--count", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.count))
+
+
+if __name__ == "__main__":
+    main()
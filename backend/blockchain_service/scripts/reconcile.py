@@ -0,0 +1,50 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+# because when running the project doesn't know the hiearchy of folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from blockchain.provider import build_async_web3, connect_async_web3
+from blockchain.reconcile import Reconciler, read_lines
+from config import CONTRACT_ADDRESS, RECONCILE_BATCH_SIZE, RECONCILE_CONCURRENCY, RECONCILE_MAX_PENDING, RPC_URLS
+
+# Rapprochement : chaque envoi annoncé dans le journal des transactions (hash et montant) est vérifié
+# sur la chaîne (reçu, statut, évènement du contrat) et, avec --with-index, dans la base de l'indexeur.
+# Les anomalies sont écrites dans le rapport (une ligne JSON chacune), le résumé est affiché à la fin.
+# Exemple : python scripts/reconcile.py scripts/logs/transaction_logs.log* --report reconcile.ndjson --with-index
+
+
+async def run(args):
+    web3 = build_async_web3(RPC_URLS)
+    session = await connect_async_web3(web3)
+    session_factory = None
+    if args.with_index:
+        from database.main import async_session_factory, init_db
+        await init_db()
+        session_factory = async_session_factory
+    reconciler = Reconciler(web3, CONTRACT_ADDRESS, session_factory, args.batch_size, args.concurrency, args.max_pending)
+    try:
+        with open(args.report, "w") as report:
+            return await reconciler.run(read_lines(args.logs), report)
+    finally:
+        await session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("logs", nargs="+", help="fichiers journaux (transaction_logs.log, rotations, .gz)")
+    parser.add_argument("--report", default="reconcile_report.ndjson")
+    parser.add_argument("--batch-size", type=int, default=RECONCILE_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=RECONCILE_CONCURRENCY)
+    parser.add_argument("--max-pending", type=int, default=RECONCILE_MAX_PENDING)
+    parser.add_argument("--with-index", action="store_true", help="vérifier aussi les évènements indexés")
+    args = parser.parse_args()
+    summary = asyncio.run(run(args))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
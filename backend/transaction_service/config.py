@@ -6,4 +6,22 @@ from dotenv import load_dotenv
 load_dotenv()  # This will load environment variables from .env file
 
 class Config:
-    DATABASE_URL = os.getenv("DATABASE_URL")
\ No newline at end of file
+    DATABASE_URL = os.getenv("DATABASE_URL")
+    # URL de base du microservice user_service
+    USER_SERVICE_URL = os.getenv("USER_SERVICE_URL", "http://localhost:8080")
+    # Client HTTP partagé vers user_service : pool de connexions keep-alive
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))  # connexions ouvertes au maximum
+    HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))  # connexions inactives gardées ouvertes
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))  # en secondes
+    HTTP2 = os.getenv("HTTP2", "false").lower() == "true"  # nécessite le paquet h2 (httpx[http2])
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))  # en secondes
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+    HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "5"))  # attente d'une connexion libre du pool
+    # Cache local des portefeuilles (propriétaire, devise) : taille maximale (LRU) et durée de vie
+    WALLET_CACHE_SIZE = int(os.getenv("WALLET_CACHE_SIZE", "10000"))
+    WALLET_CACHE_TTL = float(os.getenv("WALLET_CACHE_TTL", "60"))  # en secondes
+    # Secret partagé avec user_service pour /internal/wallet-events (en-tête X-Internal-Token) : sans lui,
+    # les notifications sont refusées et le cache ne compte que sur sa durée de vie
+    WALLET_EVENTS_SECRET = os.getenv("WALLET_EVENTS_SECRET")
+    # Verrous des virements : nombre de verrous entre lesquels les portefeuilles sont répartis (wallet_id % N)
+    WALLET_LOCK_STRIPES = int(os.getenv("WALLET_LOCK_STRIPES", "1024"))
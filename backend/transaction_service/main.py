@@ -1,10 +1,26 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import List
-import uuid
+from transaction.http_client import build_user_service_client
+from transaction.ledger import InMemoryLedger, InsufficientBalance, WalletNotFound
 from transaction.routes import router as routes
+from transaction.wallet_cache import WalletCache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup : un seul client HTTP (pool de connexions keep-alive) vers user_service pour toute l'application
+    app.state.http_client = build_user_service_client()
+    # Cache des portefeuilles (propriétaire, devise), invalidé par les notifications de user_service
+    app.state.wallet_cache = WalletCache()
+    yield
+    # Shutdown : fermer les connexions du pool
+    await app.state.http_client.aclose()
+
+
 # Création de l'application FastAPI
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 app.include_router(routes)
 # Modèle pour les portefeuilles
 class Wallet(BaseModel):
@@ -18,11 +34,13 @@ class User(BaseModel):
     email: str
     wallets: List[Wallet]
 
-# Utilisateurs fictifs pour tester
-fake_users = [
-    User(id=1, name="Alice", email="alice@example.com", wallets=[Wallet(id=1, balance=100.0), Wallet(id=2, balance=50.0)]),
-    User(id=2, name="Bob", email="bob@example.com", wallets=[Wallet(id=3, balance=200.0)]),
-]
+# Registre en mémoire (portefeuilles et virements indexés par identifiant), avec des utilisateurs fictifs pour tester
+ledger = InMemoryLedger()
+ledger.add_user(1, "Alice", "alice@example.com")
+ledger.add_user(2, "Bob", "bob@example.com")
+ledger.add_wallet(1, 1, 100.0)
+ledger.add_wallet(2, 1, 50.0)
+ledger.add_wallet(3, 2, 200.0)
 
 # Modèle pour la requête de transaction
 class TransactionRequest(BaseModel):
@@ -40,8 +58,24 @@ class Transaction(BaseModel):
     sender_balance_after: float
     receiver_balance_after: float
 
-# Liste des transactions effectuées
-transactions = []
+
+def user_view(user) -> User:
+    return User(id=user.user_id, name=user.name, email=user.email,
+                wallets=[Wallet(id=wallet_id, balance=ledger.wallets[wallet_id].balance) for wallet_id in user.wallet_ids])
+
+
+def transaction_view(record) -> Transaction:
+    return Transaction(
+        transaction_id=str(record.transaction_id),
+        sender_wallet_id=record.sender_wallet_id,
+        receiver_wallet_id=record.receiver_wallet_id,
+        amount=record.amount,
+        sender_balance_before=record.sender_balance_before,
+        receiver_balance_before=record.receiver_balance_before,
+        sender_balance_after=record.sender_balance_after,
+        receiver_balance_after=record.receiver_balance_after,
+    )
+
 
 # Route pour afficher un message de bienvenue
 @app.get("/message")
@@ -51,103 +85,80 @@ async def get_message():
 # Route pour récupérer les utilisateurs et leurs portefeuilles
 @app.get("/users", response_model=List[User])
 async def get_users():
-    return fake_users
+    return [user_view(user) for user in ledger.users.values()]
 
 @app.get("/users/{user_id}", response_model=User)
 async def get_user(user_id: int):
-    user = next((user for user in fake_users if user.id == user_id), None)
+    user = ledger.get_user(user_id)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return user_view(user)
+
+# Route pour récupérer plusieurs portefeuilles en un seul appel (GET /wallets?ids=1,3), même forme que user_service
+@app.get("/wallets")
+async def get_wallets(ids: str):
+    wallet_ids = {int(wallet_id) for wallet_id in ids.split(",") if wallet_id.strip()}
+    wallets = (ledger.get_wallet(wallet_id) for wallet_id in wallet_ids)
+    return [{"wallet_id": wallet.wallet_id, "username": ledger.users[wallet.user_id].name, "balance": wallet.balance}
+            for wallet in wallets if wallet is not None]
 
 # Route pour récupérer un portefeuille par ID
 @app.get("/wallets/{wallet_id}", response_model=Wallet)
 async def get_wallet(wallet_id: int):
-    for user in fake_users:
-        wallet = next((wallet for wallet in user.wallets if wallet.id == wallet_id), None)
-        if wallet:
-            return wallet
-    raise HTTPException(status_code=404, detail="Wallet not found")
+    wallet = ledger.get_wallet(wallet_id)
+    if wallet is None:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    return Wallet(id=wallet.wallet_id, balance=wallet.balance)
 
 # Endpoint pour créer une transaction
 @app.post("/transactions/")
 async def create_transaction(transaction: TransactionRequest):
     """Effectuer une transaction entre deux portefeuilles"""
-    sender_wallet = None
-    receiver_wallet = None
-    transaction_id = str(uuid.uuid4())  # Générer un identifiant unique pour la transaction
-
-    # Chercher les portefeuilles
-    for user in fake_users:
-        for wallet in user.wallets:
-            if wallet.id == transaction.sender_wallet_id:
-                sender_wallet = wallet
-            if wallet.id == transaction.receiver_wallet_id:
-                receiver_wallet = wallet
-
-    # Si les deux portefeuilles sont trouvés
-    if not sender_wallet or not receiver_wallet:
-        raise HTTPException(status_code=404, detail="One or both wallets not found")
-
-    # Vérifier le solde du portefeuille de l'expéditeur
-    if sender_wallet.balance < transaction.amount:
-        raise HTTPException(status_code=400, detail="Insufficient balance")
-
-    # Enregistrer les soldes avant la transaction
-    sender_balance_before = sender_wallet.balance
-    receiver_balance_before = receiver_wallet.balance
-
-    # Effectuer la transaction
-    sender_wallet.balance -= transaction.amount
-    receiver_wallet.balance += transaction.amount
-
-    # Enregistrer la transaction
-    transactions.append(Transaction(
-        transaction_id=transaction_id,
-        sender_wallet_id=transaction.sender_wallet_id,
-        receiver_wallet_id=transaction.receiver_wallet_id,
-        amount=transaction.amount,
-        sender_balance_before=sender_balance_before,
-        receiver_balance_before=receiver_balance_before,
-        sender_balance_after=sender_wallet.balance,
-        receiver_balance_after=receiver_wallet.balance
-    ))
+    try:
+        record = ledger.transfer(transaction.sender_wallet_id, transaction.receiver_wallet_id, transaction.amount)
+    except WalletNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:  # InsufficientBalance ou montant invalide
+        raise HTTPException(status_code=400, detail=str(e))
 
     return {
-        "transaction_id": transaction_id,
+        "transaction_id": str(record.transaction_id),
         "message": "Transaction successful",
-        "sender_wallet_balance": sender_wallet.balance,
-        "receiver_wallet_balance": receiver_wallet.balance
+        "sender_wallet_balance": ledger.wallets[record.sender_wallet_id].balance,
+        "receiver_wallet_balance": ledger.wallets[record.receiver_wallet_id].balance
     }
 
+# Route pour consulter une transaction du registre
+@app.get("/ledger/transactions/{transaction_id}", response_model=Transaction)
+async def get_ledger_transaction(transaction_id: str):
+    record = ledger.get_transaction(int(transaction_id)) if transaction_id.isdigit() else None
+    if record is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    return transaction_view(record)
+
 # Route pour annuler une transaction
 @app.delete("/transactions/{transaction_id}/cancel")
 async def cancel_transaction(transaction_id: str):
-    transaction_to_cancel = next((txn for txn in transactions if txn.transaction_id == transaction_id), None)
-
-    if not transaction_to_cancel:
+    if not transaction_id.isdigit():
         raise HTTPException(status_code=404, detail="Transaction not found")
-
-    # Trouver les portefeuilles liés à la transaction
-    sender_wallet = next((wallet for user in fake_users for wallet in user.wallets if wallet.id == transaction_to_cancel.sender_wallet_id), None)
-    receiver_wallet = next((wallet for user in fake_users for wallet in user.wallets if wallet.id == transaction_to_cancel.receiver_wallet_id), None)
-
-    if not sender_wallet or not receiver_wallet:
-        raise HTTPException(status_code=404, detail="Wallets not found")
-
-    # Annuler la transaction
-    sender_wallet.balance = transaction_to_cancel.sender_balance_before
-    receiver_wallet.balance = transaction_to_cancel.receiver_balance_before
-
-    # Supprimer la transaction
-    transactions.remove(transaction_to_cancel)
+    try:
+        record = ledger.cancel(int(transaction_id))
+    except LookupError as e:  # TransactionNotFound ou WalletNotFound
+        raise HTTPException(status_code=404, detail=str(e))
+    except InsufficientBalance as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
     return {
         "message": "Transaction cancelled successfully",
-        "sender_wallet_balance": sender_wallet.balance,
-        "receiver_wallet_balance": receiver_wallet.balance
+        "sender_wallet_balance": ledger.wallets[record.sender_wallet_id].balance,
+        "receiver_wallet_balance": ledger.wallets[record.receiver_wallet_id].balance
     }
 
+# Taille du registre en mémoire
+@app.get("/ledger/stats")
+async def get_ledger_stats():
+    return ledger.get_stats()
+
 # Test pour s'assurer que le microservice fonctionne
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,113 @@
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+
+# because when running the project doesn't know the hiearchy of folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from transaction.ledger import InMemoryLedger
+
+# Benchmark : registre en mémoire indexé (InMemoryLedger) contre l'ancienne version à base de listes
+# (parcours de tous les utilisateurs et portefeuilles à chaque virement, transactions.remove à l'annulation).
+# Exemple : python scripts/bench_ledger.py --wallets 1000000 --transfers 10000000
+
+
+def build_ledger(wallet_count):
+    ledger = InMemoryLedger()
+    # deux portefeuilles par utilisateur, comme les données fictives de main.py
+    for user_id in range(1, wallet_count // 2 + 2):
+        ledger.add_user(user_id, f"user{user_id}", f"user{user_id}@example.com")
+    for wallet_id in range(1, wallet_count + 1):
+        ledger.add_wallet(wallet_id, (wallet_id + 1) // 2, 1000.0)
+    return ledger
+
+
+def bench_ledger(wallet_count, transfer_count, cancel_ratio, seed):
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    ledger = build_ledger(wallet_count)
+    build_time = time.perf_counter() - start
+
+    pairs = [(rng.randint(1, wallet_count), rng.randint(1, wallet_count)) for _ in range(min(transfer_count, 1000000))]
+    transfer = ledger.transfer
+    start = time.perf_counter()
+    for i in range(transfer_count):
+        sender, receiver = pairs[i % len(pairs)]
+        transfer(sender, receiver, 1.0)
+    transfer_time = time.perf_counter() - start
+
+    cancels = int(transfer_count * cancel_ratio)
+    ids = rng.sample(range(1, transfer_count + 1), cancels)
+    start = time.perf_counter()
+    for transaction_id in ids:
+        ledger.cancel(transaction_id)
+    cancel_time = time.perf_counter() - start
+
+    return {
+        "build": build_time,
+        "transfer_us": transfer_time / transfer_count * 1e6,
+        "transfers_per_s": transfer_count / transfer_time,
+        "cancel_us": cancel_time / cancels * 1e6 if cancels else None,
+        "stats": ledger.get_stats(),
+    }
+
+
+# Ancienne version (main.py avant le registre) : listes d'utilisateurs, de portefeuilles et de transactions
+def bench_lists(wallet_count, transfer_count, seed):
+    rng = random.Random(seed)
+    users = [{"id": user_id, "wallets": []} for user_id in range(1, wallet_count // 2 + 2)]
+    for wallet_id in range(1, wallet_count + 1):
+        users[(wallet_id - 1) // 2]["wallets"].append({"id": wallet_id, "balance": 1000.0})
+    transactions = []
+    start = time.perf_counter()
+    for transaction_id in range(transfer_count):
+        sender_id, receiver_id = rng.randint(1, wallet_count), rng.randint(1, wallet_count)
+        sender = receiver = None
+        for user in users:
+            for wallet in user["wallets"]:
+                if wallet["id"] == sender_id:
+                    sender = wallet
+                if wallet["id"] == receiver_id:
+                    receiver = wallet
+        sender["balance"] -= 1.0
+        receiver["balance"] += 1.0
+        transactions.append({"transaction_id": transaction_id, "amount": 1.0})
+    transfer_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for transaction_id in rng.sample(range(transfer_count), transfer_count // 10):
+        transaction = next(txn for txn in transactions if txn["transaction_id"] == transaction_id)
+        transactions.remove(transaction)
+    cancel_time = time.perf_counter() - start
+    return transfer_time / transfer_count * 1e6, cancel_time / (transfer_count // 10) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wallets", type=int, default=1000000)
+    parser.add_argument("--transfers", type=int, default=10000000)
+    parser.add_argument("--cancel-ratio", type=float, default=0.1)
+    parser.add_argument("--baseline-wallets", type=int, default=5000, help="taille de l'ancienne version (0 : ignorée)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.baseline_wallets:
+        transfer_us, cancel_us = bench_lists(args.baseline_wallets, 2000, args.seed)
+        print(f"listes  {args.baseline_wallets:>9} portefeuilles : virement {transfer_us:9.1f} µs, annulation {cancel_us:9.1f} µs")
+        result = bench_ledger(args.baseline_wallets, 2000, args.cancel_ratio, args.seed)
+        print(f"registre {args.baseline_wallets:>8} portefeuilles : virement {result['transfer_us']:9.2f} µs, "
+              f"annulation {result['cancel_us']:9.2f} µs")
+
+    result = bench_ledger(args.wallets, args.transfers, args.cancel_ratio, args.seed)
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"registre {args.wallets} portefeuilles, {args.transfers} virements :")
+    print(f"  construction {result['build']:.2f} s")
+    print(f"  virement     {result['transfer_us']:.2f} µs ({result['transfers_per_s']:.0f} virements/s)")
+    print(f"  annulation   {result['cancel_us']:.2f} µs")
+    print(f"  mémoire max  {max_rss:.0f} Mo, {result['stats']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+# because when running the project doesn't know the hiearchy of folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Lue avant les imports du service : config.py charge le .env du service (PostgreSQL), qui ne doit pas
+# remplacer la base SQLite par défaut du benchmark
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
+from fastapi import HTTPException
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import Field, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import transaction.services as services
+from transaction.model import Transaction
+from transaction.services import TransactionService
+
+# Benchmark : virement par TransactionService.create_transaction (SELECT ... FOR UPDATE dans l'ordre des
+# portefeuilles, un UPDATE conditionnel puis INSERT ... RETURNING, dans une seule transaction SQL) contre l'ancien chemin (session.get des deux
+# portefeuilles, soldes modifiés en Python, commit puis refresh). Mesure le nombre d'instructions SQL par virement, la latence en séquentiel, et
+# vérifie les soldes après des virements concurrents sur quelques portefeuilles.
+# Base : --database-url ou la variable d'environnement DATABASE_URL (pas le .env du service), sinon un fichier
+# SQLite temporaire (aiosqlite).
+# Exemple : DATABASE_URL=postgresql+asyncpg://... python scripts/bench_sql_transfer.py --transfers 2000
+
+
+# Table des portefeuilles de user_service, réduite aux colonnes utilisées par un virement
+class Wallet(SQLModel, table=True):
+    wallet_id: Optional[int] = Field(default=None, primary_key=True)
+    balance: float = Field(default=0)
+
+
+class NoLock:
+    @asynccontextmanager
+    async def hold(self, *wallet_ids):
+        yield
+
+
+# Ancien chemin de TransactionService.create_transaction : lecture, vérification et écriture en Python
+async def orm_transfer(session, sender_wallet_id, receiver_wallet_id, amount):
+    sender_wallet = await session.get(Wallet, sender_wallet_id)
+    receiver_wallet = await session.get(Wallet, receiver_wallet_id)
+    if not sender_wallet or not receiver_wallet:
+        raise HTTPException(status_code=404, detail="Sender or receiver wallet not found.")
+    if sender_wallet.balance < amount:
+        raise HTTPException(status_code=400, detail="Insufficient balance in sender's wallet.")
+    sender_wallet.balance -= amount
+    receiver_wallet.balance += amount
+    transaction = Transaction(sender_wallet_id=sender_wallet_id, receiver_wallet_id=receiver_wallet_id, amount=amount)
+    session.add(transaction)
+    await session.commit()
+    await session.refresh(transaction)
+    return transaction
+
+
+async def sql_transfer(session, sender_wallet_id, receiver_wallet_id, amount):
+    return await TransactionService.create_transaction(session, sender_wallet_id, receiver_wallet_id, amount)
+
+
+PATHS = {"orm": orm_transfer, "sql": sql_transfer}
+
+
+async def reset(engine, wallets, balance):
+    async with engine.begin() as connection:
+        await connection.run_sync(SQLModel.metadata.drop_all)
+        await connection.run_sync(SQLModel.metadata.create_all)
+        await connection.execute(Wallet.__table__.insert(), [
+            {"wallet_id": wallet_id, "balance": balance} for wallet_id in range(1, wallets + 1)
+        ])
+
+
+async def total_balance(session_factory):
+    async with session_factory() as session:
+        total = (await session.execute(select(func.sum(Wallet.balance)))).scalar_one()
+        overdrawn = (await session.execute(select(func.count()).where(Wallet.balance < 0))).scalar_one()
+        return total, overdrawn
+
+
+async def sequential(engine, session_factory, transfer, transfers, wallets, seed):
+    rng = random.Random(seed)
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    # instructions envoyées à la base (SELECT, UPDATE, INSERT) et commits : un aller-retour chacun
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    event.listen(engine.sync_engine, "commit", count)
+    started = time.perf_counter()
+    for _ in range(transfers):
+        sender_id, receiver_id = rng.sample(range(1, wallets + 1), 2)
+        async with session_factory() as session:
+            await transfer(session, sender_id, receiver_id, 1.0)
+    elapsed = time.perf_counter() - started
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+    event.remove(engine.sync_engine, "commit", count)
+    return elapsed / transfers * 1000, statements / transfers
+
+
+async def concurrent(session_factory, transfer, transfers, concurrency, hot_wallets, balance, seed):
+    rng = random.Random(seed)
+    pairs = iter([rng.sample(range(1, hot_wallets + 1), 2) + [float(rng.randint(1, 20))] for _ in range(transfers)])
+    results = {"accepted": 0, "rejected": 0, "errors": 0}
+
+    async def worker():
+        for sender_id, receiver_id, amount in pairs:
+            try:
+                async with session_factory() as session:
+                    await transfer(session, sender_id, receiver_id, amount)
+                results["accepted"] += 1
+            except HTTPException:
+                results["rejected"] += 1
+            except DBAPIError:  # verrou de la base (SQLite : database is locked), interblocage
+                results["errors"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    total, overdrawn = await total_balance(session_factory)
+    results["transfers_per_s"] = transfers / elapsed
+    results["balance_drift"] = round(total - balance * hot_wallets, 2)
+    results["overdrawn"] = overdrawn
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--transfers", type=int, default=2000)
+    parser.add_argument("--wallets", type=int, default=1000)
+    parser.add_argument("--hot-wallets", type=int, default=4, help="portefeuilles du test concurrent")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--no-process-locks", action="store_true",
+                        help="sans les verrous du processus, comme plusieurs workers partageant la base")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if not database_url:
+        database_url = f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    if args.no_process_locks:
+        services.wallet_locks = NoLock()
+    engine = create_async_engine(database_url, pool_size=args.concurrency)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    print(f"{engine.dialect.name}, {args.transfers} virements")
+
+    for name, transfer in PATHS.items():
+        await reset(engine, args.wallets, 1000000.0)
+        latency_ms, statements = await sequential(engine, session_factory, transfer, args.transfers, args.wallets,
+                                                  args.seed)
+        await reset(engine, args.hot_wallets, 100.0)
+        result = await concurrent(session_factory, transfer, args.transfers, args.concurrency, args.hot_wallets, 100.0,
+                                  args.seed)
+        print(f"{name}: {latency_ms:.2f} ms et {statements:.1f} allers-retours par virement (séquentiel)")
+        print(f"     {args.concurrency} en parallèle sur {args.hot_wallets} portefeuilles : "
+              f"{result['transfers_per_s']:.0f} virements/s, {result['accepted']} acceptés, "
+              f"{result['rejected']} refusés, {result['errors']} erreurs, écart des soldes {result['balance_drift']}, "
+              f"{result['overdrawn']} à découvert")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from contextlib import asynccontextmanager
+
+# because when running the project doesn't know the hiearchy of folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from transaction.locks import AsyncWalletLocks
+
+# Benchmark : virements concurrents sans verrou, avec un verrou global, et avec les verrous par portefeuille
+# (AsyncWalletLocks), selon le nombre de portefeuilles sollicités (« hot wallets »).
+# Chaque virement reproduit TransactionService.create_transaction : lecture des deux soldes, vérification,
+# écriture et commit, avec `--latency-ms` d'attente (aller-retour à la base) après la lecture et au commit.
+# Exemple : python scripts/bench_wallet_locks.py --hot-wallets 2 8 32 128 1024 --concurrency 100
+
+
+class NoLock:
+    @asynccontextmanager
+    async def hold(self, *wallet_ids):
+        yield
+
+
+class GlobalLock:
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def hold(self, *wallet_ids):
+        async with self._lock:
+            yield
+
+
+async def transfer(balances, locks, sender_id, receiver_id, amount, latency):
+    async with locks.hold(sender_id, receiver_id):
+        sender_balance, receiver_balance = balances[sender_id], balances[receiver_id]
+        await asyncio.sleep(latency)  # lecture des portefeuilles
+        if sender_balance < amount:
+            return False
+        balances[sender_id] = sender_balance - amount
+        balances[receiver_id] = receiver_balance + amount
+        await asyncio.sleep(latency)  # commit
+        return True
+
+
+async def run(locks, hot_wallets, transfers, concurrency, latency, seed):
+    rng = random.Random(seed)
+    balances = {wallet_id: 100.0 for wallet_id in range(hot_wallets)}
+    pairs = []
+    for _ in range(transfers):
+        sender_id, receiver_id = rng.sample(range(hot_wallets), 2)
+        pairs.append((sender_id, receiver_id, float(rng.randint(1, 20))))
+    queue = iter(pairs)
+    accepted = 0
+
+    async def worker():
+        nonlocal accepted
+        for sender_id, receiver_id, amount in queue:
+            done = await transfer(balances, locks, sender_id, receiver_id, amount, latency)
+            accepted += done
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "transfers_per_s": transfers / elapsed,
+        "accepted": accepted,
+        # sans verrou, des mises à jour sont perdues : la somme des soldes change et des soldes deviennent négatifs
+        "balance_drift": round(sum(balances.values()) - 100.0 * hot_wallets, 2),
+        "overdrawn": sum(1 for balance in balances.values() if balance < 0),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hot-wallets", type=int, nargs="+", default=[2, 8, 32, 128, 1024])
+    parser.add_argument("--transfers", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=100, help="virements en cours en même temps")
+    parser.add_argument("--latency-ms", type=float, default=0.5)
+    parser.add_argument("--stripes", type=int, default=1024)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{args.transfers} virements, {args.concurrency} en parallèle, latence {args.latency_ms} ms, "
+          f"{args.stripes} verrous")
+    print(f"{'portefeuilles':>13} {'mode':>8} {'virements/s':>12} {'acceptés':>9} {'écart':>9} {'négatifs':>9} {'attente':>9}")
+    for hot_wallets in args.hot_wallets:
+        modes = [("aucun", NoLock()), ("global", GlobalLock()), ("stripes", AsyncWalletLocks(args.stripes))]
+        for name, locks in modes:
+            result = await run(locks, hot_wallets, args.transfers, args.concurrency, args.latency_ms / 1000, args.seed)
+            contention = ""
+            if isinstance(locks, AsyncWalletLocks):
+                contention = f"{locks.get_stats()['contention_rate']:.0%}"
+            print(f"{hot_wallets:>13} {name:>8} {result['transfers_per_s']:>12.0f} {result['accepted']:>9} "
+                  f"{result['balance_drift']:>9} {result['overdrawn']:>9} {contention:>9}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
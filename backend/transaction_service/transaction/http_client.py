@@ -0,0 +1,72 @@
+import importlib.util
+
+import httpx
+from fastapi import Request
+
+from config import Config
+
+
+def build_user_service_client() -> httpx.AsyncClient:
+    """Créer le client HTTP partagé vers user_service (un seul par application).
+
+    Les connexions TCP restent ouvertes entre les requêtes (keep-alive) : une transaction ne paie plus
+    une nouvelle poignée de main TCP/TLS pour chaque appel à user_service.
+    """
+    # HTTP/2 seulement si le paquet h2 est installé, sinon HTTP/1.1 avec keep-alive
+    http2 = Config.HTTP2 and importlib.util.find_spec("h2") is not None
+    client = httpx.AsyncClient(
+        base_url=Config.USER_SERVICE_URL,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=Config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            Config.HTTP_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT, pool=Config.HTTP_POOL_TIMEOUT
+        ),
+    )
+    client.requests_sent = 0
+
+    async def count_request(request: httpx.Request) -> None:
+        client.requests_sent += 1
+
+    client.event_hooks["request"].append(count_request)
+    return client
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """Dépendance FastAPI : le client partagé créé dans le lifespan."""
+    return request.app.state.http_client
+
+
+def client_pool_stats(client: httpx.AsyncClient) -> dict:
+    """Métriques du pool de connexions du client (connexions actives, inactives, HTTP/2)."""
+    pool = client._transport._pool
+    connections = list(pool.connections)
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return {
+        "base_url": str(client.base_url),
+        "http2_enabled": pool._http2,
+        "max_connections": pool._max_connections,
+        "max_keepalive_connections": pool._max_keepalive_connections,
+        "keepalive_expiry": pool._keepalive_expiry,
+        "connections": len(connections),
+        "active_connections": len(connections) - idle,
+        "idle_connections": idle,
+        "http2_connections": sum(1 for connection in connections if "HTTP/2" in connection.info()),
+        "requests_waiting": sum(1 for pool_request in pool._requests if pool_request.is_queued()),
+        "requests_sent": client.requests_sent,
+        "closed": client.is_closed,
+    }
+
+
+async def fetch_wallets(client: httpx.AsyncClient, wallet_ids: list[int]) -> dict[int, dict]:
+    """Récupérer plusieurs portefeuilles en un seul aller-retour (GET /wallets?ids=1,2).
+
+    Retourne {wallet_id: portefeuille} avec le propriétaire (`username`) et la devise ; les portefeuilles
+    introuvables sont absents. Une erreur de user_service lève `httpx.HTTPStatusError`.
+    """
+    response = await client.get("/wallets", params={"ids": ",".join(str(wallet_id) for wallet_id in wallet_ids)})
+    response.raise_for_status()
+    return {wallet["wallet_id"]: wallet for wallet in response.json()}
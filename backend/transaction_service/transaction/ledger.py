@@ -0,0 +1,160 @@
+import itertools
+from typing import Optional
+
+from transaction.locks import WalletLocks
+
+
+class WalletNotFound(LookupError):
+    """Portefeuille inconnu du registre."""
+
+
+class TransactionNotFound(LookupError):
+    """Transaction inconnue (ou déjà annulée)."""
+
+
+class InsufficientBalance(ValueError):
+    """Solde insuffisant pour effectuer (ou annuler) la transaction."""
+
+
+class UserRecord:
+    __slots__ = ("user_id", "name", "email", "wallet_ids")
+
+    def __init__(self, user_id: int, name: str, email: str):
+        self.user_id = user_id
+        self.name = name
+        self.email = email
+        self.wallet_ids = []
+
+
+class WalletRecord:
+    __slots__ = ("wallet_id", "user_id", "balance")
+
+    def __init__(self, wallet_id: int, user_id: int, balance: float):
+        self.wallet_id = wallet_id
+        self.user_id = user_id
+        self.balance = balance
+
+
+class TransferRecord:
+    """Virement enregistré : les soldes après se déduisent des soldes avant et du montant."""
+    __slots__ = ("transaction_id", "sender_wallet_id", "receiver_wallet_id", "amount",
+                 "sender_balance_before", "receiver_balance_before")
+
+    def __init__(self, transaction_id: int, sender_wallet_id: int, receiver_wallet_id: int, amount: float,
+                 sender_balance_before: float, receiver_balance_before: float):
+        self.transaction_id = transaction_id
+        self.sender_wallet_id = sender_wallet_id
+        self.receiver_wallet_id = receiver_wallet_id
+        self.amount = amount
+        self.sender_balance_before = sender_balance_before
+        self.receiver_balance_before = receiver_balance_before
+
+    @property
+    def sender_balance_after(self) -> float:
+        if self.sender_wallet_id == self.receiver_wallet_id:
+            return self.sender_balance_before
+        return self.sender_balance_before - self.amount
+
+    @property
+    def receiver_balance_after(self) -> float:
+        if self.sender_wallet_id == self.receiver_wallet_id:
+            return self.receiver_balance_before
+        return self.receiver_balance_before + self.amount
+
+
+class CancelRecord:
+    """Annulation d'un virement, ajoutée au journal (le virement d'origine y reste)."""
+    __slots__ = ("transaction_id",)
+
+    def __init__(self, transaction_id: int):
+        self.transaction_id = transaction_id
+
+
+class InMemoryLedger:
+    """Registre en mémoire des portefeuilles et des virements (mode démo, tests de charge).
+
+    Les portefeuilles et les virements sont indexés par identifiant (dict) : consultation, virement
+    et annulation en O(1), quel que soit le nombre de portefeuilles ou de virements. Toutes les
+    opérations sont ajoutées à un journal `log` en ajout seul ; une annulation ajoute un CancelRecord
+    et retire le virement de l'index des virements actifs. Un virement ou une annulation prend les
+    verrous (WalletLocks) de ses deux portefeuilles : le registre peut être partagé entre threads.
+    """
+
+    def __init__(self, locks: Optional[WalletLocks] = None):
+        self.users: dict[int, UserRecord] = {}
+        self.wallets: dict[int, WalletRecord] = {}
+        self.transactions: dict[int, TransferRecord] = {}  # virements actifs (non annulés)
+        self.log: list = []  # journal en ajout seul : TransferRecord et CancelRecord
+        self.locks = locks if locks is not None else WalletLocks()
+        self._transaction_ids = itertools.count(1)
+
+    def add_user(self, user_id: int, name: str, email: str) -> UserRecord:
+        user = UserRecord(user_id, name, email)
+        self.users[user_id] = user
+        return user
+
+    def add_wallet(self, wallet_id: int, user_id: int, balance: float) -> WalletRecord:
+        wallet = WalletRecord(wallet_id, user_id, balance)
+        self.wallets[wallet_id] = wallet
+        self.users[user_id].wallet_ids.append(wallet_id)
+        return wallet
+
+    def get_user(self, user_id: int) -> Optional[UserRecord]:
+        return self.users.get(user_id)
+
+    def get_wallet(self, wallet_id: int) -> Optional[WalletRecord]:
+        return self.wallets.get(wallet_id)
+
+    def get_transaction(self, transaction_id: int) -> Optional[TransferRecord]:
+        return self.transactions.get(transaction_id)
+
+    def transfer(self, sender_wallet_id: int, receiver_wallet_id: int, amount: float) -> TransferRecord:
+        """Virer `amount` d'un portefeuille à l'autre et enregistrer le virement."""
+        if amount <= 0:
+            raise ValueError("Amount must be positive")
+        sender = self.wallets.get(sender_wallet_id)
+        receiver = self.wallets.get(receiver_wallet_id)
+        if sender is None or receiver is None:
+            raise WalletNotFound("One or both wallets not found")
+
+        with self.locks.hold(sender_wallet_id, receiver_wallet_id):
+            if sender.balance < amount:
+                raise InsufficientBalance("Insufficient balance")
+            record = TransferRecord(next(self._transaction_ids), sender_wallet_id, receiver_wallet_id, amount,
+                                    sender.balance, receiver.balance)
+            sender.balance -= amount
+            receiver.balance += amount
+            self.transactions[record.transaction_id] = record
+            self.log.append(record)
+        return record
+
+    def cancel(self, transaction_id: int) -> TransferRecord:
+        """Annuler un virement : le montant est rendu à l'expéditeur (les virements suivants sont conservés)."""
+        record = self.transactions.get(transaction_id)
+        if record is None:
+            raise TransactionNotFound("Transaction not found")
+        sender = self.wallets.get(record.sender_wallet_id)
+        receiver = self.wallets.get(record.receiver_wallet_id)
+        if sender is None or receiver is None:
+            raise WalletNotFound("Wallets not found")
+
+        with self.locks.hold(record.sender_wallet_id, record.receiver_wallet_id):
+            # déjà annulé par un autre thread pendant l'attente des verrous
+            if transaction_id not in self.transactions:
+                raise TransactionNotFound("Transaction not found")
+            if receiver.balance < record.amount and sender is not receiver:
+                raise InsufficientBalance("Receiver balance too low to cancel the transaction")
+            receiver.balance -= record.amount
+            sender.balance += record.amount
+            del self.transactions[transaction_id]
+            self.log.append(CancelRecord(transaction_id))
+        return record
+
+    def get_stats(self) -> dict:
+        return {
+            "users": len(self.users),
+            "wallets": len(self.wallets),
+            "active_transactions": len(self.transactions),
+            "log_entries": len(self.log),
+            "locks": self.locks.get_stats(),
+        }
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from config import Config
+
+
+class _WalletStripes:
+    """Verrous par portefeuille, répartis sur un nombre fixe de verrous (lock striping).
+
+    Le portefeuille `wallet_id` est protégé par le verrou `wallet_id % stripes` : la mémoire ne dépend pas du
+    nombre de portefeuilles, et deux virements entre des portefeuilles différents ne s'attendent que s'ils
+    tombent sur le même verrou. Les verrous d'un virement sont toujours pris dans l'ordre croissant de leur
+    indice : deux virements A -> B et B -> A ne peuvent pas s'interbloquer.
+    """
+
+    def __init__(self, stripes: int, lock_factory):
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1")
+        self.stripes = stripes
+        self._locks = [lock_factory() for _ in range(stripes)]
+        self.acquisitions = 0
+        self.contended = 0  # acquisitions qui ont dû attendre un autre virement
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def stripe_indexes(self, *wallet_ids: int) -> list[int]:
+        """Indices des verrous à prendre pour ces portefeuilles, sans doublon et dans l'ordre canonique."""
+        return sorted({wallet_id % self.stripes for wallet_id in wallet_ids})
+
+    def _record(self, contended: bool, started: float) -> None:
+        self.acquisitions += 1
+        if contended:
+            waited = time.perf_counter() - started
+            self.contended += 1
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+
+    def get_stats(self) -> dict:
+        return {
+            "stripes": self.stripes,
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "contention_rate": round(self.contended / self.acquisitions, 4) if self.acquisitions else None,
+            "wait_ms_avg": round(self.wait_time_total / self.contended * 1000, 3) if self.contended else None,
+            "wait_ms_max": round(self.wait_time_max * 1000, 3),
+        }
+
+
+class WalletLocks(_WalletStripes):
+    """Verrous par portefeuille pour du code synchrone (threads), par exemple le registre en mémoire."""
+
+    def __init__(self, stripes: int = Config.WALLET_LOCK_STRIPES):
+        super().__init__(stripes, threading.Lock)
+
+    @contextmanager
+    def hold(self, *wallet_ids: int):
+        """Prendre les verrous de tous les portefeuilles d'un virement pendant le bloc `with`."""
+        acquired = []
+        try:
+            for index in self.stripe_indexes(*wallet_ids):
+                lock = self._locks[index]
+                started = time.perf_counter()
+                contended = not lock.acquire(blocking=False)
+                if contended:
+                    lock.acquire()
+                acquired.append(lock)
+                self._record(contended, started)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+
+class AsyncWalletLocks(_WalletStripes):
+    """Verrous par portefeuille pour les coroutines (lecture, vérification et écriture séparées par des `await`)."""
+
+    def __init__(self, stripes: int = Config.WALLET_LOCK_STRIPES):
+        super().__init__(stripes, asyncio.Lock)
+
+    @asynccontextmanager
+    async def hold(self, *wallet_ids: int):
+        """Prendre les verrous de tous les portefeuilles d'un virement pendant le bloc `async with`."""
+        acquired = []
+        try:
+            for index in self.stripe_indexes(*wallet_ids):
+                lock = self._locks[index]
+                started = time.perf_counter()
+                # verrou libéré mais promis à une coroutine en attente : acquire() attendra aussi
+                contended = lock.locked() or bool(getattr(lock, "_waiters", None))
+                await lock.acquire()
+                acquired.append(lock)
+                self._record(contended, started)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+
+
+# Verrous partagés par les virements de TransactionService (un seul processus : avec plusieurs workers,
+# seule la base de données garantit l'absence de découvert)
+wallet_locks = AsyncWalletLocks()
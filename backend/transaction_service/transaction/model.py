@@ -1,8 +1,11 @@
+import asyncio
 from datetime import datetime
 from sqlmodel import SQLModel, Field
 from typing import Optional
 import httpx  # Utilisé pour appeler l'API du microservice User
 
+from transaction.http_client import fetch_wallets
+
 
 class Transaction(SQLModel, table=True):
     """Modèle représentant une transaction entre deux portefeuilles."""
@@ -13,32 +16,35 @@ class Transaction(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     description: Optional[str] = None
 
-    async def process_transaction(self, user_service_url: str) -> bool:
-        """Traitement de la transaction avec validation des soldes via l'API du microservice User."""
-
-        # Vérification des soldes des portefeuilles via API
-        async with httpx.AsyncClient() as client:
-            sender_wallet_response = await client.get(f"{user_service_url}/wallets/{self.sender_wallet_id}")
-            receiver_wallet_response = await client.get(f"{user_service_url}/wallets/{self.receiver_wallet_id}")
-
-            if sender_wallet_response.status_code != 200:
-                raise ValueError("Portefeuille de l'expéditeur introuvable ou erreur dans le microservice utilisateur.")
-            if receiver_wallet_response.status_code != 200:
-                raise ValueError("Portefeuille du récepteur introuvable ou erreur dans le microservice utilisateur.")
-
-            sender_wallet = sender_wallet_response.json()
-            receiver_wallet = receiver_wallet_response.json()
-
-            # Vérification du solde du portefeuille de l'expéditeur
-            if sender_wallet['balance'] < self.amount:
-                raise ValueError("Solde insuffisant dans le portefeuille de l'expéditeur.")
-
-            # Si tout est bon, mettre à jour les soldes des portefeuilles via des appels API POST ou PUT
-            # Mise à jour du portefeuille de l'expéditeur
-            await client.put(f"{user_service_url}/wallets/{self.sender_wallet_id}",
-                             json={"balance": sender_wallet['balance'] - self.amount})
-            # Mise à jour du portefeuille du récepteur
-            await client.put(f"{user_service_url}/wallets/{self.receiver_wallet_id}",
-                             json={"balance": receiver_wallet['balance'] + self.amount})
+    async def process_transaction(self, client: httpx.AsyncClient) -> bool:
+        """Traitement de la transaction avec validation des soldes via l'API du microservice User.
+
+        `client` est le client partagé de l'application (base_url = user_service), ses connexions sont réutilisées.
+        """
+
+        # Vérification des soldes des portefeuilles via API : les deux portefeuilles en un seul appel
+        try:
+            wallets = await fetch_wallets(client, [self.sender_wallet_id, self.receiver_wallet_id])
+        except httpx.HTTPError:
+            raise ValueError("Erreur dans le microservice utilisateur.")
+
+        sender_wallet = wallets.get(self.sender_wallet_id)
+        receiver_wallet = wallets.get(self.receiver_wallet_id)
+        if sender_wallet is None:
+            raise ValueError("Portefeuille de l'expéditeur introuvable.")
+        if receiver_wallet is None:
+            raise ValueError("Portefeuille du récepteur introuvable.")
+
+        # Vérification du solde du portefeuille de l'expéditeur
+        if sender_wallet['balance'] < self.amount:
+            raise ValueError("Solde insuffisant dans le portefeuille de l'expéditeur.")
+
+        # Si tout est bon, mettre à jour les soldes des deux portefeuilles (appels PUT envoyés en parallèle)
+        await asyncio.gather(
+            client.put(f"/wallets/{self.sender_wallet_id}",
+                       json={"balance": sender_wallet['balance'] - self.amount}),
+            client.put(f"/wallets/{self.receiver_wallet_id}",
+                       json={"balance": receiver_wallet['balance'] + self.amount}),
+        )
 
         return True
@@ -1,13 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
-from transaction.schema import TransactionCreate, TransactionRead, TransactionUpdate
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Header
+from sqlmodel.ext.asyncio.session import AsyncSession
+from config import Config
+from database.main import get_session
+from transaction.schema import TransactionCreate, TransactionRead, TransactionUpdate, WalletEvent
 from transaction.services import TransactionService
+from transaction.http_client import client_pool_stats, fetch_wallets, get_http_client
+from transaction.wallet_cache import WalletCache, get_wallet_cache
 import httpx
 
 router = APIRouter()
 
-# URL de base de votre microservice user_service
-USER_SERVICE_URL = "http://localhost:8080"
-
 @router.get("/hello")
 async def read_root():
     return {"message": "Welcome to my Transaction Service API!"}
@@ -16,37 +21,65 @@ async def read_root():
 # Créer une nouvelle transaction
 @router.post("/transactions/", response_model=TransactionRead, status_code=201)
 async def create_transaction(
-    transaction_data: TransactionCreate
+    transaction_data: TransactionCreate,
+    client: httpx.AsyncClient = Depends(get_http_client),
+    wallet_cache: WalletCache = Depends(get_wallet_cache),
+    session: AsyncSession = Depends(get_session)
 ):
-    # Consommer les microservices user_service pour récupérer les portefeuilles
-    async with httpx.AsyncClient() as client:
-        user_response = await client.get(f"{USER_SERVICE_URL}/users/{transaction_data.sender_user_id}")
-        receiver_response = await client.get(f"{USER_SERVICE_URL}/users/{transaction_data.receiver_user_id}")
-
-        if user_response.status_code != 200 or receiver_response.status_code != 200:
-            raise HTTPException(status_code=404, detail="User(s) not found")
-
-        sender_user = user_response.json()
-        receiver_user = receiver_response.json()
-
-        sender_wallet = next((wallet for wallet in sender_user["wallets"] if wallet["id"] == transaction_data.sender_wallet_id), None)
-        receiver_wallet = next((wallet for wallet in receiver_user["wallets"] if wallet["id"] == transaction_data.receiver_wallet_id), None)
-
-        if not sender_wallet or not receiver_wallet:
-            raise HTTPException(status_code=404, detail="Wallets not found")
-
-        # Vérifier le solde du portefeuille de l'expéditeur
-        if sender_wallet["balance"] < transaction_data.amount:
-            raise HTTPException(status_code=400, detail="Insufficient balance")
-
-        # Appeler le service TransactionService pour créer la transaction
-        transaction = await TransactionService.create_transaction(
-            sender_wallet_id=transaction_data.sender_wallet_id,
-            receiver_wallet_id=transaction_data.receiver_wallet_id,
-            amount=transaction_data.amount
+    # Propriétaire et devise des portefeuilles : depuis le cache local, sinon un seul appel à user_service
+    try:
+        wallets = await wallet_cache.get_many(
+            [transaction_data.sender_wallet_id, transaction_data.receiver_wallet_id],
+            lambda wallet_ids: fetch_wallets(client, wallet_ids)
         )
-
-        return transaction
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"User service error: {str(e)}")
+
+    sender_wallet = wallets.get(transaction_data.sender_wallet_id)
+    receiver_wallet = wallets.get(transaction_data.receiver_wallet_id)
+
+    if not sender_wallet or not receiver_wallet:
+        raise HTTPException(status_code=404, detail="Wallets not found")
+
+    # Le portefeuille débité doit appartenir à l'expéditeur, le portefeuille crédité au destinataire
+    if sender_wallet.get("username") != transaction_data.sender_username:
+        raise HTTPException(status_code=403, detail="Sender wallet does not belong to the sender")
+    if receiver_wallet.get("username") != transaction_data.receiver_username:
+        raise HTTPException(status_code=404, detail="Wallets not found")
+
+    if sender_wallet["currency"] and receiver_wallet["currency"] and sender_wallet["currency"] != receiver_wallet["currency"]:
+        raise HTTPException(status_code=400, detail="Wallets have different currencies")
+
+    # Appeler le service TransactionService pour créer la transaction (le solde, jamais mis en cache, y est vérifié)
+    transaction = await TransactionService.create_transaction(
+        session,
+        sender_wallet_id=transaction_data.sender_wallet_id,
+        receiver_wallet_id=transaction_data.receiver_wallet_id,
+        amount=transaction_data.amount
+    )
+
+    return transaction
+
+# Métriques du pool de connexions vers user_service
+@router.get("/http-client/stats")
+async def get_http_client_stats(client: httpx.AsyncClient = Depends(get_http_client)):
+    return client_pool_stats(client)
+
+def verify_internal_token(x_internal_token: Optional[str] = Header(None)):
+    """Réserver une route aux autres services : en-tête X-Internal-Token égal à Config.WALLET_EVENTS_SECRET."""
+    secret = Config.WALLET_EVENTS_SECRET
+    if not secret or not x_internal_token or not hmac.compare_digest(x_internal_token, secret):
+        raise HTTPException(status_code=403, detail="Invalid internal token")
+
+# Notification de user_service : un portefeuille a été créé, crédité ou supprimé
+@router.post("/internal/wallet-events", status_code=204, dependencies=[Depends(verify_internal_token)])
+async def wallet_event(event: WalletEvent, wallet_cache: WalletCache = Depends(get_wallet_cache)):
+    wallet_cache.invalidate(event.wallet_id, event.at)
+
+# Métriques du cache des portefeuilles (taux de succès, âge des entrées servies, délai des notifications)
+@router.get("/wallet-cache/stats")
+async def get_wallet_cache_stats(wallet_cache: WalletCache = Depends(get_wallet_cache)):
+    return wallet_cache.get_stats()
 
 # Mettre à jour une transaction
 @router.put("/transactions/{transaction_id}", response_model=TransactionRead)
@@ -65,13 +98,15 @@ async def update_transaction(
 
 # Supprimer une transaction (Annuler une transaction)
 @router.delete("/transactions/{transaction_id}", status_code=204)
-async def cancel_transaction(transaction_id: int):
+async def cancel_transaction(transaction_id: int, session: AsyncSession = Depends(get_session)):
     try:
         # Appeler le service TransactionService pour annuler la transaction
-        success = await TransactionService.cancel_transaction(transaction_id)
+        success = await TransactionService.cancel_transaction(session, transaction_id)
         if not success:
             raise HTTPException(status_code=404, detail="Transaction not found")
         return {"message": "Transaction cancelled successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred while cancelling the transaction: {str(e)}")
 
@@ -7,8 +7,8 @@ from typing import Optional
 class TransactionCreate(BaseModel):
     sender_wallet_id: int
     receiver_wallet_id: int
-    sender_user_id: int
-    receiver_user_id: int
+    sender_username: str  # propriétaire du portefeuille débité (user_service identifie les utilisateurs par username)
+    receiver_username: str
     amount: float
     description: Optional[str] = None
 
@@ -27,3 +27,12 @@ class TransactionRead(BaseModel):
 class TransactionUpdate(BaseModel):
     amount: Optional[float] = None
     description: Optional[str] = None
+
+
+class WalletEvent(BaseModel):
+    """Notification envoyée par user_service quand un portefeuille change."""
+    event: str  # "created", "deposit" ou "deleted"
+    wallet_id: int
+    username: Optional[str] = None
+    currency: Optional[str] = None
+    at: Optional[float] = None  # horodatage du changement dans user_service
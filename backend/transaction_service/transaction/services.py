@@ -1,13 +1,20 @@
+from datetime import datetime
 from fastapi import HTTPException
 from typing import List, Optional
+from sqlalchemy import case, column, delete, insert, or_, table, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from transaction.repository import TransactionRepository
 from transaction.model import Transaction
+from transaction.locks import wallet_locks
 from sqlalchemy.future import select
 from pydantic import BaseModel
 class Wallet(BaseModel):
     id: int
     balance: float
+
+# Table des portefeuilles (créée par user_service) : seules les colonnes modifiées par un virement
+wallet_table = table("wallet", column("wallet_id"), column("balance"))
+
 class TransactionService:
     @staticmethod
     async def get_wallet_by_id(session: AsyncSession, wallet_id: int) -> Optional[Wallet]:
@@ -26,33 +33,81 @@ class TransactionService:
             amount: float,
             description: Optional[str] = None
     ) -> Transaction:
-        # Vérifier si les portefeuilles existent
-        sender_wallet = await session.get(Wallet, sender_wallet_id)
-        receiver_wallet = await session.get(Wallet, receiver_wallet_id)
-
-        if not sender_wallet or not receiver_wallet:
-            raise HTTPException(status_code=404, detail="Sender or receiver wallet not found.")
-
-        # Vérifier le solde de l'expéditeur
-        if sender_wallet.balance < amount:
-            raise HTTPException(status_code=400, detail="Insufficient balance in sender's wallet.")
+        """Virement atomique : débit conditionnel, crédit et insertion de la transaction dans une seule transaction SQL.
+
+        Les deux portefeuilles sont verrouillés dans l'ordre de leurs identifiants (`_move_balance`), débités
+        sous condition de solde et crédités par un seul `UPDATE`, puis la transaction est insérée
+        (`INSERT ... RETURNING`) et validée. Aucun virement concurrent (même depuis un autre processus) ne peut
+        mettre le portefeuille à découvert.
+        """
+        if amount <= 0:
+            raise HTTPException(status_code=400, detail="Amount must be positive.")
+        if sender_wallet_id == receiver_wallet_id:
+            raise HTTPException(status_code=400, detail="Sender and receiver wallets must be different.")
+
+        # Verrous du processus : un virement en conflit attend ici, sans occuper une connexion de la base
+        async with wallet_locks.hold(sender_wallet_id, receiver_wallet_id):
+            try:
+                await TransactionService._move_balance(session, sender_wallet_id, receiver_wallet_id, amount, "sender")
+                created = await session.execute(
+                    insert(Transaction)
+                    .values(
+                        sender_wallet_id=sender_wallet_id,
+                        receiver_wallet_id=receiver_wallet_id,
+                        amount=amount,
+                        description=description,
+                        created_at=datetime.utcnow()
+                    )
+                    .returning(*Transaction.__table__.columns)
+                )
+                transaction = Transaction(**created.one()._mapping)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
 
-        # Déduire le montant de l'expéditeur et ajouter au destinataire
-        sender_wallet.balance -= amount
-        receiver_wallet.balance += amount
+        return transaction
 
-        # Créer la transaction
-        transaction = Transaction(
-            sender_wallet_id=sender_wallet_id,
-            receiver_wallet_id=receiver_wallet_id,
-            amount=amount,
-            description=description
+    @staticmethod
+    async def _move_balance(
+            session: AsyncSession,
+            debited_wallet_id: int,
+            credited_wallet_id: int,
+            amount: float,
+            debited_role: str
+    ) -> None:
+        """Débiter `debited_wallet_id` et créditer `credited_wallet_id` dans la transaction SQL en cours.
+
+        `SELECT ... ORDER BY wallet_id FOR UPDATE` verrouille d'abord les deux lignes dans l'ordre des
+        identifiants : un seul `UPDATE ... WHERE wallet_id IN (...)` les verrouillerait dans l'ordre du plan
+        d'exécution (parcours séquentiel : ordre du stockage), et deux virements A -> B et B -> A de deux
+        processus pourraient s'interbloquer. Le solde lu sur la ligne verrouillée ne peut plus changer avant
+        l'`UPDATE`, qui garde tout de même sa condition `balance >= :amount`.
+        """
+        wallet_id, balance = wallet_table.c.wallet_id, wallet_table.c.balance
+        locked = await session.execute(
+            select(wallet_id, balance)
+            .where(wallet_id.in_([debited_wallet_id, credited_wallet_id]))
+            .order_by(wallet_id)
+            .with_for_update()
         )
-        session.add(transaction)
-        await session.commit()
-        await session.refresh(transaction)
-
-        return transaction
+        balances = dict(locked.all())
+        if debited_wallet_id not in balances or credited_wallet_id not in balances:
+            raise HTTPException(status_code=404, detail="Sender or receiver wallet not found.")
+        if balances[debited_wallet_id] < amount:
+            raise HTTPException(status_code=400, detail=f"Insufficient balance in {debited_role}'s wallet.")
+
+        updated = await session.execute(
+            update(wallet_table)
+            .where(
+                wallet_id.in_([debited_wallet_id, credited_wallet_id]),
+                or_(wallet_id != debited_wallet_id, balance >= amount)
+            )
+            .values(balance=balance + case((wallet_id == debited_wallet_id, -amount), else_=amount))
+            .returning(wallet_id)
+        )
+        if len(updated.all()) != 2:
+            raise HTTPException(status_code=400, detail=f"Insufficient balance in {debited_role}'s wallet.")
 
     @staticmethod
     async def get_transaction_by_id(session: AsyncSession, transaction_id: int) -> Optional[Transaction]:
@@ -76,25 +131,30 @@ class TransactionService:
 
     @staticmethod
     async def cancel_transaction(session: AsyncSession, transaction_id: int) -> bool:
-        """Annuler une transaction et rétablir les soldes des portefeuilles."""
-        # Récupérer la transaction à annuler
-        transaction = await session.get(Transaction, transaction_id)
-        if not transaction:
-            raise HTTPException(status_code=404, detail="Transaction not found.")
-
-        # Récupérer les portefeuilles de l'expéditeur et du récepteur
-        sender_wallet = await session.get(Wallet, transaction.sender_wallet_id)
-        receiver_wallet = await session.get(Wallet, transaction.receiver_wallet_id)
-
-        if not sender_wallet or not receiver_wallet:
-            raise HTTPException(status_code=404, detail="Wallet not found.")
-
-        # Rétablir les soldes des portefeuilles
-        sender_wallet.balance += transaction.amount
-        receiver_wallet.balance -= transaction.amount
-
-        # Supprimer la transaction
-        await session.delete(transaction)
-        await session.commit()
-
-        return True
\ No newline at end of file
+        """Annuler une transaction et rétablir les soldes des portefeuilles.
+
+        Même principe que le virement : la transaction est supprimée (`DELETE ... RETURNING`, une annulation
+        concurrente de la même transaction ne trouve plus de ligne), puis le destinataire est débité sous
+        condition de solde et l'expéditeur recrédité comme pour un virement (`_move_balance`), dans une seule
+        transaction SQL.
+        """
+        try:
+            deleted = await session.execute(
+                delete(Transaction)
+                .where(Transaction.transaction_id == transaction_id)
+                .returning(Transaction.sender_wallet_id, Transaction.receiver_wallet_id, Transaction.amount)
+            )
+            transaction = deleted.first()
+            if transaction is None:
+                raise HTTPException(status_code=404, detail="Transaction not found.")
+            sender_wallet_id, receiver_wallet_id, amount = transaction
+
+            async with wallet_locks.hold(sender_wallet_id, receiver_wallet_id):
+                # refusé si le destinataire a déjà dépensé une partie du montant reçu
+                await TransactionService._move_balance(session, receiver_wallet_id, sender_wallet_id, amount, "receiver")
+                await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+        return True
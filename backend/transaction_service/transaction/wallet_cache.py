@@ -0,0 +1,144 @@
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from fastapi import Request
+
+from config import Config
+
+# Champs du portefeuille gardés en cache : jamais le solde, vérifié par la base au moment de la transaction
+CACHED_FIELDS = ("wallet_id", "username", "currency")
+
+
+def _cached_fields(wallet: dict) -> dict:
+    return {field: wallet.get(field) for field in CACHED_FIELDS}
+
+
+class WalletCache:
+    """Cache local des informations stables des portefeuilles (propriétaire, devise).
+
+    LRU borné à `max_size` entrées, chaque entrée expire après `ttl` secondes. user_service notifie
+    chaque création, dépôt ou suppression de portefeuille (POST /internal/wallet-events) : l'entrée est
+    retirée aussitôt, le TTL ne sert qu'en cas de notification perdue.
+    """
+
+    def __init__(self, max_size: int = Config.WALLET_CACHE_SIZE, ttl: float = Config.WALLET_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[float, dict]] = OrderedDict()  # wallet_id -> (mis en cache à, portefeuille)
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_loads = 0  # réponses de user_service non gardées : notification reçue pendant le chargement
+        self._generation = 0  # incrémenté à chaque notification
+        self._loading: dict[int, int] = {}  # wallet_id -> chargements en cours
+        self._invalidated: dict[int, int] = {}  # wallet_id en cours de chargement -> génération de sa notification
+        self.max_age_served = 0.0  # âge maximal d'une entrée servie depuis le cache
+        self._age_served_total = 0.0
+        self.notification_lag_max = 0.0  # délai entre le changement dans user_service et sa réception
+        self._notification_lag_total = 0.0
+        self.notifications = 0
+
+    def get(self, wallet_id: int) -> Optional[dict]:
+        entry = self._entries.get(wallet_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        cached_at, wallet = entry
+        age = time.monotonic() - cached_at
+        if age > self.ttl:
+            del self._entries[wallet_id]
+            self.expired += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(wallet_id)
+        self.hits += 1
+        self._age_served_total += age
+        self.max_age_served = max(self.max_age_served, age)
+        return wallet
+
+    def put(self, wallet: dict) -> None:
+        wallet_id = wallet["wallet_id"]
+        self._entries[wallet_id] = (time.monotonic(), _cached_fields(wallet))
+        self._entries.move_to_end(wallet_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_many(self, wallet_ids: list[int],
+                       loader: Callable[[list[int]], Awaitable[dict[int, dict]]]) -> dict[int, dict]:
+        """Portefeuilles demandés : depuis le cache, les autres chargés en un seul appel à `loader`."""
+        wallets = {}
+        missing = []
+        for wallet_id in wallet_ids:
+            wallet = self.get(wallet_id)
+            if wallet is None:
+                missing.append(wallet_id)
+            else:
+                wallets[wallet_id] = wallet
+        if missing:
+            # Un portefeuille notifié pendant le chargement a pu changer après la lecture de user_service :
+            # la réponse est renvoyée à l'appelant mais pas gardée, sinon elle resterait servie jusqu'au TTL
+            generation = self._generation
+            for wallet_id in missing:
+                self._loading[wallet_id] = self._loading.get(wallet_id, 0) + 1
+            try:
+                loaded = await loader(missing)
+                stale = {wallet_id for wallet_id in missing if self._invalidated.get(wallet_id, 0) > generation}
+            finally:
+                for wallet_id in missing:
+                    self._loading[wallet_id] -= 1
+                    if not self._loading[wallet_id]:
+                        del self._loading[wallet_id]
+                        self._invalidated.pop(wallet_id, None)
+            for wallet_id, wallet in loaded.items():
+                if wallet_id in stale:
+                    self.stale_loads += 1
+                    wallets[wallet_id] = _cached_fields(wallet)
+                else:
+                    self.put(wallet)
+                    wallets[wallet_id] = self._entries[wallet_id][1]
+        return wallets
+
+    def invalidate(self, wallet_id: int, changed_at: Optional[float] = None) -> None:
+        """Notification de user_service : le portefeuille a changé, son entrée est retirée."""
+        if self._entries.pop(wallet_id, None) is not None:
+            self.invalidations += 1
+        self._generation += 1
+        if wallet_id in self._loading:
+            self._invalidated[wallet_id] = self._generation
+        if changed_at is not None:
+            lag = max(0.0, time.time() - changed_at)
+            self.notifications += 1
+            self._notification_lag_total += lag
+            self.notification_lag_max = max(self.notification_lag_max, lag)
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_loads": self.stale_loads,
+            "staleness": {
+                "avg_age_served": round(self._age_served_total / self.hits, 3) if self.hits else None,
+                "max_age_served": round(self.max_age_served, 3),
+                "notifications": self.notifications,
+                "avg_notification_lag": round(self._notification_lag_total / self.notifications, 3)
+                if self.notifications else None,
+                "max_notification_lag": round(self.notification_lag_max, 3),
+            },
+        }
+
+
+def get_wallet_cache(request: Request) -> WalletCache:
+    """Dépendance FastAPI : le cache créé dans le lifespan."""
+    return request.app.state.wallet_cache
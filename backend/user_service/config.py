@@ -10,3 +10,9 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY")
     ALGORITHM = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES = 30
+    # Services notified of wallet changes (created, deposit, deleted) to invalidate their caches,
+    # e.g. "http://localhost:8001/internal/wallet-events" for transaction_service (comma-separated)
+    WALLET_EVENT_SUBSCRIBERS = [url.strip() for url in os.getenv("WALLET_EVENT_SUBSCRIBERS", "").split(",") if url.strip()]
+    WALLET_EVENT_TIMEOUT = float(os.getenv("WALLET_EVENT_TIMEOUT", "2"))  # seconds
+    # Shared secret sent in the X-Internal-Token header; must match WALLET_EVENTS_SECRET of the subscribers
+    WALLET_EVENTS_SECRET = os.getenv("WALLET_EVENTS_SECRET")
@@ -4,14 +4,17 @@ from fastapi import FastAPI
 
 from user.routes import router
 from database.main import init_db
+from user.notifications import wallet_notifier
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    await wallet_notifier.start()
     yield
-    # Shutdown logic (if needed) goes here
+    # Shutdown: send the wallet notifications still in flight
+    await wallet_notifier.stop()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -0,0 +1,69 @@
+import asyncio
+import time
+from typing import Optional
+
+import httpx
+
+from config import Config
+
+
+class WalletChangeNotifier:
+    """Publish wallet changes (created, deposit, deleted) to the services that cache wallets.
+
+    Notifications are sent in the background after the change is committed: a slow or
+    unreachable subscriber never delays the request. A lost notification is covered by
+    the TTL of the subscriber's cache.
+    """
+
+    def __init__(self, subscribers: list[str], timeout: float, secret: Optional[str] = None):
+        self.subscribers = subscribers
+        self.timeout = timeout
+        self.secret = secret
+        self.client: Optional[httpx.AsyncClient] = None
+        self.sent = 0
+        self.failed = 0
+        self._tasks = set()
+
+    async def start(self) -> None:
+        if self.subscribers:
+            headers = {"X-Internal-Token": self.secret} if self.secret else None
+            self.client = httpx.AsyncClient(timeout=self.timeout, headers=headers)
+
+    async def stop(self) -> None:
+        """Wait for the notifications in flight, then close the client."""
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=self.timeout)
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def publish(self, event: str, wallet) -> None:
+        """Notify every subscriber that `wallet` changed (no-op when nobody subscribed)."""
+        if self.client is None:
+            return
+        payload = {
+            "event": event,
+            "wallet_id": wallet.wallet_id,
+            "username": wallet.username,
+            "currency": wallet.currency,
+            "at": time.time(),
+        }
+        for url in self.subscribers:
+            task = asyncio.create_task(self._send(url, payload))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, url: str, payload: dict) -> None:
+        try:
+            response = await self.client.post(url, json=payload)
+            response.raise_for_status()
+            self.sent += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"Wallet notification to {url} failed: {e}")
+
+
+# Shared by every WalletRepository, started and stopped with the application
+wallet_notifier = WalletChangeNotifier(
+    Config.WALLET_EVENT_SUBSCRIBERS, Config.WALLET_EVENT_TIMEOUT, Config.WALLET_EVENTS_SECRET
+)
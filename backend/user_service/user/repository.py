@@ -4,6 +4,7 @@ from sqlalchemy.orm import joinedload
 from datetime import datetime
 from typing import List, Optional
 from user.model import User, Wallet
+from user.notifications import wallet_notifier
 
 class UserRepository:
     def __init__(self, session: AsyncSession):
@@ -66,6 +67,7 @@ class WalletRepository:
         self.session.add(wallet)
         await self.session.commit()  # Ensure commit is called
         await self.session.refresh(wallet)
+        wallet_notifier.publish("created", wallet)
         return wallet
 
     async def get_wallets_by_user(self, username: str) -> List[Wallet]:
@@ -73,6 +75,11 @@ class WalletRepository:
         result = await self.session.execute(select(Wallet).where(Wallet.username == username))
         return result.scalars().all()
 
+    async def get_wallets_by_ids(self, wallet_ids: List[int]) -> List[Wallet]:
+        """Fetch several wallets by their IDs in a single query."""
+        result = await self.session.execute(select(Wallet).where(Wallet.wallet_id.in_(wallet_ids)))
+        return result.scalars().all()
+
     async def deposit_to_wallet(self, wallet_id: int, amount: int) -> Optional[Wallet]:
         """Deposit money to a wallet."""
         wallet = await self.session.get(Wallet, wallet_id)
@@ -80,4 +87,15 @@ class WalletRepository:
             wallet.balance += amount
             await self.session.commit()
             await self.session.refresh(wallet)
+            wallet_notifier.publish("deposit", wallet)
         return wallet
+
+    async def delete_wallet(self, wallet_id: int) -> bool:
+        """Delete a wallet by its ID."""
+        wallet = await self.session.get(Wallet, wallet_id)
+        if wallet:
+            await self.session.delete(wallet)
+            await self.session.commit()
+            wallet_notifier.publish("deleted", wallet)
+            return True
+        return False
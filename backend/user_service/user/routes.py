@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, FastAPI
+from fastapi import APIRouter, Depends, HTTPException, status, FastAPI, Query
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
@@ -19,6 +19,9 @@ from user.services import WalletService
 
 router = APIRouter()
 
+# Maximum number of wallets returned by GET /wallets?ids=
+MAX_WALLET_IDS = 100
+
 # General Routes
 @router.get("/")
 async def root():
@@ -222,3 +225,18 @@ async def create_wallet(
     created_wallet = await wallet_service.create_wallet(session, username, wallet.currency, wallet.balance)
 
     return created_wallet
+
+
+@router.get("/wallets", response_model=list[WalletRead])
+async def get_wallets(
+    ids: str = Query(..., description="Comma-separated wallet IDs, e.g. 1,2"),
+    session: AsyncSession = Depends(get_session),
+):
+    """Return only the requested wallets, in one query (used by transaction_service for transfers)."""
+    try:
+        wallet_ids = sorted({int(wallet_id) for wallet_id in ids.split(",") if wallet_id.strip()})
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be a comma-separated list of integers")
+    if not wallet_ids or len(wallet_ids) > MAX_WALLET_IDS:
+        raise HTTPException(status_code=422, detail=f"Between 1 and {MAX_WALLET_IDS} wallet IDs are allowed")
+    return await WalletService.get_wallets_by_ids(session, wallet_ids)
@@ -67,11 +67,21 @@ class WalletService:
         """Fetch all wallets for a specific user."""
         return await WalletRepository.get_wallets_by_user(session, username)
 
+    @staticmethod
+    async def get_wallets_by_ids(session: AsyncSession, wallet_ids: List[int]) -> List[Wallet]:
+        """Fetch only the requested wallets (e.g. the two wallets of a transfer)."""
+        return await WalletRepository(session).get_wallets_by_ids(wallet_ids)
+
     @staticmethod
     async def deposit_to_wallet(session: AsyncSession, wallet_id: int, amount: int) -> Optional[Wallet]:
         """Deposit money into a wallet."""
         return await WalletRepository.deposit_to_wallet(session, wallet_id, amount)
 
+    @staticmethod
+    async def delete_wallet(session: AsyncSession, wallet_id: int) -> bool:
+        """Delete a wallet (subscribers are notified to drop it from their caches)."""
+        return await WalletRepository(session).delete_wallet(wallet_id)
+
     async def _create_default_wallets(session: AsyncSession, username: str):
         """Create default wallets for a new user."""
         print(f"Creating default wallets for {username}")  # Add logging
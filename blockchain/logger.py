@@ -1,12 +1,13 @@
 import logging
 import os
+from logging.handlers import RotatingFileHandler
 
 # Ensure the logs folder exists
 os.makedirs("logs", exist_ok=True)
 
 # Error logger configuration
 error_logger = logging.getLogger("error_logger")
-error_handler = logging.FileHandler("logs/error_logs.log")
+error_handler = RotatingFileHandler("logs/error_logs.log", maxBytes=10 * 1024 * 1024, backupCount=7)
 error_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
 error_handler.setFormatter(error_formatter)
 error_logger.setLevel(logging.ERROR)
@@ -14,7 +15,7 @@ error_logger.addHandler(error_handler)
 
 # Transaction logger configuration
 transaction_logger = logging.getLogger("transaction_logger")
-transaction_handler = logging.FileHandler("logs/transaction_logs.log")
+transaction_handler = RotatingFileHandler("logs/transaction_logs.log", maxBytes=10 * 1024 * 1024, backupCount=7)
 transaction_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
 transaction_handler.setFormatter(transaction_formatter)
 transaction_logger.setLevel(logging.INFO)
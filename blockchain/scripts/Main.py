@@ -1,5 +1,6 @@
 from web3 import Web3
 from dotenv import load_dotenv
+import argparse
 import os
 import sys
 import json
@@ -8,6 +9,7 @@ import json
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 from blockchain.logger import error_logger, transaction_logger
+from blockchain.scripts.bulk import BulkSender, Checkpoint, read_payouts
 
 
 #for privacy and security
@@ -68,7 +70,8 @@ def send_payment(amount_in_ether):
 
         signed_tx = web3.eth.account.sign_transaction(tx, PRIVATE_KEY)
         tx_hash = web3.eth.send_raw_transaction(signed_tx.raw_transaction)
-        transaction_logger.info(f"Payment transaction sent with hash: {web3.to_hex(tx_hash)}")
+        transaction_logger.info(f"Payment transaction sent with hash: {web3.to_hex(tx_hash)}, amount: {amount_in_ether} ETH")
+        return web3.to_hex(tx_hash)
     except Exception as e:
         error_logger.error(f"Error in send_payment: {e}")
 
@@ -77,6 +80,7 @@ def check_balance():
     try:
         balance = contract.functions.getBalance().call()
         transaction_logger.info(f"Contract balance: {web3.from_wei(balance, 'ether')} ETH")
+        return web3.from_wei(balance, 'ether')
     except Exception as e:
         error_logger.error(f"Error in check_balance: {e}")
 
@@ -93,12 +97,65 @@ def withdraw_funds(amount_in_ether):
 
         signed_tx = web3.eth.account.sign_transaction(tx, PRIVATE_KEY)
         tx_hash = web3.eth.send_raw_transaction(signed_tx.raw_transaction)
-        transaction_logger.info(f"Withdrawal transaction sent with hash: {web3.to_hex(tx_hash)}")
+        transaction_logger.info(f"Withdrawal transaction sent with hash: {web3.to_hex(tx_hash)}, amount: {amount_in_ether} ETH")
+        return web3.to_hex(tx_hash)
     except Exception as e:
         error_logger.error(f"Error in withdraw_funds: {e}")
 
-# Example calls
+# Send every payout of a CSV/NDJSON file, with a checkpoint to resume after a crash
+def send_bulk(args):
+    payouts = read_payouts(args.file)
+    checkpoint = Checkpoint(args.checkpoint or f"{args.file}.checkpoint")
+    sender = BulkSender(
+        web3, contract, PRIVATE_KEY, checkpoint,
+        concurrency=args.concurrency,
+        gas_price_bump_gwei=args.gas_bump,
+        wait_receipts=not args.no_wait,
+        receipt_timeout=args.receipt_timeout,
+    )
+    try:
+        summary = sender.run(payouts)
+    finally:
+        # the results reflect the checkpoint, even when the run stopped halfway
+        sender.write_results(payouts, args.output or f"{args.file}.results.ndjson")
+    transaction_logger.info(f"Bulk run finished: {summary}")
+    return summary
+
+
+# Command line: balance, pay AMOUNT, withdraw AMOUNT, bulk FILE
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Interact with the FintechContract")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("balance", help="show the contract balance")
+    pay = commands.add_parser("pay", help="send ETH to the contract pay() function")
+    pay.add_argument("amount", type=float, help="amount in ETH")
+    withdraw = commands.add_parser("withdraw", help="withdraw ETH from the contract")
+    withdraw.add_argument("amount", type=float, help="amount in ETH")
+    bulk = commands.add_parser("bulk", help="send the payouts of a CSV or NDJSON file")
+    bulk.add_argument("file", help="payouts file: columns id, action (pay/withdraw/transfer), amount (ETH), to")
+    bulk.add_argument("--output", help="results file (default: FILE.results.ndjson)")
+    bulk.add_argument("--checkpoint", help="checkpoint file used to resume (default: FILE.checkpoint)")
+    bulk.add_argument("--concurrency", type=int, default=8, help="transactions in flight at the same time")
+    bulk.add_argument("--gas-bump", type=float, default=2, help="gwei added to the current gas price")
+    bulk.add_argument("--receipt-timeout", type=float, default=120, help="seconds to wait for each receipt")
+    bulk.add_argument("--no-wait", action="store_true", help="do not wait for the receipts")
+    args = parser.parse_args(argv)
+
+    if args.command == "balance":
+        result = check_balance()
+    elif args.command == "pay":
+        result = send_payment(args.amount)
+    elif args.command == "withdraw":
+        result = withdraw_funds(args.amount)
+    else:
+        summary = send_bulk(args)
+        print(json.dumps(summary))
+        return 1 if set(summary) & {"signed", "error", "dropped", "failed", "pending"} else 0
+    if result is None:
+        return 1
+    print(result)
+    return 0
+
+
 if __name__ == "__main__":
-    check_balance()
-    #send_payment(0.01)  # Send 0.01 ETH to the contract
-    # withdraw_funds(0.005)  # Uncomment to withdraw 0.005 ETH
+    sys.exit(main())
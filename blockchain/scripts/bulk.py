@@ -0,0 +1,310 @@
+import csv
+import itertools
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from web3.exceptions import TimeExhausted, TransactionNotFound
+
+from blockchain.logger import error_logger, transaction_logger
+
+# Actions a payout row can ask for
+ACTIONS = ("pay", "withdraw", "transfer")
+# States written to the checkpoint, a row in a final state is never sent again
+FINAL_STATES = ("mined", "failed")
+# Signed transaction that may have reached the node: on restart it is broadcast again from the
+# checkpoint, with the same nonce, never signed again ("error" = the send failed in an ambiguous way)
+OUTSTANDING_STATES = ("signed", "sent", "error")
+# Gas limits: pay()/withdraw() keep the limit used by the single commands, a plain transfer costs 21000
+CONTRACT_GAS_LIMIT = 200000
+TRANSFER_GAS_LIMIT = 21000
+# Errors returned by the node when it already has our transaction, or when the nonce is already used
+ALREADY_KNOWN_ERRORS = ("already known", "known transaction")
+NONCE_USED_ERRORS = ("nonce too low",)
+# Errors that prove the node refused the transaction: the payout is signed again with a new nonce.
+# Any other error (timeout, connection lost, unknown message) may come after the node accepted it.
+REJECTED_ERRORS = NONCE_USED_ERRORS + (
+    "insufficient funds", "invalid signature", "invalid sender", "intrinsic gas too low",
+    "exceeds block gas limit", "invalid chain id", "only replay-protected",
+)
+
+
+# Read the payouts file (CSV with a header row, or NDJSON: one JSON object per line).
+# Columns: id (optional, defaults to the row number), action (pay, withdraw or transfer), amount in ETH,
+# to (recipient address, only for transfer). Without an action, a row with a "to" is a transfer, else a pay().
+def read_payouts(path):
+    if path.endswith((".ndjson", ".jsonl")):
+        with open(path) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+
+    payouts, seen = [], set()
+    for number, row in enumerate(rows, start=1):
+        payout_id = str(row.get("id") or number)
+        to = row.get("to") or None
+        action = row.get("action") or ("transfer" if to else "pay")
+        if payout_id in seen:
+            raise ValueError(f"Row {number}: duplicate id {payout_id}")
+        if action not in ACTIONS:
+            raise ValueError(f"Row {number}: unknown action {action!r}, expected one of {', '.join(ACTIONS)}")
+        if action == "transfer" and not to:
+            raise ValueError(f"Row {number}: a transfer needs a 'to' address")
+        try:
+            amount = Decimal(str(row["amount"]))
+        except (KeyError, InvalidOperation):
+            raise ValueError(f"Row {number}: missing or invalid amount")
+        if amount <= 0:
+            raise ValueError(f"Row {number}: amount must be positive")
+        seen.add(payout_id)
+        payouts.append({"id": payout_id, "action": action, "amount": str(amount), "to": to})
+    return payouts
+
+
+# Append-only journal of every step of every payout (signed, sent, mined/failed).
+# Each line is flushed to disk before the transaction goes further, so after a crash the
+# last line of each payout tells what happened to it: nothing is signed twice with two nonces.
+class Checkpoint:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    # Last known state of each payout, by id
+    def load(self):
+        state = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # line cut by the crash: the step was not done
+                        continue
+                    state[entry["id"]] = {**state.get(entry["id"], {}), **entry}
+        return state
+
+    def record(self, entry):
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+# Submit a list of payouts from SENDER_ADDRESS:
+# - nonces are assigned locally, starting from the pending transaction count read once,
+#   instead of one get_transaction_count per transaction;
+# - at most `concurrency` transactions are sent and waited for at the same time;
+# - each step is written to the checkpoint; on restart, transactions already signed are
+#   checked and broadcast again with the same nonce, payouts already done are skipped.
+class BulkSender:
+    def __init__(self, web3, contract, private_key, checkpoint, concurrency=8, gas_price_bump_gwei=2,
+                 wait_receipts=True, receipt_timeout=120):
+        self.web3 = web3
+        self.contract = contract
+        self.account = web3.eth.account.from_key(private_key)
+        self.checkpoint = checkpoint
+        self.concurrency = concurrency
+        self.gas_price_bump = web3.to_wei(gas_price_bump_gwei, "gwei")
+        self.wait_receipts = wait_receipts
+        self.receipt_timeout = receipt_timeout
+        self.pay_data = contract.encode_abi("pay")
+        self.chain_id = None
+        self.gas_price = None
+        self._stop = threading.Event()
+        self._slots = threading.BoundedSemaphore(concurrency)
+
+    # Transaction ready to sign for one payout
+    def build_transaction(self, payout, nonce):
+        value = self.web3.to_wei(Decimal(payout["amount"]), "ether")
+        tx = {"chainId": self.chain_id, "nonce": nonce, "gasPrice": self.gas_price}
+        if payout["action"] == "pay":
+            return {**tx, "to": self.contract.address, "value": value, "gas": CONTRACT_GAS_LIMIT, "data": self.pay_data}
+        if payout["action"] == "withdraw":
+            data = self.contract.encode_abi("withdraw", args=[value])
+            return {**tx, "to": self.contract.address, "value": 0, "gas": CONTRACT_GAS_LIMIT, "data": data}
+        to = self.web3.to_checksum_address(payout["to"])
+        return {**tx, "to": to, "value": value, "gas": TRANSFER_GAS_LIMIT, "data": "0x"}
+
+    def run(self, payouts):
+        state = self.checkpoint.load()
+        self.chain_id = self.web3.eth.chain_id
+        self.gas_price = self.web3.eth.gas_price + self.gas_price_bump
+
+        # 1. payouts signed before the crash: find out whether their transaction made it and broadcast
+        # the unmined ones again. Their receipts are awaited at the end: a nonce gap left by the crash
+        # is only filled in step 2, nothing above it can be mined before that.
+        requeued = set()
+        resumed = []
+        held = set()  # nonces of transactions still on their way
+        outstanding = sorted(
+            (entry for entry in state.values() if entry.get("status") in OUTSTANDING_STATES),
+            key=lambda entry: entry["nonce"],
+        )
+        for entry in outstanding:
+            status = self._resume(entry)
+            if status is None:
+                requeued.add(entry["id"])
+            elif status != "mined":
+                held.add(entry["nonce"])
+            if status == "sent":
+                resumed.append((entry["id"], entry["tx_hash"]))
+            elif status == "error":
+                # maybe accepted, maybe not: new payouts could wait behind its nonce forever
+                self._stop.set()
+
+        # 2. the remaining payouts, with nonces the node and the checkpoint do not use yet: from the pending
+        # count, skipping the nonces held by resumed transactions (the node may not count queued ones)
+        state = self.checkpoint.load()
+        todo = [
+            payout for payout in payouts
+            if payout["id"] in requeued
+            or state.get(payout["id"], {}).get("status") not in FINAL_STATES + OUTSTANDING_STATES
+        ]
+        pending = self.web3.eth.get_transaction_count(self.account.address, "pending")
+        nonces = (nonce for nonce in itertools.count(pending) if nonce not in held)
+        if self._stop.is_set():
+            error_logger.error("Bulk run: a resumed transaction could not be broadcast again, no new payout sent")
+        transaction_logger.info(
+            f"Bulk run: {len(payouts)} payouts, {len(payouts) - len(todo)} already handled, "
+            f"{len(todo)} to send from nonce {pending}, skipping {sorted(held)}"
+        )
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for payout in todo:
+                self._slots.acquire()
+                if self._stop.is_set():
+                    self._slots.release()
+                    break
+                nonce = next(nonces)
+                signed = self.account.sign_transaction(self.build_transaction(payout, nonce))
+                self.checkpoint.record({
+                    **payout,
+                    "status": "signed",
+                    "nonce": nonce,
+                    "tx_hash": self.web3.to_hex(signed.hash),
+                    "raw_transaction": self.web3.to_hex(signed.raw_transaction),
+                    "error": None,
+                })
+                executor.submit(self._submit, payout["id"], signed.raw_transaction, self.web3.to_hex(signed.hash))
+            # 3. receipts of the transactions resumed in step 1, waited for together
+            if self.wait_receipts:
+                for payout_id, tx_hash in resumed:
+                    executor.submit(self._wait_receipt, payout_id, tx_hash)
+        return self.summary(payouts)
+
+    # Send one signed transaction and wait for its receipt (in a worker thread)
+    def _submit(self, payout_id, raw_transaction, tx_hash):
+        try:
+            if self._broadcast(payout_id, raw_transaction, tx_hash) and self.wait_receipts:
+                self._wait_receipt(payout_id, tx_hash)
+        finally:
+            self._slots.release()
+
+    def _broadcast(self, payout_id, raw_transaction, tx_hash):
+        try:
+            self.web3.eth.send_raw_transaction(raw_transaction)
+        except Exception as e:
+            if not any(reason in str(e).lower() for reason in ALREADY_KNOWN_ERRORS):
+                # the next nonces would wait behind this one forever: stop sending, a new run resumes from here,
+                # broadcasting the same signed transaction again unless the node refused it
+                self._stop.set()
+                status = "rejected" if self._rejected(e) else "error"
+                self.checkpoint.record({"id": payout_id, "status": status, "error": str(e)})
+                error_logger.error(f"Error in bulk send of payout {payout_id}: {e}")
+                return False
+        self.checkpoint.record({"id": payout_id, "status": "sent"})
+        transaction_logger.info(f"Bulk payout {payout_id} sent with hash: {tx_hash}")
+        return True
+
+    def _wait_receipt(self, payout_id, tx_hash):
+        try:
+            receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=self.receipt_timeout)
+        except TimeExhausted:
+            # still pending: a new run checks it again
+            error_logger.error(f"Bulk payout {payout_id}: no receipt for {tx_hash} after {self.receipt_timeout}s")
+            return
+        except Exception as e:
+            error_logger.error(f"Error waiting for the receipt of payout {payout_id}: {e}")
+            return
+        self._record_receipt(payout_id, receipt)
+
+    def _record_receipt(self, payout_id, receipt):
+        status = "mined" if receipt["status"] == 1 else "failed"
+        self.checkpoint.record({
+            "id": payout_id,
+            "status": status,
+            "block_number": receipt["blockNumber"],
+            "gas_used": receipt["gasUsed"],
+            "effective_gas_price": receipt.get("effectiveGasPrice"),
+        })
+        if status == "failed":
+            error_logger.error(f"Bulk payout {payout_id} reverted in block {receipt['blockNumber']}")
+
+    def _get_receipt(self, tx_hash):
+        try:
+            return self.web3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            return None
+
+    @staticmethod
+    def _rejected(error):
+        return any(reason in str(error).lower() for reason in REJECTED_ERRORS)
+
+    # Payout signed by a previous run, checked and broadcast again without waiting for its receipt.
+    # Returns "mined" (receipt found), "sent" (on its way, receipt to wait for), "error" (broadcast failed
+    # again, kept with its nonce for the next run) or None to sign it again with a new nonce.
+    def _resume(self, entry):
+        receipt = self._get_receipt(entry["tx_hash"])
+        if receipt is None:
+            try:
+                self.web3.eth.send_raw_transaction(entry["raw_transaction"])
+            except Exception as e:
+                if any(reason in str(e).lower() for reason in NONCE_USED_ERRORS):
+                    # the nonce is used: either by this transaction (mined meanwhile) or by another one
+                    receipt = self._get_receipt(entry["tx_hash"])
+                    if receipt is None:
+                        self.checkpoint.record({"id": entry["id"], "status": "dropped"})
+                        return None
+                elif not any(reason in str(e).lower() for reason in ALREADY_KNOWN_ERRORS):
+                    error_logger.error(f"Error resuming payout {entry['id']}: {e}")
+                    status = "rejected" if self._rejected(e) else "error"
+                    self.checkpoint.record({"id": entry["id"], "status": status, "error": str(e)})
+                    return None if status == "rejected" else "error"
+        if receipt is not None:
+            self._record_receipt(entry["id"], receipt)
+            return "mined"
+        if entry["status"] != "sent":
+            self.checkpoint.record({"id": entry["id"], "status": "sent", "error": None})
+        return "sent"
+
+    # Counts by state, in the order of the payouts file
+    def summary(self, payouts):
+        state = self.checkpoint.load()
+        counts = {}
+        for payout in payouts:
+            status = state.get(payout["id"], {}).get("status", "pending")
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    # Results file: one JSON line per payout with its hash and receipt, in the order of the payouts file
+    def write_results(self, payouts, path):
+        state = self.checkpoint.load()
+        with open(path, "w") as f:
+            for payout in payouts:
+                entry = state.get(payout["id"], {})
+                f.write(json.dumps({
+                    **payout,
+                    "status": entry.get("status", "pending"),
+                    "nonce": entry.get("nonce"),
+                    "tx_hash": entry.get("tx_hash"),
+                    "block_number": entry.get("block_number"),
+                    "gas_used": entry.get("gas_used"),
+                    "effective_gas_price": entry.get("effective_gas_price"),
+                    "error": entry.get("error"),
+                }) + "\n")
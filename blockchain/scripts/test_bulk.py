@@ -0,0 +1,119 @@
+import json
+import os
+import sys
+
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+# because when running the project doesn't know the hiearchy of folders
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from blockchain.scripts.bulk import BulkSender, Checkpoint
+
+CONTRACT_ADDRESS = "0x" + "11" * 20
+PAYOUTS = [{"id": str(number), "action": "pay", "amount": str(number), "to": None} for number in (1, 2, 3)]
+
+
+# Node of a single sender: keeps every transaction it accepted by nonce, the pending count only covers
+# the nonces without a gap below them (like geth and nethermind)
+class FakeEth:
+    chain_id = 1
+    gas_price = 1
+
+    def __init__(self):
+        self.pool = {}
+        self.failures = []  # errors raised by the next sends, after or instead of accepting the transaction
+
+    def send_raw_transaction(self, raw_transaction):
+        if isinstance(raw_transaction, str):  # resumed from the checkpoint
+            raw_transaction = Web3.to_bytes(hexstr=raw_transaction)
+        tx = json.loads(raw_transaction)
+        failure = self.failures.pop(0) if self.failures else None
+        if isinstance(failure, tuple):  # ("rejected", error): refused before reaching the pool
+            raise failure[1]
+        if tx["nonce"] in self.pool:
+            raise ValueError("already known" if self.pool[tx["nonce"]] == tx else "replacement transaction underpriced")
+        self.pool[tx["nonce"]] = tx
+        if failure is not None:  # accepted, but the reply is lost
+            raise failure
+
+    def get_transaction_count(self, address, block_identifier):
+        nonce = 0
+        while nonce in self.pool:
+            nonce += 1
+        return nonce
+
+    def get_transaction_receipt(self, tx_hash):
+        raise TransactionNotFound(tx_hash)
+
+
+class FakeAccount:
+    address = "0x" + "22" * 20
+
+    def sign_transaction(self, tx):
+        raw = json.dumps(tx, sort_keys=True).encode()
+        return type("Signed", (), {"raw_transaction": raw, "hash": Web3.keccak(raw)})()
+
+
+class FakeWeb3:
+    to_wei = staticmethod(Web3.to_wei)
+    to_hex = staticmethod(Web3.to_hex)
+    to_checksum_address = staticmethod(Web3.to_checksum_address)
+
+    def __init__(self):
+        self.eth = FakeEth()
+        self.eth.account = type("Accounts", (), {"from_key": staticmethod(lambda key: FakeAccount())})
+
+
+class FakeContract:
+    address = CONTRACT_ADDRESS
+
+    def encode_abi(self, name, args=None):
+        return "0x"
+
+
+def run(web3, checkpoint_path):
+    sender = BulkSender(web3, FakeContract(), "key", Checkpoint(checkpoint_path), concurrency=1, wait_receipts=False)
+    return sender.run(PAYOUTS)
+
+
+def paid_amounts(web3):
+    return sorted(tx["value"] for tx in web3.eth.pool.values())
+
+
+def test_timeout_after_acceptance_is_broadcast_again_not_paid_twice(tmp_path):
+    web3 = FakeWeb3()
+    web3.eth.failures.append(TimeoutError("read timed out"))
+    checkpoint_path = str(tmp_path / "payouts.checkpoint")
+
+    assert run(web3, checkpoint_path) == {"error": 1, "pending": 2}
+    assert run(web3, checkpoint_path) == {"sent": 3}
+    assert sorted(web3.eth.pool) == [0, 1, 2]
+    assert paid_amounts(web3) == [Web3.to_wei(amount, "ether") for amount in (1, 2, 3)]
+
+
+def test_rejected_payout_is_signed_again(tmp_path):
+    web3 = FakeWeb3()
+    web3.eth.failures.append(("rejected", ValueError("insufficient funds for gas * price + value")))
+    checkpoint_path = str(tmp_path / "payouts.checkpoint")
+
+    assert run(web3, checkpoint_path) == {"rejected": 1, "pending": 2}
+    assert run(web3, checkpoint_path) == {"sent": 3}
+    assert sorted(web3.eth.pool) == [0, 1, 2]
+    assert paid_amounts(web3) == [Web3.to_wei(amount, "ether") for amount in (1, 2, 3)]
+
+
+def test_new_nonces_skip_the_ones_held_by_sent_payouts(tmp_path):
+    web3 = FakeWeb3()
+    checkpoint_path = str(tmp_path / "payouts.checkpoint")
+    # payout 1 went out with nonce 1 and is queued behind a gap: the node's pending count is still 0
+    signed = FakeAccount().sign_transaction({"nonce": 1, "value": Web3.to_wei(1, "ether")})
+    web3.eth.pool[1] = json.loads(signed.raw_transaction)
+    Checkpoint(checkpoint_path).record({
+        **PAYOUTS[0], "status": "sent", "nonce": 1,
+        "tx_hash": Web3.to_hex(signed.hash), "raw_transaction": Web3.to_hex(signed.raw_transaction),
+    })
+
+    assert run(web3, checkpoint_path) == {"sent": 3}
+    assert sorted(web3.eth.pool) == [0, 1, 2]
+    assert paid_amounts(web3) == [Web3.to_wei(amount, "ether") for amount in (1, 2, 3)]